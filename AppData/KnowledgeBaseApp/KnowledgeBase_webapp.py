@@ -13,58 +13,47 @@ import sys
 from subprocess import run
 from urllib.parse import unquote
 
-try:
-    from docutils import core as docutils_core
-except (ImportError, SystemError):
-    docutils_core = None
-
 try:
     # If executed as a script to start the web server.
-    host, port, app_dir_path = sys.argv[1:]
+    host, port, app_dir_path = sys.argv[1:4]
+    # NOTE: The server options are optional. See bottle_utils.start_server.
+    server_backend, server_workers, server_pid_file = sys.argv[4:] or ("wsgiref", "0", "")
 except Exception:
     # If imported as a module by Sphinx.
     host, port = None, None
+    server_backend, server_workers, server_pid_file = "wsgiref", "0", ""
     app_dir_path = os.path.realpath(os.path.abspath(os.path.join(
         os.path.normpath(os.path.dirname(__file__)))))
 
 sys.path.insert(0, app_dir_path)
 
+from data_tables_index import DataTablesIndex
+from render_cache import RenderCache
+from render_cache import get_file_signature
+from render_cache import get_render_kind
+from render_cache import parse_if_none_match
+from search_index import SearchIndex
+from static_files import serve_static_file
 from python_utils.bottle_utils import WebApp
 from python_utils.bottle_utils import bottle
 from python_utils.bottle_utils import bottle_app
-from python_utils.mistune_utils import md
 
 www_root = os.path.realpath(os.path.abspath(os.path.join(
     os.path.normpath(os.getcwd()))))
 
+_data_tables_index = DataTablesIndex(os.path.join(www_root, "assets", "data", "data_tables.json"))
+_search_index = SearchIndex(os.path.join(os.path.dirname(www_root), "data_storage",
+                                         "search_index.bin"))
+# NOTE: Documents rendered ahead of time by the prerender_inline_content sub-command are stored
+# in the same directory used by the cache of rendered documents.
+_render_cache = RenderCache(cache_dir=os.path.join(os.path.dirname(www_root), "data_storage",
+                                                   "render_cache"),
+                            root=www_root)
+
 _title_template = "<h1>{page_title}</h1>\n"
 _source_template = '<h3><a href="{page_source}">Source</a></h3>\n'
 
 
-def parse_rst(input_string):
-    """Parse resTrructuredText.
-
-    Parameters
-    ----------
-    input_string : str
-        The rST string to parse.
-
-    Returns
-    -------
-    str
-        The parsed rST string.
-    """
-    overrides = {
-        "input_encoding": "unicode",
-        "doctitle_xform": True,
-        "initial_header_level": 1
-    }
-    parts = docutils_core.publish_parts(source=input_string, source_path=None,
-                                        writer_name="html5", settings_overrides=overrides)
-
-    return parts["html_body"]
-
-
 class KnowledgeBaseWebapp(WebApp):
     """Web server.
     """
@@ -81,10 +70,16 @@ class KnowledgeBaseWebapp(WebApp):
         """
         super().__init__(*args, **kwargs)
 
+        _data_tables_index.ensure_loaded()
+        _search_index.ensure_loaded()
+
     @bottle_app.route("/<filepath:path>")
     def server_static(filepath):
         """Serve static files.
 
+        Compressed versions of the files created by the compress_static_files sub-command are
+        served to clients that accept them. See :any:`static_files.serve_static_file`.
+
         Parameters
         ----------
         filepath : str
@@ -95,47 +90,104 @@ class KnowledgeBaseWebapp(WebApp):
         object
             An instance of bottle.HTTPResponse.
         """
-        return bottle.static_file(filepath, root=www_root)
+        return serve_static_file(filepath, root=www_root)
+
+    @bottle_app.route("/data_tables", method=["GET", "POST"])
+    def data_tables():
+        """Handle DataTables server-side processing requests.
+
+        Returns
+        -------
+        dict
+            The DataTables response. See :any:`DataTablesIndex.query`.
+        """
+        return _data_tables_index.query(bottle.request.params.decode())
+
+    @bottle_app.route("/search")
+    def search():
+        """Full-text search of the documents listed in the index table.
+
+        Query parameters are ``q`` (the search terms), ``limit`` (maximum amount of results),
+        ``offset`` (amount of results to skip) and ``snippets`` (``0`` to omit the snippets).
+
+        Returns
+        -------
+        dict
+            The search results. See :any:`SearchIndex.search`.
+        """
+        params = bottle.request.params.decode()
+
+        try:
+            limit = min(max(int(params.get("limit", 20)), 1), 100)
+            offset = max(int(params.get("offset", 0)), 0)
+        except ValueError:
+            limit, offset = 20, 0
+
+        return _search_index.search(params.get("q", ""), limit=limit, offset=offset,
+                                    snippets=params.get("snippets", "1") != "0")
 
-    @bottle_app.post("/handle_inline_content")
+    @bottle_app.route("/handle_inline_content", method=["GET", "POST"])
     def handle_inline_content():
         """Load files inline.
 
+        Rendered documents are cached (see :any:`RenderCache`) and sent with an ``ETag`` header.
+        Documents rendered ahead of time are served if they are fresh.
+        Requests whose ``If-None-Match`` header matches the current entity tag of a document
+        are answered with a ``304 Not Modified`` response without reading the document.
+
         Returns
         -------
         sre
             The content for the landing page.
         """
-        html_data = ""
-        handler = unquote(bottle.request.POST["inlinePageHandler"]).lower()
+        params = bottle.request.params
+        handler = unquote(params["inlinePageHandler"]).lower()
         file_path = os.path.abspath(os.path.join(
-            www_root, unquote(bottle.request.POST["inlinePageURL"])))
+            www_root, unquote(params["inlinePageURL"])))
+
+        if not file_path.startswith(os.path.join(www_root, "")):
+            return bottle.HTTPError(403, "Access denied.")
 
-        page_title = unquote(bottle.request.POST["inlinePageTitle"])
-        page_source = unquote(bottle.request.POST["inlinePageSource"])
+        page_title = unquote(params["inlinePageTitle"])
+        page_source = unquote(params["inlinePageSource"])
 
         page_title = _title_template.format(page_title=page_title) if page_title else ""
         page_source = _source_template.format(page_source=page_source) if page_source else ""
 
-        with open(file_path, "r", encoding="UTF-8") as f:
-            raw_data = f.read()
-
-        # TODO: Using "md" for .rst because I couldn't find an RST icon between the thousands of
-        # icons in NerdFont. Some day I might stumble upon one. LOL
-        if handler == "md":
-            try:
-                # NOTE: Try to parse reStructuredText and fallback to Markdown.
-                if file_path.lower()[-4:] == ".rst" and docutils_core is not None:
-                    html_data = parse_rst(raw_data)
-                else:
-                    html_data = md(raw_data)
-            except Exception:
-                html_data = raw_data
-        else:
-            html_data = raw_data
+        kind = get_render_kind(file_path, handler)
+
+        try:
+            signature = get_file_signature(file_path)
+        except OSError:
+            return bottle.HTTPError(404, "File does not exist.")
+
+        etag = _render_cache.get_etag(file_path, kind, signature, page_title + page_source)
+
+        if etag in parse_if_none_match(bottle.request.get_header("If-None-Match")):
+            return bottle.HTTPResponse(status=304, headers={"ETag": etag})
+
+        rendered_signature, html_data = _render_cache.get(file_path, kind)
+
+        if rendered_signature != signature:
+            etag = _render_cache.get_etag(file_path, kind, rendered_signature,
+                                          page_title + page_source)
+
+        bottle.response.set_header("ETag", etag)
+        bottle.response.set_header("Cache-Control", "no-cache")
 
         return page_title + page_source + html_data
 
+    @bottle_app.route("/render_cache_stats")
+    def render_cache_stats():
+        """Get the counters of the cache of rendered documents.
+
+        Returns
+        -------
+        dict
+            See :any:`RenderCache.stats`.
+        """
+        return _render_cache.get_stats()
+
     @bottle_app.route("/")
     def index():
         """Serve the landing page.
@@ -185,5 +237,8 @@ class KnowledgeBaseWebapp(WebApp):
 # Just because it's the right thing to do.
 # As it is right now, everything works as "it should".
 if __name__ == "__main__" and host and port:
-    app = KnowledgeBaseWebapp(host, port)
+    app = KnowledgeBaseWebapp(host, port,
+                              backend=server_backend,
+                              workers=int(server_workers) or None,
+                              pid_file=server_pid_file or None)
     app.run()
@@ -14,7 +14,6 @@ import json
 import os
 
 from shlex import quote as shell_quote
-from subprocess import CalledProcessError
 
 from . import app_data
 
@@ -29,6 +28,9 @@ root_folder = os.path.realpath(os.path.abspath(os.path.join(
 PATHS = {
     "www_base": os.path.join(root_folder, "UserData", "www"),
     "data_tables_json": os.path.join(root_folder, "UserData", "www", "assets", "data", "data_tables.json"),
+    "data_tables_manifest": os.path.join(root_folder, "UserData", "data_storage", "data_tables_manifest.json"),
+    "search_index": os.path.join(root_folder, "UserData", "data_storage", "search_index.bin"),
+    "render_cache": os.path.join(root_folder, "UserData", "data_storage", "render_cache"),
     "convertions": os.path.join(root_folder, "UserData", "data_storage", "convertions"),
     "docutils_convertions": os.path.join(root_folder, "UserData", "data_storage", "docutils_convertions"),
     "pandoc_html_template": os.path.join(root_folder, "AppData", "data",
@@ -41,35 +43,50 @@ class DataTablesObject():
     the `DataTables JavaScript library <http://www.datatables.net/>`_ which
     is used in the Knowledge Base index.html file.
 
+    The data is generated on demand. :any:`DataTablesObject.iter_data_tables_obj` yields the
+    data as it is generated and :any:`DataTablesObject.get_data_tables_obj` collects it into
+    a list.
+
     Attributes
     ----------
-    data_tables_obj : list
-        Where the JSON data is stored before finally save it into a JSON file.
+    data_tables_obj : list|None
+        Where the JSON data is stored by :any:`DataTablesObject.get_data_tables_obj`.
     logger : LogSystem
         The logger.
     """
 
-    def __init__(self, file_extensions=[], dry_run=False, logger=None):
+    def __init__(self, file_extensions=[], manifest=None, workers=None, dry_run=False,
+                 logger=None):
         """Initialize.
 
         Parameters
         ----------
         file_extensions : list, optional
             Used by the :any:`DataTablesObject._get_data_by_file_extension` method.
+        manifest : scan_manifest.ScanManifest, optional
+            The scan manifest used to avoid listing directories and re-generating data that
+            didn't change since the last run. If not specified, everything is scanned.
+        workers : int, optional
+            Maximum amount of threads used to scan sub-category folders. If not specified,
+            :any:`concurrent.futures.ThreadPoolExecutor` decides.
         dry_run : bool, optional
             Log an action without actually performing it.
         logger : LogSystem
             The logger.
         """
-        self.data_tables_obj = []
+        self.data_tables_obj = None
         self._dry_run = dry_run
         self.logger = logger
         self._file_extensions = file_extensions
+        self._workers = workers
+
+        if manifest is None:
+            from .scan_manifest import ScanManifest
 
-        self._get_data_from_html_pages()
-        self._get_data_from_repositories()
-        self._get_data_from_archives()
-        self._get_data_by_file_extension()
+            manifest = ScanManifest(PATHS["data_tables_manifest"], full=True, dry_run=dry_run,
+                                    logger=logger)
+
+        self._manifest = manifest
 
     def _get_data_by_file_extension(self):
         """Generate JSON data depending on the file extensions stored in self._file_extensions.
@@ -81,73 +98,152 @@ class DataTablesObject():
         folders (representing sub-category names). Finally, all second level sub-folders contain
         files of said file types.
 
-        These folders will be scanned in search for files and generate "JSON data objects" that
-        will be stored into self.data_tables_obj.
+        These folders will be scanned in search for files and generate "JSON data objects".
+
+        Directories are listed through :any:`ScanManifest.list_dir`, so only directories that
+        changed since the last run are actually listed. Each sub-category tree is scanned in a
+        thread pool and the results are yielded in the order in which sub-categories were found,
+        so the generated data is always the same.
+
+        Yields
+        ------
+        dict
+            A "JSON data object".
         """
-        for file_extension in self._file_extensions:
-            file_pattern = "." + file_extension
-            pages_path = os.path.join(PATHS["www_base"], file_extension)
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
 
-            if not os.path.exists(pages_path):
-                continue
+        from .scan_manifest import is_dir_entry
 
-            cat_names = os.listdir(pages_path)
+        def iter_sub_cat_jobs():
+            for file_extension in self._file_extensions:
+                pages_path = os.path.join(PATHS["www_base"], file_extension)
+                cat_entries = self._manifest.list_dir(pages_path, file_extension)
 
-            for cat in cat_names:
-                if not os.path.isdir(os.path.join(pages_path, cat)):
-                    continue
+                for cat in sorted(cat_entries):
+                    if not is_dir_entry(cat_entries[cat], follow_links=True):
+                        continue
 
-                sub_cat_names = os.listdir(os.path.join(pages_path, cat))
+                    sub_cat_entries = self._manifest.list_dir(os.path.join(pages_path, cat),
+                                                              os.path.join(file_extension, cat))
 
-                for sub_cat in sub_cat_names:
-                    sub_cat_path = os.path.join(pages_path, cat, sub_cat)
+                    for sub_cat in sorted(sub_cat_entries):
+                        if is_dir_entry(sub_cat_entries[sub_cat], follow_links=True):
+                            yield file_extension, cat, sub_cat
 
-                    if not os.path.isdir(sub_cat_path):
-                        continue
+        # NOTE: Same default as ThreadPoolExecutor.
+        workers = self._workers or min(32, (os.cpu_count() or 1) + 4)
+        pending = deque()
+
+        # NOTE: Only a window of sub-categories is scanned ahead of the one being yielded, so
+        # the data of all sub-categories is never held in memory at once.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for job in iter_sub_cat_jobs():
+                pending.append(executor.submit(self._get_sub_category_data, *job))
+
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+
+    def _get_sub_category_data(self, file_extension, cat, sub_cat):
+        """Generate JSON data for all files of a given type found inside a sub-category folder.
+
+        Parameters
+        ----------
+        file_extension : str
+            A file extension. See :any:`DataTablesObject._get_data_by_file_extension`.
+        cat : str
+            A category name.
+        sub_cat : str
+            A sub-category name.
 
-                    for dirname, dirnames, filenames in os.walk(sub_cat_path, topdown=False):
-                        for filename in filenames:
-                            try:
-                                if filename.endswith(file_pattern):
-                                    title = filename[:-int(len(file_pattern))]
-                                    category = cat + "|" + sub_cat
-
-                                    self.data_tables_obj.append({
-                                        "t": title,
-                                        "c": category,
-                                        # Full path to files from the www folder.
-                                        "p": os.path.join(file_extension, cat, sub_cat,
-                                                          title + "." + file_extension),
-                                        # Icon name
-                                        "h": file_extension
-                                    })
-
-                                    if file_extension == "epub":
-                                        rel_epub = os.path.join(
-                                            file_extension, cat, sub_cat, title, "index.html")
-                                        abs_epub = os.path.join(PATHS["www_base"], rel_epub)
-
-                                        if file_utils.is_real_file(abs_epub):
-                                            self.data_tables_obj.append({
-                                                "t": title,
-                                                "c": category,
-                                                # Full path to files from the www folder.
-                                                "p": rel_epub,
-                                                # Icon name
-                                                "h": "ext"
-                                            })
-                            except Exception as err:
-                                self.logger.error(filename)
-                                self.logger.error(err)
-                                continue
+        Returns
+        -------
+        list
+            The JSON data generated for the sub-category.
+        """
+        from .scan_manifest import ENTRY_FILE
+        from .scan_manifest import is_dir_entry
+
+        data_tables_obj = []
+        file_pattern = "." + file_extension
+        category = cat + "|" + sub_cat
+        sub_cat_rel_path = os.path.join(file_extension, cat, sub_cat)
+
+        for dirname, entries in self._manifest.walk(os.path.join(PATHS["www_base"],
+                                                                 sub_cat_rel_path),
+                                                    sub_cat_rel_path):
+            for filename in sorted(entries):
+                if is_dir_entry(entries[filename], follow_links=True):
+                    continue
+
+                try:
+                    if filename.endswith(file_pattern):
+                        title = filename[:-int(len(file_pattern))]
+
+                        data_tables_obj.append({
+                            "t": title,
+                            "c": category,
+                            # Full path to files from the www folder.
+                            "p": os.path.join(sub_cat_rel_path, title + "." + file_extension),
+                            # Icon name
+                            "h": file_extension
+                        })
+
+                        if file_extension == "epub":
+                            # NOTE: The tree is walked bottom-up, so the epub directory (if any)
+                            # was already listed and its entries are reused from the manifest.
+                            rel_epub_dir = os.path.join(sub_cat_rel_path, title)
+                            epub_entries = self._manifest.list_dir(
+                                os.path.join(PATHS["www_base"], rel_epub_dir), rel_epub_dir)
+
+                            if epub_entries.get("index.html") == ENTRY_FILE:
+                                data_tables_obj.append({
+                                    "t": title,
+                                    "c": category,
+                                    # Full path to files from the www folder.
+                                    "p": os.path.join(rel_epub_dir, "index.html"),
+                                    # Icon name
+                                    "h": "ext"
+                                })
+                except Exception as err:
+                    self.logger.error(filename)
+                    self.logger.error(err)
+                    continue
+
+        return data_tables_obj
 
     def _get_data_from_html_pages(self):
-        """Obtain the JSON data stored in html_pages.json and store it into self.data_tables_obj.
+        """Obtain the JSON data stored in html_pages.json.
 
         The UserData/www/html_pages/html_pages.json is manually maintained and it contains
         JSON data related to the content of the html_pages folder.
+
+        Returns
+        -------
+        list
+            DataTables object.
         """
         json_path = os.path.join(PATHS["www_base"], "html_pages", "html_pages.json")
+
+        return self._manifest.get_source_data(
+            "html_pages", [json_path], lambda: self._read_html_pages_json(json_path))
+
+    def _read_html_pages_json(self, json_path):
+        """Read the html_pages.json file.
+
+        Parameters
+        ----------
+        json_path : str
+            Path to the html_pages.json file.
+
+        Returns
+        -------
+        list
+            DataTables object.
+        """
         json_data = None
 
         try:
@@ -162,37 +258,65 @@ class DataTablesObject():
                                                                         html_file=data["p"])
                     data["h"] = "ext"
 
-                self.data_tables_obj.extend(json_data)
+                return json_data
         except Exception as err:
             self.logger.error("get_data_from_html_pages")
             self.logger.error(err)
 
+        return []
+
     def _get_data_from_repositories(self):
         """Obtain the JSON data generated for each repository.
 
         Each repository, after it's "handled", will generate a JSON file containing data related
-        to the repository itself. This method will store all that data into self.data_tables_obj.
+        to the repository itself. This method will obtain all that data.
+
+        Returns
+        -------
+        list
+            DataTables object.
         """
         from . import repositories_handler
 
-        handler = repositories_handler.RepositoriesHandler(dry_run=self._dry_run,
-                                                           logger=self.logger)
-        data_tables_obj = handler.get_data_tables_obj()
+        def get_data():
+            handler = repositories_handler.RepositoriesHandler(dry_run=self._dry_run,
+                                                               logger=self.logger)
+            return handler.get_data_tables_obj() or []
 
-        if data_tables_obj:
-            self.data_tables_obj.extend(data_tables_obj)
+        return self._manifest.get_source_data(
+            "repositories", [repositories_handler.repositories_data_tables_json_path], get_data)
 
     def _get_data_from_archives(self):
         """Obtain the JSON data generated for downloaded archives.
+
+        Returns
+        -------
+        list
+            DataTables object.
         """
         from . import archives_handler
 
-        handler = archives_handler.ArchivesHandler(dry_run=self._dry_run,
-                                                   logger=self.logger)
-        data_tables_obj = handler.get_data_tables_obj()
+        def get_data():
+            handler = archives_handler.ArchivesHandler(dry_run=self._dry_run,
+                                                       logger=self.logger)
+            return handler.get_data_tables_obj() or []
+
+        return self._manifest.get_source_data(
+            "archives", [os.path.join(root_folder, "UserData", "data_sources", "archives.py")],
+            get_data)
+
+    def iter_data_tables_obj(self):
+        """Generate the JSON data.
 
-        if data_tables_obj:
-            self.data_tables_obj.extend(data_tables_obj)
+        Yields
+        ------
+        dict
+            A "JSON data object".
+        """
+        yield from self._get_data_from_html_pages()
+        yield from self._get_data_from_repositories()
+        yield from self._get_data_from_archives()
+        yield from self._get_data_by_file_extension()
 
     def get_data_tables_obj(self):
         """Obtain self.data_tables_obj.
@@ -202,6 +326,9 @@ class DataTablesObject():
         list
             self.data_tables_obj
         """
+        if self.data_tables_obj is None:
+            self.data_tables_obj = list(self.iter_data_tables_obj())
+
         return self.data_tables_obj
 
 
@@ -228,7 +355,116 @@ def get_pandoc_path():
     return pandoc_path
 
 
-def convert_html_to_markdown(from_clipboard, logger):
+def run_conversion_jobs(jobs, workers=None, logger=None):
+    """Run document conversion commands in parallel.
+
+    The output of each command is captured and a summary with the errors and warnings of all
+    commands is logged once all of them finished.
+
+    Parameters
+    ----------
+    jobs : list
+        The conversion jobs. Each job is a dictionary with the ``cmd`` to run (a list of
+        arguments), the ``cwd`` in which to run it and the ``source`` file being converted.
+    workers : int, optional
+        Maximum amount of commands run at the same time. Default: the amount of CPUs.
+    logger : LogSystem
+        The logger.
+
+    Returns
+    -------
+    int
+        The amount of failed conversions.
+
+    Raises
+    ------
+    exceptions.KeyboardInterruption
+        See <class :any:`exceptions.KeyboardInterruption`>.
+    """
+    import time
+
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import as_completed
+    from subprocess import PIPE
+
+    from .python_utils import exceptions
+
+    if not jobs:
+        logger.info("Nothing to convert.")
+        return 0
+
+    def run(job):
+        return cmd_utils.run_cmd(job["cmd"], stdout=PIPE, stderr=PIPE, cwd=job["cwd"],
+                                 universal_newlines=True)
+
+    workers = workers or os.cpu_count() or 1
+    failures = []
+    warnings = []
+    start = time.time()
+
+    logger.info(shell_utils.get_cli_separator("-"), date=False)
+    logger.info("Converting %d file/s (%d at a time)..." % (len(jobs), workers))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, job): job for job in jobs}
+
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                job = futures[future]
+
+                try:
+                    result = future.result()
+                    returncode, output, error_output = \
+                        result.returncode, result.stdout, result.stderr.strip()
+                except Exception as err:
+                    returncode, output, error_output = None, "", str(err)
+
+                if returncode == 0:
+                    logger.info("[%d/%d] Converted: %s" % (done, len(jobs), job["source"]),
+                                date=False)
+
+                    if output:
+                        logger.debug(output)
+
+                    if error_output:
+                        warnings.append((job, error_output))
+                else:
+                    logger.error("[%d/%d] Failed: %s" % (done, len(jobs), job["source"]),
+                                 date=False)
+                    failures.append((job, returncode, error_output))
+        except (KeyboardInterrupt, SystemExit):
+            for future in futures:
+                future.cancel()
+
+            raise exceptions.KeyboardInterruption()
+
+    logger.info(shell_utils.get_cli_separator("-"), date=False)
+
+    for job, error_output in warnings:
+        logger.warning("**Warnings converting:** %s" % job["source"], date=False)
+        logger.warning(error_output, date=False)
+
+    for job, returncode, error_output in failures:
+        logger.error("**Error converting:** %s" % job["source"], date=False)
+        logger.error("Command: %s" % " ".join(shell_quote(arg) for arg in job["cmd"]),
+                     date=False)
+        logger.error("Exit status: %s" % returncode, date=False)
+
+        if error_output:
+            logger.error(error_output, date=False)
+
+    msg = "%d file/s converted, %d failed, %d with warnings (%.2f seconds)." % (
+        len(jobs) - len(failures), len(failures), len(warnings), time.time() - start)
+
+    if failures:
+        logger.warning(msg)
+    else:
+        logger.success(msg)
+
+    return len(failures)
+
+
+def convert_html_to_markdown(from_clipboard, logger, workers=None):
     """Convert HTML files into Markdown.
 
     Parameters
@@ -237,12 +473,14 @@ def convert_html_to_markdown(from_clipboard, logger):
         Convert clipboard content.
     logger : LogSystem
         The logger.
+    workers : int, optional
+        See :any:`run_conversion_jobs`.
     """
     pandoc_inplace_convertion(from_format="html", to_format="md",
-                              from_clipboard=from_clipboard, logger=logger)
+                              from_clipboard=from_clipboard, logger=logger, workers=workers)
 
 
-def convert_rst_to_markdown(from_clipboard, logger):
+def convert_rst_to_markdown(from_clipboard, logger, workers=None):
     """Convert RST files into Markdown.
 
     Parameters
@@ -251,24 +489,31 @@ def convert_rst_to_markdown(from_clipboard, logger):
         Convert clipboard content.
     logger : LogSystem
         The logger.
+    workers : int, optional
+        See :any:`run_conversion_jobs`.
     """
     pandoc_inplace_convertion(from_format="rst", to_format="md",
-                              from_clipboard=from_clipboard, logger=logger)
+                              from_clipboard=from_clipboard, logger=logger, workers=workers)
 
 
-def pandoc_inplace_convertion(from_format, to_format, from_clipboard, logger):
+def pandoc_inplace_convertion(from_format, to_format, from_clipboard, logger, workers=None):
     """Convert documents inside a fixed temporary location with Pandoc.
 
+    Each converted file is saved next to the file it was converted from, so files with the same
+    name in different folders don't overwrite each other.
+
     Parameters
     ----------
     from_format : str
-        From which format to convert from. See :any:`convert_with_pandoc` for more details.
+        From which format to convert from. See :any:`get_pandoc_convertion_cmd` for more details.
     to_format : str
-        To which format to convert to. See :any:`convert_with_pandoc` for more details.
+        To which format to convert to. See :any:`get_pandoc_convertion_cmd` for more details.
     from_clipboard : bool
         Convert clipboard content.
     logger : LogSystem
         The logger.
+    workers : int, optional
+        See :any:`run_conversion_jobs`.
 
     Returns
     -------
@@ -300,29 +545,39 @@ def pandoc_inplace_convertion(from_format, to_format, from_clipboard, logger):
             logger.error(err)
             return
 
-        convert_with_pandoc(from_clipboard_file_path, output_path,
-                            from_format, to_format, logger)
+        input_files = [from_clipboard_file_path]
     else:
+        input_files = []
+
         for dirname, dirnames, filenames in os.walk(output_path, topdown=False):
             for filename in filenames:
                 if filename.endswith(file_pattern):
-                    file_path = os.path.join(dirname, filename)
-                    convert_with_pandoc(file_path, output_path, from_format, to_format, logger)
+                    input_files.append(os.path.join(dirname, filename))
 
+    try:
+        jobs = [{
+            "cmd": get_pandoc_convertion_cmd(file_path, from_format, to_format),
+            "cwd": os.path.dirname(file_path),
+            "source": file_path
+        } for file_path in input_files]
+    except Exception as err:
+        logger.error(err)
+        return
+
+    run_conversion_jobs(jobs, workers=workers, logger=logger)
 
-def convert_with_pandoc(input_file, output_path, from_format, to_format, logger):
-    """Convert documents using Pandoc.
 
-    The "input_file" file will be converted and saved inside the "output_path" folder. The output
-    file will have the same name as the input file, but with the extension defined by the
-    "to_format" parameter.
+def get_pandoc_convertion_cmd(input_file, from_format, to_format):
+    """Get the command to convert documents using Pandoc.
+
+    The "input_file" file will be converted and saved inside the folder the command is run
+    from. The output file will have the same name as the input file, but with the extension
+    defined by the "to_format" parameter.
 
     Parameters
     ----------
     input_file : str
         The file to convert.
-    output_path : str
-        The location were the converted file will be saved.
     from_format : str
         From which format to convert from. This is actually the file extension of "input_file".
         This file extension will be used to decide which argument to pass to the "--from" Pandoc
@@ -331,8 +586,11 @@ def convert_with_pandoc(input_file, output_path, from_format, to_format, logger)
         To which format to convert to. Similarly to "from_format", this parameter is a file
         extension that will be used to chose the argument to pass to the "--to" Pandoc option.
         It is also the file extension that will be assigned to the output file.
-    logger : LogSystem
-        The logger.
+
+    Returns
+    -------
+    list
+        The command arguments.
     """
     pandoc_path = get_pandoc_path()
 
@@ -346,34 +604,101 @@ def convert_with_pandoc(input_file, output_path, from_format, to_format, logger)
         "md": "gfm"
     }
 
-    try:
-        cmd_utils.exec_command(
-            " ".join([
-                pandoc_path,
-                "--atx-headers",
-                "--email-obfuscation=none",
-                "--wrap=preserve",
-                "--to=%s" % to_options[to_format],
-                "--output=%s" % ('"%s.%s"' %
-                                 (os.path.splitext(os.path.basename(input_file))[0], to_format)),
-                "--no-highlight",
-                "--from=%s" % from_options[from_format],
-                "%s" % ('"' + input_file + '"')
-            ]),
-            cwd=output_path,
-            logger=logger
-        )
-    except Exception as err:
-        logger.error(err)
+    return [
+        pandoc_path,
+        "--atx-headers",
+        "--email-obfuscation=none",
+        "--wrap=preserve",
+        "--to=%s" % to_options[to_format],
+        "--output=%s.%s" % (os.path.splitext(os.path.basename(input_file))[0], to_format),
+        "--no-highlight",
+        "--from=%s" % from_options[from_format],
+        input_file
+    ]
+
+
+# NOTE: Settings used by the docutils conversions of the current process.
+# See _init_docutils_worker.
+_docutils_settings = None
+
+
+def _init_docutils_worker(settings_overrides):
+    """Initialize a process that converts documents with docutils.
+
+    docutils is imported and its settings are generated only once per process.
+
+    Parameters
+    ----------
+    settings_overrides : dict
+        docutils settings overrides.
+    """
+    global _docutils_settings
+
+    import warnings
+
+    from docutils.frontend import OptionParser
+    from docutils.parsers.rst import Parser
+    from docutils.readers.standalone import Reader
+    from docutils.writers.html5_polyglot import Writer
+
+    defaults = dict(settings_overrides)
+    defaults.setdefault("traceback", True)
+
+    # NOTE: These are the settings that publish_parts generates from settings_overrides,
+    # including the ones read from the docutils configuration files (docutils.conf,
+    # ~/.docutils, etc.). docutils itself still uses the deprecated OptionParser to get them.
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=DeprecationWarning)
+        _docutils_settings = OptionParser(components=(Parser, Reader, Writer),
+                                          defaults=defaults,
+                                          read_config_files=True).get_default_values()
+
+
+def _convert_rst_file_docutils(f_path, dst_path, template_data):
+    """Convert a reStructuredText file into an HTML file with docutils.
+
+    Parameters
+    ----------
+    f_path : str
+        The file to convert.
+    dst_path : str
+        The converted file.
+    template_data : dict
+        The assets included in the converted file (see :any:`app_data.DOCUTILS_HTML5_TEMPLATE`).
+    """
+    import re
+
+    from copy import copy
+
+    from docutils.core import publish_parts
+
+    with open(f_path, "r") as rst_file:
+        html_parts = publish_parts(source=rst_file.read(),
+                                   source_path=None,
+                                   writer_name="html5",
+                                   settings=copy(_docutils_settings))
+
+    # NOTE: The title part is HTML. Only its text (with its entities) is used.
+    html_title = re.sub(r"<[^>]+>", "", html_parts["title"])
+    html_doc = app_data.DOCUTILS_HTML5_TEMPLATE.format(title=html_title,
+                                                       body=html_parts["body"],
+                                                       **template_data)
+
+    with open(dst_path, "w") as dst_file:
+        dst_file.write(html_doc)
 
 
 def convert_rst_to_html_docutils(input_path_storage=None,
                                  include_bootstrap_css=True,
                                  include_bootstrap_js=False,
                                  include_highlight_js=False,
+                                 workers=None,
                                  logger=None):
     """Convert Rst to HTML with docutils.
 
+    Files are converted in parallel by a pool of processes. Files already converted are only
+    converted again if they were modified after their conversion.
+
     Parameters
     ----------
     input_path_storage : None, optional
@@ -384,6 +709,9 @@ def convert_rst_to_html_docutils(input_path_storage=None,
         Whether to include the Bootstrap JS script.
     include_highlight_js : bool, optional
         Whether to include the highlight.js JS script.
+    workers : int, optional
+        Maximum amount of processes converting files at the same time. Default: the amount of
+        CPUs. If 1, files are converted in the current process.
     logger : LogSystem
         The logger.
 
@@ -391,20 +719,31 @@ def convert_rst_to_html_docutils(input_path_storage=None,
     ------
     SystemExit
         Halt execution.
+    exceptions.KeyboardInterruption
+        See <class :any:`exceptions.KeyboardInterruption`>.
     """
     try:
-        from docutils.core import publish_parts
+        import docutils  # noqa
     except (ImportError, SystemError):
         raise SystemExit("Required <docutils> Python module not found.")
 
-    import xml.etree.ElementTree as ET
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .python_utils import exceptions
 
     settings_overrides = {
         # "input_encoding": "unicode",
         "stylesheet": None
     }
+    template_data = {
+        "bootstrap_css": app_data.BOOTSTRAP_CSS_TAG if include_bootstrap_css else "",
+        "highlight_css": app_data.HIGHLIGHT_CSS_TAG if include_highlight_js else "",
+        "bootstrap_js": app_data.BOOTSTRAP_JS_TAG if include_bootstrap_js else "",
+        "highlight_js": app_data.HIGHLIGHT_JS_TAG if include_highlight_js else ""
+    }
     input_path = file_utils.expand_path(input_path_storage) if input_path_storage else \
         os.path.join(PATHS["docutils_convertions"], "rst_to_html")
+    jobs = []
 
     for dirname, dirnames, filenames in os.walk(input_path, topdown=False):
         for filename in filenames:
@@ -414,46 +753,91 @@ def convert_rst_to_html_docutils(input_path_storage=None,
                 dst_name = os.path.splitext(f_name)[0]
                 dst_path = os.path.join(os.path.dirname(f_path), dst_name + ".html")
 
-                if file_utils.is_real_file(dst_path):
+                if file_utils.is_real_file(dst_path) and \
+                        os.path.getmtime(dst_path) >= os.path.getmtime(f_path):
                     continue
 
-                logger.info(shell_utils.get_cli_separator("-"), date=False)
-                logger.info("**Converting:**")
-                logger.info(f_path, date=False)
-
-                with open(f_path, "r") as rst_file:
-                    html_parts = publish_parts(source=rst_file.read(),
-                                               source_path=None,
-                                               settings=None,
-                                               writer_name="html5",
-                                               settings_overrides=settings_overrides)
-
-                    try:
-                        html_title = ET.fromstring(
-                            "<head>" + html_parts["head"] + "</head>"
-                        ).findall(".//title")[0].text
-                    except Exception as err:
-                        logger.warning("**Error getting document title**", date=False)
-                        print(err)
-                        html_title = ""
-
-                    html_doc = app_data.DOCUTILS_HTML5_TEMPLATE.format(
-                        title=html_title,
-                        bootstrap_css=app_data.BOOTSTRAP_CSS_TAG if include_bootstrap_css else "",
-                        highlight_css=app_data.HIGHLIGHT_CSS_TAG if include_highlight_js else "",
-                        body=html_parts["body"],
-                        bootstrap_js=app_data.BOOTSTRAP_JS_TAG if include_bootstrap_js else "",
-                        highlight_js=app_data.HIGHLIGHT_JS_TAG if include_highlight_js else ""
-                    )
-
-                    with open(dst_path, "w") as dst_file:
-                        dst_file.write(html_doc)
+                jobs.append((f_path, dst_path))
+
+    if not jobs:
+        logger.info("Nothing to convert.")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    failed = 0
+
+    logger.info(shell_utils.get_cli_separator("-"), date=False)
+    logger.info("Converting %d file/s (%d at a time)..." % (len(jobs), workers))
+
+    if workers == 1:
+        _init_docutils_worker(settings_overrides)
+        executor = None
+        results = (_run_job(_convert_rst_file_docutils, *job, template_data) for job in jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=_init_docutils_worker,
+                                       initargs=(settings_overrides,))
+        results = executor.map(_run_job,
+                               [_convert_rst_file_docutils] * len(jobs),
+                               *zip(*jobs),
+                               [template_data] * len(jobs),
+                               chunksize=max(1, min(16, len(jobs) // (workers * 4))))
+
+    try:
+        for (f_path, dst_path), err in zip(jobs, results):
+            if err is None:
+                logger.info("**Converted:** %s" % f_path, date=False)
+            else:
+                failed += 1
+                logger.error("**Error converting:** %s" % f_path, date=False)
+                logger.error(err, date=False)
+    except (KeyboardInterrupt, SystemExit):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        raise exceptions.KeyboardInterruption()
+
+    if executor is not None:
+        executor.shutdown()
+
+    msg = "%d file/s converted, %d failed." % (len(jobs) - failed, failed)
+
+    if failed:
+        logger.warning(msg)
+    else:
+        logger.success(msg)
+
+
+def _run_job(func, *args):
+    """Call a function catching its errors.
+
+    Used to call functions in worker processes, so a failed call doesn't stop the other calls.
+
+    Parameters
+    ----------
+    func : method
+        The function to call.
+    *args
+        Arguments passed to ``func``.
+
+    Returns
+    -------
+    str|None
+        The error raised by ``func`` or None if it didn't fail.
+    """
+    try:
+        func(*args)
+    except Exception as err:
+        return "%s: %s" % (type(err).__name__, err)
+
+    return None
 
 
 def convert_rst_to_html_pandoc(input_path_storage=None,
                                include_bootstrap_css=True,
                                include_bootstrap_js=False,
                                include_highlight_js=False,
+                               workers=None,
                                logger=None):
     """Convert Rst to HTML with Pandoc.
 
@@ -467,11 +851,14 @@ def convert_rst_to_html_pandoc(input_path_storage=None,
         Whether to include the Bootstrap JS script.
     include_highlight_js : bool, optional
         Whether to include the highlight.js JS script.
+    workers : int, optional
+        See :any:`run_conversion_jobs`.
     logger : LogSystem
         The logger.
     """
     input_path = file_utils.expand_path(input_path_storage) if input_path_storage else \
         os.path.join(PATHS["convertions"], "rst_to_html")
+    jobs = []
 
     for dirname, dirnames, filenames in os.walk(input_path, topdown=False):
         for filename in filenames:
@@ -484,46 +871,43 @@ def convert_rst_to_html_pandoc(input_path_storage=None,
                 if file_utils.is_real_file(dst_path):
                     continue
 
-                logger.info(shell_utils.get_cli_separator("-"), date=False)
-                logger.info("**Converting:**")
-                logger.info(f_path, date=False)
-
-                cmd = [
-                    "pandoc",
-                    shell_quote(f_path),
-                    "--output",
-                    shell_quote(dst_path),
-                    "--template=%s" % shell_quote(PATHS["pandoc_html_template"]),
-                    "--wrap=none",
-                    "--no-highlight",
-                    "--variable=include-bootstrap-css",
-                    "--variable=include-bootstrap-js",
-                    "--variable=include-highlight-js",
-                    "--from=rst",
-                    "--to=html5"
-                ]
-
-                try:
-                    logger.info(" ".join(cmd), date=False)
-
-                    cmd_utils.run_cmd(" ".join(cmd), stdout=None, stderr=None,
-                                      cwd=os.path.dirname(dst_path), shell=True, check=True)
-                except CalledProcessError as err:
-                    logger.error(err)
-
-
-def convert_epub_to_html(input_path_storage=None, logger=None):
+                jobs.append({
+                    "cmd": [
+                        "pandoc",
+                        f_path,
+                        "--output",
+                        dst_path,
+                        "--template=%s" % PATHS["pandoc_html_template"],
+                        "--wrap=none",
+                        "--no-highlight",
+                        "--variable=include-bootstrap-css",
+                        "--variable=include-bootstrap-js",
+                        "--variable=include-highlight-js",
+                        "--from=rst",
+                        "--to=html5"
+                    ],
+                    "cwd": os.path.dirname(dst_path),
+                    "source": f_path
+                })
+
+    run_conversion_jobs(jobs, workers=workers, logger=logger)
+
+
+def convert_epub_to_html(input_path_storage=None, workers=None, logger=None):
     """Convert epub to html.
 
     Parameters
     ----------
     input_path_storage : None, optional
         Path to where .epub files are stored.
+    workers : int, optional
+        See :any:`run_conversion_jobs`.
     logger : LogSystem
         The logger.
     """
     input_path = file_utils.expand_path(input_path_storage) if input_path_storage else \
         os.path.join(PATHS["convertions"], "epub_to_html")
+    jobs = []
 
     for dirname, dirnames, filenames in os.walk(input_path, topdown=False):
         for filename in filenames:
@@ -537,64 +921,215 @@ def convert_epub_to_html(input_path_storage=None, logger=None):
                 if file_utils.is_real_file(dst_file):
                     continue
 
-                logger.info(shell_utils.get_cli_separator("-"), date=False)
-                logger.info("**Converting:**")
-                logger.info(f_path, date=False)
-
                 os.makedirs(dst_path, mode=0o777, exist_ok=True)
 
-                cmd = [
-                    "pandoc",
-                    "--standalone",
-                    shell_quote(f_path),
-                    "--output",
-                    shell_quote(dst_file),
-                    "--css=/assets/css/bootstrap.min.css",
-                    "--css=/assets/css/bootstrap.tweaks.css",
-                    "--extract-media=assets",
-                    "--template=%s" % shell_quote(PATHS["pandoc_html_template"]),
-                    "--wrap=none",
-                    "--no-highlight",
-                    "--table-of-contents",
-                    "--to=html5"
-                ]
-
-                try:
-                    logger.info(" ".join(cmd), date=False)
-
-                    cmd_utils.run_cmd(" ".join(cmd), stdout=None, stderr=None,
-                                      cwd=dst_path, shell=True, check=True)
-                except CalledProcessError as err:
-                    logger.error(err)
-
-
-def create_main_json_file(dry_run=False, logger=None):
+                jobs.append({
+                    "cmd": [
+                        "pandoc",
+                        "--standalone",
+                        f_path,
+                        "--output",
+                        dst_file,
+                        "--css=/assets/css/bootstrap.min.css",
+                        "--css=/assets/css/bootstrap.tweaks.css",
+                        "--extract-media=assets",
+                        "--template=%s" % PATHS["pandoc_html_template"],
+                        "--wrap=none",
+                        "--no-highlight",
+                        "--table-of-contents",
+                        "--to=html5"
+                    ],
+                    "cwd": dst_path,
+                    "source": f_path
+                })
+
+    run_conversion_jobs(jobs, workers=workers, logger=logger)
+
+
+def create_main_json_file(full=False, check_incremental=False, workers=None, dry_run=False,
+                          logger=None):
     """Generate the data_tables.json file.
 
     See :any:`DataTablesObject`
 
     Parameters
     ----------
+    full : bool, optional
+        Ignore the scan manifest and scan everything. See :any:`scan_manifest.ScanManifest`.
+    check_incremental : bool, optional
+        After generating the data incrementally, generate it again from scratch and compare
+        both results. If they differ, the data generated from scratch is the one saved.
+    workers : int, optional
+        See :any:`DataTablesObject` > workers parameter.
     dry_run : bool, optional
         See :any:`DataTablesObject` > dry_run parameter.
     logger : LogSystem
         The logger.
     """
+    from .scan_manifest import ScanManifest
+
     logger.info(shell_utils.get_cli_separator("-"), date=False)
     logger.info("Generating main JSON file...")
-    data_tables_obj = DataTablesObject(file_extensions=["md", "pdf", "html", "epub"],
-                                       dry_run=dry_run,
-                                       logger=logger).get_data_tables_obj()
+    file_extensions = ["md", "pdf", "html", "epub"]
+    manifest = ScanManifest(PATHS["data_tables_manifest"], full=full, dry_run=dry_run,
+                            logger=logger)
+    data_tables = DataTablesObject(file_extensions=file_extensions,
+                                   manifest=manifest,
+                                   workers=workers,
+                                   dry_run=dry_run,
+                                   logger=logger)
+    # NOTE: Unless both results need to be compared, the data is written into the JSON file
+    # as it is generated.
+    data_tables_obj = data_tables.iter_data_tables_obj()
+
+    if check_incremental and not full:
+        data_tables_obj = data_tables.get_data_tables_obj()
+
+        logger.info("Comparing incremental result with a full rebuild...")
+        full_manifest = ScanManifest(PATHS["data_tables_manifest"], full=True,
+                                     dry_run=dry_run, logger=logger)
+        full_data_tables_obj = DataTablesObject(file_extensions=file_extensions,
+                                                manifest=full_manifest,
+                                                workers=workers,
+                                                dry_run=dry_run,
+                                                logger=logger).get_data_tables_obj()
+
+        if full_data_tables_obj == data_tables_obj:
+            logger.success("Incremental result is identical to a full rebuild.")
+        else:
+            incremental_set = set(json.dumps(e, sort_keys=True) for e in data_tables_obj)
+            full_set = set(json.dumps(e, sort_keys=True) for e in full_data_tables_obj)
+            logger.error("Incremental result differs from a full rebuild!")
+            logger.error("Entries only in incremental result: %d" %
+                         len(incremental_set - full_set), date=False)
+            logger.error("Entries only in full rebuild: %d" %
+                         len(full_set - incremental_set), date=False)
+            logger.warning("Saving the full rebuild result.")
+
+            manifest = full_manifest
+            data_tables_obj = full_data_tables_obj
 
     try:
         if dry_run:
+            entries_count = sum(1 for e in data_tables_obj)
             logger.info("[DRY_RUN] Main JSON file will be created at: \n%s" %
                         PATHS["data_tables_json"], date=False)
         else:
-            with open(PATHS["data_tables_json"], "w") as data_tables_json_file:
-                data_tables_json_file.write(json.dumps(data_tables_obj))
+            # NOTE: The file is atomically replaced so the web server never serves a
+            # partially written file.
+            with file_utils.atomic_write(PATHS["data_tables_json"]) as data_tables_json_file:
+                entries_count = file_utils.dump_json_array(data_tables_obj, data_tables_json_file)
+
+            logger.info("data_tables.json file created at: \n%s" % PATHS["data_tables_json"])
+
+            manifest.save()
+
+        logger.info("Entries: %d" % entries_count, date=False)
+        logger.info("Directories reused from scan manifest: %d" % manifest.stats["reused"],
+                    date=False)
+        logger.info("Directories scanned: %d" % manifest.stats["rescanned"], date=False)
+    except Exception as err:
+        logger.error(err)
+
+
+def build_search_index(full=False, workers=None, dry_run=False, logger=None):
+    """Build the full-text search index of the documents listed in the data_tables.json file.
+
+    See :any:`search_index.SearchIndexBuilder`
 
-                logger.info("data_tables.json file created at: \n%s" % PATHS["data_tables_json"])
+    Parameters
+    ----------
+    full : bool, optional
+        Ignore the previous index and read all documents again.
+    workers : int, optional
+        Maximum amount of processes used to read documents.
+    dry_run : bool, optional
+        Do not write the index file.
+    logger : LogSystem
+        The logger.
+    """
+    from .search_index import SearchIndexBuilder
+
+    logger.info(shell_utils.get_cli_separator("-"), date=False)
+    logger.info("Building search index...")
+
+    try:
+        with open(PATHS["data_tables_json"], "r", encoding="UTF-8") as data_tables_json_file:
+            entries = json.loads(data_tables_json_file.read())
+    except Exception as err:
+        logger.error("The data_tables.json file couldn't be read. Generate it first.")
+        logger.error(err)
+        return
+
+    try:
+        builder = SearchIndexBuilder(PATHS["search_index"], PATHS["www_base"], logger,
+                                     full=full, workers=workers)
+        stats = builder.build(entries, dry_run=dry_run)
+
+        if not dry_run:
+            logger.info("Search index created at: \n%s" % PATHS["search_index"])
+
+        logger.info("Documents reused from previous index: %d" % stats["reused"], date=False)
+        logger.info("Documents indexed: %d" % stats["indexed"], date=False)
+        logger.info("Documents removed: %d" % stats["removed"], date=False)
+    except Exception as err:
+        logger.error(err)
+
+
+def prerender_inline_content(workers=None, dry_run=False, logger=None):
+    """Render ahead of time the Markdown and reStructuredText documents listed in the
+    data_tables.json file.
+
+    Rendered documents are stored in a tree parallel to the **UserData/www** folder from
+    which the web server serves them. Documents whose source didn't change since they were
+    rendered are skipped. See :any:`render_cache.RenderCache`.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Maximum amount of processes used to render documents.
+    dry_run : bool, optional
+        Do not render documents.
+    logger : LogSystem
+        The logger.
+    """
+    from . import render_cache
+
+    logger.info(shell_utils.get_cli_separator("-"), date=False)
+    logger.info("Pre-rendering inline content...")
+
+    try:
+        with open(PATHS["data_tables_json"], "r", encoding="UTF-8") as data_tables_json_file:
+            entries = json.loads(data_tables_json_file.read())
+    except Exception as err:
+        logger.error("The data_tables.json file couldn't be read. Generate it first.")
+        logger.error(err)
+        return
+
+    documents = []
+    seen = set()
+
+    for entry in entries:
+        file_path = os.path.join(PATHS["www_base"], entry.get("p", ""))
+        kind = render_cache.get_render_kind(file_path, entry.get("h", ""))
+
+        if kind is not None and file_path not in seen:
+            seen.add(file_path)
+            documents.append((file_path, kind))
+
+    if dry_run:
+        logger.log_dry_run("%d documents will be rendered into:\n%s" %
+                           (len(documents), PATHS["render_cache"]))
+        return
+
+    try:
+        stats = render_cache.prerender_documents(documents, PATHS["render_cache"],
+                                                 PATHS["www_base"], workers=workers)
+        logger.info("Documents rendered: %d" % stats["rendered"], date=False)
+        logger.info("Documents skipped (unchanged): %d" % stats["skipped"], date=False)
+
+        if stats["failed"]:
+            logger.warning("Documents that couldn't be read: %d" % stats["failed"], date=False)
     except Exception as err:
         logger.error(err)
 
@@ -805,5 +1340,47 @@ def generate_index_html(dry_run=False, logger=None):
         logger.error(err)
 
 
+def compress_static_files(workers=None, dry_run=False, logger=None):
+    """Create compressed versions (sidecars) of the compressible files inside the
+    **UserData/www** folder.
+
+    The web server sends the sidecars to clients that accept them. Files whose sidecars were
+    created from their current version are skipped. See :any:`static_files`.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Maximum amount of processes used to compress files.
+    dry_run : bool, optional
+        Do not create sidecars.
+    logger : LogSystem
+        The logger.
+    """
+    from . import static_files
+
+    logger.info(shell_utils.get_cli_separator("-"), date=False)
+    logger.info("Compressing static files...")
+
+    if static_files.brotli is None:
+        logger.info("The brotli module isn't available. Only gzip sidecars will be created.",
+                    date=False)
+
+    if dry_run:
+        stale_files, fresh_count = static_files.get_stale_files(PATHS["www_base"])
+        logger.log_dry_run("%d files will be compressed inside:\n%s" %
+                           (len(stale_files), PATHS["www_base"]))
+        return
+
+    try:
+        stats = static_files.compress_static_files(PATHS["www_base"], workers=workers)
+        logger.info("Files compressed: %d" % stats["compressed"], date=False)
+        logger.info("Files skipped (unchanged): %d" % stats["skipped"], date=False)
+
+        if stats["failed"]:
+            logger.warning("Files that couldn't be compressed: %d" % stats["failed"], date=False)
+    except Exception as err:
+        logger.error(err)
+
+
 if __name__ == "__main__":
     pass
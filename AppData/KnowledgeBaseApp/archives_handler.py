@@ -15,14 +15,22 @@ import time
 from datetime import datetime
 from datetime import timedelta
 from runpy import run_path
+from shutil import copy2
 from shutil import rmtree
 from subprocess import CalledProcessError
+from subprocess import PIPE
 from subprocess import STDOUT
+from threading import Event
+from threading import Thread
 
 from . import app_utils
+from .python_utils import archive_utils
 from .python_utils import cmd_utils
 from .python_utils import exceptions
+from .python_utils import file_utils
+from .python_utils import hash_utils
 from .python_utils import json_schema_utils
+from .python_utils import log_system
 from .python_utils import shell_utils
 from .python_utils import string_utils
 from .python_utils import tqdm_wget
@@ -54,7 +62,9 @@ class ArchivesHandler():
         self.logger = logger
         self._dry_run = dry_run
         self._last_update_data = {}
+        self._archives_metadata = {}
         self._compressed_archives = []
+        self._updated_archives = []
 
         try:
             self._archives_data = run_path(os.path.join(root_folder, "UserData", "data_sources",
@@ -69,6 +79,8 @@ class ArchivesHandler():
         self._archives_destination = os.path.join(
             app_utils.PATHS["www_base"], "archives")
         self._archives_last_updated = os.path.join(self._archives_storage, "last_updated.json")
+        self._archives_metadata_path = os.path.join(self._archives_storage,
+                                                    "archives_metadata.json")
         self._current_date = time.strftime("%B %d %Y", time.gmtime())  # Format = January 1 2018
 
         self._ensure_paths()
@@ -106,174 +118,368 @@ class ArchivesHandler():
 
         return data_tables_obj
 
-    def download_all_archives(self, force_download):
+    def download_all_archives(self, force_download, workers=None):
         """Download all archives.
 
+        Archives are downloaded at the same time (see :any:`tqdm_wget.download_many`).
+        Interrupted downloads are resumed on the next run.
+
         Parameters
         ----------
         force_download : bool
             Ignore archive update frequency and update its file/s anyway.
+        workers : int, optional
+            Maximum amount of archives downloaded (default: 4) and extracted at the same time.
 
         Raises
         ------
         exceptions.KeyboardInterruption
             See <class :any:`exceptions.KeyboardInterruption`>.
         """
-        try:
-            for data in self._archives_data:
-                self.logger.info(shell_utils.get_cli_separator("-"), date=False)
-
-                try:
-                    self._download_archive(data, force_download)
-                except Exception as err:
-                    self.logger.error("Error downloading archive. URL: ", data["arch_url"])
-                    self.logger.error(err)
-                    continue
-                except (KeyboardInterrupt, SystemExit):
-                    raise exceptions.KeyboardInterruption()
-        except (KeyboardInterrupt, SystemExit):
-            raise exceptions.KeyboardInterruption()
-        else:
-            with open(self._archives_last_updated, "w", encoding="UTF-8") as data_file:
-                data_file.write(json.dumps(self._last_update_data, indent=4, sort_keys=True))
+        downloads = []
+
+        for data in self._archives_data:
+            self.logger.info(shell_utils.get_cli_separator("-"), date=False)
+
+            try:
+                if self._prepare_archive(data, force_download):
+                    downloads.append(data)
+            except Exception as err:
+                self.logger.error("Error downloading archive. URL: %s" % data["arch_url"])
+                self.logger.error(err)
+
+        if downloads and not self._dry_run:
+            self.logger.info(shell_utils.get_cli_separator("-"), date=False)
+            self.logger.info("Downloading %d archive/s..." % len(downloads))
+
+            jobs = []
+
+            for data in downloads:
+                job = {
+                    "url": data["arch_url"],
+                    "filename": data["downloaded_filename"],
+                    "desc": data["kb_title"]
+                }
+
+                # NOTE: Only download the archive if it changed since it was last downloaded.
+                if not force_download:
+                    job.update(self._get_archive_validators(data))
+
+                jobs.append(job)
+
+            try:
+                results = tqdm_wget.download_many(jobs, max_workers=workers or 4)
+            except (KeyboardInterrupt, SystemExit):
+                raise exceptions.KeyboardInterruption()
+
+            for data, result in zip(downloads, results):
+                self._handle_download_result(data, result)
+
+        with open(self._archives_last_updated, "w", encoding="UTF-8") as data_file:
+            data_file.write(json.dumps(self._last_update_data, indent=4, sort_keys=True))
+
+        self._save_archives_metadata()
 
         if self._compressed_archives:
             self.logger.info("Handling compressed archives.")
-            self._handle_compressed_archives()
+            # NOTE: Keep the order of the archives data.
+            self._compressed_archives = [data for data in self._archives_data
+                                         if data in self._compressed_archives]
+            self._handle_compressed_archives(workers=workers)
 
         self._append_to_files()
+        self._swap_extractions()
+        self._save_archives_metadata()
 
     def _append_to_files(self):
         """Append to files.
+
+        Data is only appended to the files of the archives that were downloaded (non compressed
+        archives) or extracted during the current run. The files of compressed archives are
+        modified in their staged extraction, before it replaces the current one (see
+        :any:`ArchivesHandler._swap_extractions`).
+
+        The stored size of non compressed archives is updated after appending data to them, so
+        it still matches the downloaded file (see :any:`ArchivesHandler._get_archive_validators`).
         """
-        for data in self._archives_data:
+        for data in self._updated_archives:
             arvhive_append_data = data.get("kb_file_append", False)
 
             if arvhive_append_data:
                 self.logger.info("Appending data to <%s>'s files." % data["kb_title"])
 
+                if data.get("unzip_prog", False):
+                    root_path = data["staging_destination"]
+                else:
+                    root_path = data["extraction_destination"]
+
                 for append_data in arvhive_append_data:
-                    file_path = os.path.join(data["extraction_destination"], append_data[0])
+                    file_path = os.path.join(root_path, append_data[0])
                     file_data = append_data[1]
 
                     if os.path.exists(file_path):
                         self.logger.info("Appending data to <%s>." % append_data[0], date=False)
+
+                        # NOTE: Do not modify a file shared (hard linked) with the current
+                        # extraction.
+                        if os.stat(file_path).st_nlink > 1:
+                            copy2(file_path, file_path + ".part")
+                            os.replace(file_path + ".part", file_path)
+
                         with open(file_path, "a") as file_to_append:
                             file_to_append.write(file_data)
 
-    def _handle_compressed_archives(self):
+                if not data.get("unzip_prog", False):
+                    try:
+                        self._get_archive_metadata(data)["size"] = \
+                            os.path.getsize(data["downloaded_filename"])
+                    except OSError as err:
+                        self.logger.error(err)
+
+    def _swap_extractions(self):
+        """Replace the extracted content of the archives extracted during the current run with
+        their staged extraction.
+
+        The previous extracted content is removed in the background.
+        """
+        for source in self._updated_archives:
+            if not source.get("unzip_prog", False):
+                continue
+
+            try:
+                self._swap_extraction(source)
+                self._get_archive_metadata(source)["extracted"] = \
+                    self._get_extraction_signature(source)
+            except Exception as err:
+                self.logger.error(err)
+
+    def _swap_extraction(self, source):
+        """Replace the extracted content of an archive with its staged extraction.
+
+        Parameters
+        ----------
+        source : dict
+            The archive data.
+        """
+        ext_dst = source["extraction_destination"]
+        staging = source["staging_destination"]
+        previous = source["previous_destination"]
+
+        if os.path.isdir(ext_dst) and not os.path.islink(ext_dst):
+            if file_utils.exchange_paths(staging, ext_dst):
+                os.rename(staging, previous)
+            else:
+                # NOTE: The extraction destination doesn't exist between both renames.
+                os.rename(ext_dst, previous)
+                os.rename(staging, ext_dst)
+
+            Thread(target=rmtree, args=(previous,), kwargs={"ignore_errors": True}).start()
+        else:
+            if os.path.lexists(ext_dst):
+                os.remove(ext_dst)
+
+            os.rename(staging, ext_dst)
+
+        self.logger.info("<%s> extracted content updated." % source["kb_title"])
+
+    def _prepare_staging(self, source, link_current=True):
+        """Prepare the directory into which an archive is extracted.
+
+        Parameters
+        ----------
+        source : dict
+            The archive data.
+        link_current : bool, optional
+            Populate the staging directory with hard links to the files of the current
+            extraction (see :any:`archive_utils.link_tree`). Otherwise, an empty directory is
+            created.
+        """
+        for path in (source["staging_destination"], source["previous_destination"]):
+            if os.path.isdir(path) and not os.path.islink(path):
+                rmtree(path)
+            elif os.path.lexists(path):
+                os.remove(path)
+
+        if link_current and os.path.isdir(source["extraction_destination"]):
+            archive_utils.link_tree(source["extraction_destination"],
+                                    source["staging_destination"])
+        else:
+            os.makedirs(source["staging_destination"])
+
+    def _handle_compressed_archives(self, workers=None):
         """Handle the downloaded compressed archives.
 
+        Archives are extracted in parallel.
+
+        Parameters
+        ----------
+        workers : int, optional
+            Maximum amount of archives extracted at the same time. If not specified, the
+            default of :any:`concurrent.futures.ThreadPoolExecutor` is used.
+
         Raises
         ------
         exceptions.KeyboardInterruption
             See <class :any:`exceptions.KeyboardInterruption`>.
         """
+        from concurrent.futures import ThreadPoolExecutor
+
+        stop_event = Event()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                # NOTE: Executor.map yields the results in the order of the archives, which keeps
+                # the order of the displayed messages deterministic.
+                results = executor.map(lambda source: self._extract_archive(source, stop_event),
+                                       self._compressed_archives)
+
+                for source, (logger, extracted) in zip(self._compressed_archives, results):
+                    logger.flush(self.logger)
+
+                    if extracted:
+                        self._updated_archives.append(source)
+            except (KeyboardInterrupt, SystemExit):
+                stop_event.set()
+                raise exceptions.KeyboardInterruption()
+
+    def _extract_archive(self, source, stop_event):
+        """Extract a compressed archive.
+
+        Archives are extracted into a staging directory that replaces the current extraction
+        once all archives are handled (see :any:`ArchivesHandler._swap_extractions`). Zip and
+        tar archives are extracted natively (see :any:`archive_utils.extract_archive`) into a
+        copy of the current extraction, only the members that changed since the last extraction
+        are written. Archives handled by **7z** are extracted by the command into an empty
+        directory.
+
+        Parameters
+        ----------
+        source : dict
+            The archive data.
+        stop_event : threading.Event
+            Event that, when set, aborts the extraction.
+
+        Returns
+        -------
+        tuple
+            The logger holding the messages logged while extracting the archive (see
+            :any:`log_system.BufferedLogSystem`) and whether the archive was extracted.
+        """
+        logger = log_system.BufferedLogSystem()
+        logger.info(shell_utils.get_cli_separator("-"), date=False)
+        logger.info("Decompressing <%s>" % source["kb_title"])
+
+        aborted_msg = "Extract operation for <%s> aborted." % source["kb_title"]
+        ext_dst = source["extraction_destination"]
+        archive_format = {"unzip": "zip", "tar": "tar"}.get(source["unzip_prog"])
+
+        if self._dry_run and archive_format is not None:
+            logger.log_dry_run("Archive will be extracted into:\n%s" % ext_dst)
+            return logger, False
+
         try:
-            for source in self._compressed_archives:
-                self.logger.info(shell_utils.get_cli_separator("-"), date=False)
-                self.logger.info("Decompressing <%s>" % source["kb_title"])
-
-                try:
-                    aborted_msg = "Extract operation for <%s> aborted." % source["kb_title"]
-                    ext_dst = source["extraction_destination"]
-                    cmd = []
-
-                    if not cmd_utils.which(source["unzip_prog"]):
-                        self.logger.error("Command <%s> not found on your system." %
-                                          source["unzip_prog"] + aborted_msg)
-                        continue
-
-                    if source["unzip_prog"] == "7z":
-                        cmd += ["7z", "e", "-y", source["downloaded_filename"],
-                                "-o", ext_dst]
-                    elif source["unzip_prog"] == "unzip":
-                        cmd += ["unzip", "-q", "-o", source["downloaded_filename"],
-                                "-d", ext_dst]
-                    elif source["unzip_prog"] == "tar":
-                        untar_arg = source.get("untar_arg")
-                        cmd = ["tar", "--extract"]
-
-                        if untar_arg:
-                            cmd += [untar_arg]
-
-                        cmd += [
-                            "--file",
-                            source["downloaded_filename"],
-                            "--totals",
-                            "--directory", ext_dst
-                        ]
-
-                    if cmd:
-                        try:
-                            if os.path.isfile(ext_dst):
-                                if self._dry_run:
-                                    self.logger.log_dry_run("File will be removed:\n%s" % ext_dst)
-                                else:
-                                    os.remove(ext_dst)
-
-                            if os.path.isdir(ext_dst):
-                                if self._dry_run:
-                                    self.logger.log_dry_run(
-                                        "Directory will be removed:\n%s" % ext_dst)
-                                else:
-                                    rmtree(ext_dst)
-                        finally:
-                            if self._dry_run:
-                                self.logger.log_dry_run(
-                                    "Directory will be created at:\n%s" % ext_dst)
-                            else:
-                                os.makedirs(ext_dst, exist_ok=True)
-
-                            try:
-                                if self._dry_run:
-                                    self.logger.log_dry_run(
-                                        "Command that will be executed:\n%s" % " ".join(cmd))
-                                else:
-                                    self.logger.info("Running command:\n" + " ".join(cmd))
-
-                                    cmd_utils.run_cmd(cmd,
-                                                      stdout=None,
-                                                      stderr=STDOUT,
-                                                      check=True)
-                            except CalledProcessError as err:
-                                self.logger.error(err)
-
-                            dir_list = [entry.path for entry in os.scandir(
-                                ext_dst) if entry.is_dir(follow_symlinks=False)]
-
-                            if len(dir_list) == 1:
-                                extracted_dir = dir_list[0]
-                                desired_dir = os.path.join(ext_dst, source["kb_rel_path"])
-
-                                if extracted_dir != desired_dir:
-                                    if self._dry_run:
-                                        self.logger.log_dry_run(
-                                            "The extracted directory\n%s\nwill be renamed to\n%s" % (extracted_dir, desired_dir))
-                                    else:
-                                        self.logger.info(
-                                            "Renaming extracted folder from\n%s\nto\n%s" % (extracted_dir, desired_dir))
-
-                                        os.rename(extracted_dir, desired_dir)
-                except Exception as err:
-                    self.logger.error(err)
-        except (KeyboardInterrupt, SystemExit):
-            raise exceptions.KeyboardInterruption()
-
-    def _download_archive(self, data, force_download):
-        """Download the archives.
+            if archive_format is None:
+                if self._run_extraction_command(source, logger):
+                    return logger, True
+                elif self._dry_run:
+                    return logger, False
+
+                raise exceptions.OperationAborted()
+
+            self._prepare_staging(source)
+
+            report = archive_utils.extract_archive(source["downloaded_filename"],
+                                                   source["staging_destination"],
+                                                   archive_format,
+                                                   top_dir_name=source.get("kb_rel_path"),
+                                                   stop_event=stop_event,
+                                                   logger=logger)
+
+            logger.info("%d files extracted (%.2f MiB), %d up to date (%.2f MiB), %d removed." % (
+                report["extracted"], report["bytes_extracted"] / (1024 * 1024),
+                report["skipped"], report["bytes_skipped"] / (1024 * 1024),
+                report["removed"]), date=False)
+
+            return logger, True
+        except exceptions.OperationAborted:
+            logger.warning(aborted_msg)
+        except Exception as err:
+            logger.error(err)
+
+        rmtree(source["staging_destination"], ignore_errors=True)
+
+        return logger, False
+
+    def _run_extraction_command(self, source, logger):
+        """Extract a compressed archive with an external command.
 
         Parameters
         ----------
-        data : list
-            The list containing archive data.
+        source : dict
+            The archive data.
+        logger : object
+            See :any:`log_system.BufferedLogSystem`.
+
+        Returns
+        -------
+        bool
+            Whether the archive was extracted.
+        """
+        aborted_msg = "Extract operation for <%s> aborted." % source["kb_title"]
+        ext_dst = source["staging_destination"]
+
+        if not cmd_utils.which(source["unzip_prog"]):
+            logger.error("Command <%s> not found on your system." %
+                         source["unzip_prog"] + aborted_msg)
+            return False
+
+        cmd = ["7z", "e", "-y", source["downloaded_filename"], "-o", ext_dst]
+
+        if self._dry_run:
+            logger.log_dry_run("Command that will be executed:\n%s" % " ".join(cmd))
+            return False
+
+        self._prepare_staging(source, link_current=False)
+        logger.info("Running command:\n" + " ".join(cmd))
+
+        try:
+            output = cmd_utils.run_cmd(cmd, stdout=PIPE, stderr=STDOUT, check=True).stdout
+        except CalledProcessError as err:
+            logger.error(err)
+            logger.error(err.stdout.decode("UTF-8", errors="replace"), date=False)
+            return False
+
+        logger.info(output.decode("UTF-8", errors="replace"), date=False)
+
+        dir_list = [entry.path for entry in os.scandir(
+            ext_dst) if entry.is_dir(follow_symlinks=False)]
+
+        if len(dir_list) == 1 and source.get("kb_rel_path"):
+            extracted_dir = dir_list[0]
+            desired_dir = os.path.join(ext_dst, source["kb_rel_path"])
+
+            if extracted_dir != desired_dir:
+                logger.info(
+                    "Renaming extracted folder from\n%s\nto\n%s" % (extracted_dir, desired_dir))
+
+                os.rename(extracted_dir, desired_dir)
+
+        return True
+
+    def _prepare_archive(self, data, force_download):
+        """Prepare an archive to be downloaded.
+
+        Parameters
+        ----------
+        data : dict
+            The archive data.
         force_download : bool
             Download archive without checking if it needs to be downloaded.
 
-        Raises
-        ------
-        exceptions.KeyboardInterruption
-            See <class :any:`exceptions.KeyboardInterruption`>.
+        Returns
+        -------
+        bool
+            If the archive needs to be downloaded.
         """
         is_compressed_source = data.get("unzip_prog", False)
 
@@ -290,29 +496,173 @@ class ArchivesHandler():
         if force_download or self._should_download_archive(data):
             self.logger.info("Updating <%s>" % data["kb_title"])
 
-            try:
-                if self._dry_run:
-                    self.logger.log_dry_run("File will be downloaded:")
-                    self.logger.log_dry_run("URL: %s" % data["arch_url"])
-                    self.logger.log_dry_run("Location: %s" % data["downloaded_filename"])
-                else:
-                    tqdm_wget.download(data["arch_url"], data["downloaded_filename"])
-            except (KeyboardInterrupt, SystemExit):
-                raise exceptions.KeyboardInterruption()
-            except Exception as err:
-                self.logger.error(err)
-            else:
-                # Do not modify download history on dry run.
-                if not self._dry_run:
-                    self._last_update_data[data["slugified_name"]] = self._current_date
+            if self._dry_run:
+                self.logger.log_dry_run("File will be downloaded:")
+                self.logger.log_dry_run("URL: %s" % data["arch_url"])
+                self.logger.log_dry_run("Location: %s" % data["downloaded_filename"])
 
                 if is_compressed_source:
                     self._compressed_archives.append(data)
+
+                return False
+
+            return True
+
+        self.logger.info("<%s> doesn't need updating." % data["kb_title"])
+
+        if is_compressed_source:
+            self._queue_extraction(data)
+
+        return False
+
+    def _get_archive_metadata(self, data):
+        """Get the stored metadata of an archive.
+
+        Parameters
+        ----------
+        data : dict
+            The archive data.
+
+        Returns
+        -------
+        dict
+            The URL from which the archive was downloaded, its ``ETag``, ``Last-Modified`` date,
+            size and hash and the ``extracted`` signature (see
+            :any:`ArchivesHandler._get_extraction_signature`) of its last successful extraction.
+            Modifying the dictionary modifies the stored metadata.
+        """
+        return self._archives_metadata.setdefault(data["slugified_name"], {})
+
+    def _save_archives_metadata(self):
+        """Save the metadata of all archives.
+        """
+        if self._dry_run:
+            return
+
+        try:
+            with file_utils.atomic_write(self._archives_metadata_path) as metadata_file:
+                metadata_file.write(json.dumps(self._archives_metadata, indent=4, sort_keys=True))
+        except Exception as err:
+            self.logger.error(err)
+
+    def _get_archive_validators(self, data):
+        """Get the validators used to download an archive only if it changed.
+
+        Parameters
+        ----------
+        data : dict
+            The archive data.
+
+        Returns
+        -------
+        dict
+            The ``etag`` and ``last_modified`` date of the downloaded archive. Empty if the
+            downloaded archive doesn't exist or it doesn't match its stored metadata.
+        """
+        metadata = self._get_archive_metadata(data)
+
+        try:
+            if metadata.get("url") != data["arch_url"] or \
+                    os.path.getsize(data["downloaded_filename"]) != metadata.get("size"):
+                return {}
+        except OSError:
+            return {}
+
+        return {
+            "etag": metadata.get("etag"),
+            "last_modified": metadata.get("last_modified")
+        }
+
+    def _get_extraction_signature(self, data):
+        """Get the extraction signature of an archive.
+
+        Parameters
+        ----------
+        data : dict
+            The archive data.
+
+        Returns
+        -------
+        list
+            The hash of the downloaded archive and the options used to extract it.
+        """
+        metadata = self._get_archive_metadata(data)
+
+        if not metadata.get("hash"):
+            metadata["hash"] = hash_utils.file_hash(data["downloaded_filename"])
+            metadata["size"] = os.path.getsize(data["downloaded_filename"])
+
+        return [metadata["hash"], data.get("unzip_prog"), data.get("untar_arg"),
+                data.get("kb_rel_path")]
+
+    def _queue_extraction(self, data):
+        """Queue the extraction of a compressed archive if it's needed.
+
+        Parameters
+        ----------
+        data : dict
+            The archive data.
+        """
+        try:
+            extracted = self._get_archive_metadata(data).get("extracted") == \
+                self._get_extraction_signature(data)
+        except OSError:
+            extracted = False
+
+        if extracted and os.path.isdir(data["extraction_destination"]):
+            self.logger.info("<%s> is already extracted." % data["kb_title"], date=False)
+        else:
+            self._compressed_archives.append(data)
+
+    def _handle_download_result(self, data, result):
+        """Handle the result of an archive download.
+
+        Parameters
+        ----------
+        data : dict
+            The archive data.
+        result : dict|Exception
+            See :any:`tqdm_wget.download_many`.
+        """
+        if isinstance(result, Exception):
+            self.logger.error("Error downloading archive. URL: %s" % data["arch_url"])
+            self.logger.error(result)
+            return
+
+        metadata = self._get_archive_metadata(data)
+        metadata.update({
+            "url": data["arch_url"],
+            "etag": result["etag"],
+            "last_modified": result["last_modified"]
+        })
+        self._last_update_data[data["slugified_name"]] = self._current_date
+
+        if result["status"] == "not_modified":
+            self.logger.info("<%s> didn't change." % data["kb_title"])
         else:
-            self.logger.info("<%s> doesn't need updating." % data["kb_title"])
+            self.logger.info("<%s> updated (%s bytes%s)." % (
+                data["kb_title"], result["size"],
+                ", %s resumed" % result["resumed"] if result["resumed"] else ""))
+
+            try:
+                digest = hash_utils.file_hash(data["downloaded_filename"])
+            except OSError as err:
+                self.logger.error(err)
+                digest = None
+
+            if digest and digest == metadata.get("hash"):
+                self.logger.info("<%s>'s content didn't change." % data["kb_title"], date=False)
 
-            if is_compressed_source:
-                self._compressed_archives.append(data)
+            metadata.update({
+                "size": result["size"],
+                "hash": digest
+            })
+
+            if not data.get("unzip_prog", False):
+                self._updated_archives.append(data)
+
+        if data.get("unzip_prog", False):
+            self._queue_extraction(data)
 
     def _should_download_archive(self, data):
         """Check if the archive should be updated.
@@ -414,6 +764,12 @@ class ArchivesHandler():
         except Exception:
             self._last_update_data = {}
 
+        try:
+            with open(self._archives_metadata_path, "r", encoding="UTF-8") as json_file:
+                self._archives_metadata = json.loads(json_file.read())
+        except Exception:
+            self._archives_metadata = {}
+
         for data in self._archives_data:
             cat_path = data["kb_category"].replace("|", os.sep)
 
@@ -431,6 +787,15 @@ class ArchivesHandler():
             if data.get("unzip_prog", False):
                 data["downloaded_filename"] = os.path.join(
                     self._archives_storage, data["slugified_name"])
+
+                # Generate and add the paths used to replace the extracted content without
+                # serving a partially extracted archive.
+                data["staging_destination"] = os.path.join(
+                    os.path.dirname(data["extraction_destination"]),
+                    ".%s.staging" % data["kb_title"])
+                data["previous_destination"] = os.path.join(
+                    os.path.dirname(data["extraction_destination"]),
+                    ".%s.previous" % data["kb_title"])
             else:  # If it's an HTML file, download it directly into its final destination.
                 data["downloaded_filename"] = os.path.join(
                     data["extraction_destination"], data.get("kb_filename", "index.html"))
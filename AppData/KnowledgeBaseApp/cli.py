@@ -32,8 +32,13 @@ docopt_doc = """{appname} {version} ({status})
 Usage:
     app.py (-h | --help | --manual | --version)
     app.py run <func_name>... [--do-not-pull]
+                              [--skip-unchanged]
                               [--dry-run]
                               [--force-download]
+                              [--full]
+                              [--check-incremental]
+                              [--workers=<count>]
+                              [--max-per-host=<count>]
                               [--input-path-storage=<path>]
                               [--include-bootstrap-css]
                               [--include-bootstrap-js]
@@ -41,6 +46,8 @@ Usage:
     app.py server (start | stop | restart)
                   [--host=<host>]
                   [--port=<port>]
+                  [--server=<backend>]
+                  [--workers=<count>]
     app.py generate system_executable
     app.py repo subtrees (init | update) [-y | --dry-run]
 
@@ -61,10 +68,24 @@ Options:
 --port=<port>
     Port number. [Default: 8888]
 
+--server=<backend>
+    Server backend. One of the following:
+    **wsgiref**: Single threaded server.
+    **threaded**: Each request is handled in a new thread.
+    **prefork**: Several single threaded worker processes (see *--workers*).
+    A restart keeps the options the server was started with. To change them,
+    stop the server and start it again. [Default: wsgiref]
+
 --do-not-pull
     Do not update repositories (do not pull), just initialize the ones that
     weren't cloned yet. Only used by the *update_all_repositories* sub-command.
 
+--skip-unchanged
+    Before pulling from a repository, check if its remote HEAD moved since the
+    last time it was pulled (**git ls-remote**/**hg identify**). Do not pull
+    from repositories that didn't change. Only used by the
+    *update_all_repositories* sub-command.
+
 --dry-run
     Do not perform file system changes. Only display messages informing of the
     actions that will be performed or commands that will be executed.
@@ -76,6 +97,36 @@ Options:
     Force the download of all archives, ignoring the frequency in which they
     should be downloaded. Only used by the *download_all_archives* sub-command.
 
+--full
+    Ignore the scan manifest stored by previous runs and scan all directories.
+    Ignore the previous search index and read all documents again.
+    Copy the files of all repositories, even the ones that didn't change since
+    they were last handled.
+    Build all Sphinx documentations, even the ones whose sources didn't change
+    since they were last built.
+    Only used by the *create_main_json_file*, *build_search_index*,
+    *handle_all_repositories* and *build_sphinx_docs* sub-commands.
+
+--check-incremental
+    Generate the data_tables.json file incrementally and then generate it again
+    from scratch to compare both results. Only used by the *create_main_json_file*
+    sub-command.
+
+--workers=<count>
+    Maximum amount of workers (threads or processes) used to perform tasks in
+    parallel. If not specified, a default suited for each task is used.
+    Only used by the *update_all_repositories*, *handle_all_repositories*,
+    *download_all_archives*, *build_sphinx_docs*, *create_main_json_file*,
+    *build_search_index*, *prerender_inline_content*, *compress_static_files*
+    and document conversion (one Pandoc process per CPU by default)
+    sub-commands and by the **prefork** server backend (one worker process per
+    CPU by default).
+
+--max-per-host=<count>
+    Maximum amount of repositories hosted on the same service (e.g., github.com)
+    updated at the same time. Only used by the *update_all_repositories*
+    sub-command. [Default: 4]
+
 --include-bootstrap-css
 --include-bootstrap-js
 --include-highlight-js
@@ -100,7 +151,18 @@ run <func_name>:
         Download all archives.
 
     **create_main_json_file**
-        Generate the **data_tables.json** file.
+        Generate the **data_tables.json** file. Only directories that changed
+        since the last run are scanned (see *--full* option).
+
+    **build_search_index**
+        Build the full-text search index of the documents listed in the
+        **data_tables.json** file. Only documents that changed since the last
+        run are read (see *--full* option).
+
+    **prerender_inline_content**
+        Render ahead of time the Markdown and reStructuredText documents that
+        the web server displays inline. Only documents that changed since the
+        last run are rendered.
 
     **html_to_markdown_files**
     **html_to_markdown_clip**
@@ -118,6 +180,11 @@ run <func_name>:
     **generate_index_html**
         Generate the index.html file.
 
+    **compress_static_files**
+        Create compressed versions of the files served by the web server
+        (**.gz** and, if the brotli module is available, **.br** files). Only
+        files that changed since the last run are compressed.
+
     **open_main_webpage**
         Open the main web page.
 
@@ -151,6 +218,8 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
         "handle_all_repositories",
         "download_all_archives",
         "create_main_json_file",
+        "build_search_index",
+        "prerender_inline_content",
         "html_to_markdown_files",
         "html_to_markdown_clip",
         "epub_to_html",
@@ -159,6 +228,7 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
         "build_sphinx_docs",
         "generate_categories_html",
         "generate_index_html",
+        "compress_static_files",
         "open_main_webpage",
     ]
     action = None
@@ -190,12 +260,27 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
 
         super().__init__(__appname__)
 
+        for option in ("--workers", "--max-per-host"):
+            if self.a.get(option) is not None:
+                try:
+                    self.a[option] = int(self.a[option])
+
+                    if self.a[option] < 1:
+                        raise ValueError("%s must be greater than zero." % option)
+                except ValueError as err:
+                    raise exceptions.InvalidArgument(err)
+
         if self.a["--manual"]:
             self.action = self.display_manual_page
         elif self.a["server"]:
             self.logger.info("**Command:** server")
             self.logger.info("**Arguments:**")
 
+            if self.a["--server"] not in bottle_utils.SERVER_BACKENDS:
+                raise exceptions.InvalidArgument(
+                    "Invalid server backend: %s. Available backends: %s" %
+                    (self.a["--server"], ", ".join(bottle_utils.SERVER_BACKENDS)))
+
             if self.a["start"]:
                 self.logger.info("start")
                 self.action = self.http_server_start
@@ -287,22 +372,50 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
             dry_run=self.a["--dry-run"],
             logger=self.logger
         )
-        handler.download_all_archives(self.a["--force-download"])
+        handler.download_all_archives(self.a["--force-download"], workers=self.a["--workers"])
 
     def update_all_repositories(self):
         """See :any:`RepositoriesHandler.update_all_repositories`
         """
-        self._repositories_handler.update_all_repositories(do_not_pull=self.a["--do-not-pull"])
+        self._repositories_handler.update_all_repositories(
+            do_not_pull=self.a["--do-not-pull"],
+            workers=self.a["--workers"],
+            max_per_host=self.a["--max-per-host"],
+            skip_unchanged=self.a["--skip-unchanged"]
+        )
 
     def handle_all_repositories(self):
         """See :any:`RepositoriesHandler.handle_all_repositories`
         """
-        self._repositories_handler.handle_all_repositories()
+        self._repositories_handler.handle_all_repositories(full=self.a["--full"],
+                                                           workers=self.a["--workers"])
 
     def create_main_json_file(self):
         """See :any:`app_utils.create_main_json_file`
         """
         app_utils.create_main_json_file(
+            full=self.a["--full"],
+            check_incremental=self.a["--check-incremental"],
+            workers=self.a["--workers"],
+            dry_run=self.a["--dry-run"],
+            logger=self.logger
+        )
+
+    def build_search_index(self):
+        """See :any:`app_utils.build_search_index`
+        """
+        app_utils.build_search_index(
+            full=self.a["--full"],
+            workers=self.a["--workers"],
+            dry_run=self.a["--dry-run"],
+            logger=self.logger
+        )
+
+    def prerender_inline_content(self):
+        """See :any:`app_utils.prerender_inline_content`
+        """
+        app_utils.prerender_inline_content(
+            workers=self.a["--workers"],
             dry_run=self.a["--dry-run"],
             logger=self.logger
         )
@@ -325,7 +438,12 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
                                        "www_root": self.www_root,
                                        "web_app_path": web_app_path,
                                        "host": self.a["--host"],
-                                       "port": self.a["--port"]
+                                       "port": self.a["--port"],
+                                       "backend": self.a["--server"],
+                                       "workers": self.a["--workers"],
+                                       "pid_file": os.path.join(root_folder, "UserData",
+                                                                "data_storage",
+                                                                "%s_webapp.pid" % app_slug)
                                    },
                                    logger=self.logger)
 
@@ -347,17 +465,18 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
     def html_to_markdown_files(self):
         """See :any:`app_utils.convert_html_to_markdown`
         """
-        app_utils.convert_html_to_markdown(False, self.logger)
+        app_utils.convert_html_to_markdown(False, self.logger, workers=self.a["--workers"])
 
     def html_to_markdown_clip(self):
         """See :any:`app_utils.convert_html_to_markdown`
         """
-        app_utils.convert_html_to_markdown(True, self.logger)
+        app_utils.convert_html_to_markdown(True, self.logger, workers=self.a["--workers"])
 
     def epub_to_html(self):
         """See :any:`app_utils.convert_epub_to_html`
         """
         app_utils.convert_epub_to_html(input_path_storage=self.a["--input-path-storage"],
+                                       workers=self.a["--workers"],
                                        logger=self.logger)
 
     def rst_to_html_pandoc(self):
@@ -367,6 +486,7 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
                                              include_bootstrap_css=self.a["--include-bootstrap-css"],
                                              include_bootstrap_js=self.a["--include-bootstrap-js"],
                                              include_highlight_js=self.a["--include-highlight-js"],
+                                             workers=self.a["--workers"],
                                              logger=self.logger)
 
     def rst_to_html_docutils(self):
@@ -376,6 +496,7 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
                                                include_bootstrap_css=self.a["--include-bootstrap-css"],
                                                include_bootstrap_js=self.a["--include-bootstrap-js"],
                                                include_highlight_js=self.a["--include-highlight-js"],
+                                               workers=self.a["--workers"],
                                                logger=self.logger)
 
     def open_main_webpage(self):
@@ -391,7 +512,8 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
     def build_sphinx_docs(self):
         """See :any:`RepositoriesHandler.build_sphinx_docs`
         """
-        self._repositories_handler.build_sphinx_docs()
+        self._repositories_handler.build_sphinx_docs(full=self.a["--full"],
+                                                     workers=self.a["--workers"])
 
     def generate_categories_html(self):
         """See :any:`app_utils.generate_categories_html`
@@ -403,6 +525,15 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
         """
         app_utils.generate_index_html(dry_run=self.a["--dry-run"], logger=self.logger)
 
+    def compress_static_files(self):
+        """See :any:`app_utils.compress_static_files`
+        """
+        app_utils.compress_static_files(
+            workers=self.a["--workers"],
+            dry_run=self.a["--dry-run"],
+            logger=self.logger
+        )
+
     def display_manual_page(self):
         """See :any:`cli_utils.CommandLineInterfaceSuper._display_manual_page`.
         """
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""In-memory index of the data_tables.json file used to answer DataTables server-side requests.
+
+Note
+----
+This module is imported by the web application, which isn't executed as part of the
+``KnowledgeBaseApp`` package. It should only import modules from the standard library.
+
+Attributes
+----------
+COLUMNS : tuple
+    The names of the columns of the index table (in the same order as they are defined
+    in the ``main.js`` file).
+"""
+import json
+import os
+import re
+
+from collections import OrderedDict
+from threading import Lock
+
+COLUMNS = ("handler", "category", "sub-category", "title")
+
+_smart_search_words = re.compile(r'"[^"]+"|[^ ]+')
+
+
+def _get_column_values(row):
+    """Get the values of all columns for a row exactly as ``main.js`` renders them to
+    filter/sort the table.
+
+    Parameters
+    ----------
+    row : dict
+        A "JSON data object" from the data_tables.json file.
+
+    Returns
+    -------
+    tuple
+        The lower cased values for each of the :any:`COLUMNS`.
+    """
+    category = row.get("c", "")
+
+    if "|" in category:
+        cat, sub_cat = category.split("|")[:2]
+    else:
+        cat, sub_cat = category, ""
+
+    return (row.get("h", "").lower(), cat.lower(), sub_cat.lower(), row.get("t", "").lower())
+
+
+def _get_smart_search_words(term):
+    """Split a search term into words the same way DataTables' "smart" search does.
+
+    Parameters
+    ----------
+    term : str
+        A search term.
+
+    Returns
+    -------
+    list
+        The lower cased words. Quoted phrases are kept as a single word.
+    """
+    return [word.strip('"').lower() for word in _smart_search_words.findall(term)
+            if word.strip('"')]
+
+
+def _compile_regex(term):
+    """Compile a regular expression sent by DataTables.
+
+    Parameters
+    ----------
+    term : str
+        A regular expression.
+
+    Returns
+    -------
+    re.Pattern
+        A case insensitive regular expression object. If ``term`` isn't a valid regular
+        expression, it is treated as a literal string.
+    """
+    try:
+        return re.compile(term, re.IGNORECASE)
+    except re.error:
+        return re.compile(re.escape(term), re.IGNORECASE)
+
+
+class DataTablesIndex():
+    """In-memory index of the data_tables.json file.
+
+    It implements the DataTables server-side processing protocol (paging, ordering, global
+    search and per column search). The JSON file is loaded on first use and loaded again
+    every time it changes on disk.
+
+    Attributes
+    ----------
+    json_path : str
+        Path to the data_tables.json file.
+    """
+
+    def __init__(self, json_path, results_cache_size=32):
+        """Initialize.
+
+        Parameters
+        ----------
+        json_path : str
+            Path to the data_tables.json file.
+        results_cache_size : int, optional
+            Amount of filtered results kept in memory so paging through the same search
+            doesn't require filtering the whole table again.
+        """
+        self.json_path = json_path
+        self._results_cache_size = results_cache_size
+        self._lock = Lock()
+        self._signature = None
+        # Tuple of (rows, column_values, search_values, sorted_by_title, results_cache).
+        self._data = ([], [], [], [], OrderedDict())
+
+    def ensure_loaded(self):
+        """Load the JSON file if it wasn't loaded yet or if it changed since it was loaded.
+        """
+        self._get_data()
+
+    def _get_data(self):
+        """Get the index data, loading the JSON file again if it changed.
+
+        Returns
+        -------
+        tuple
+            The index data.
+        """
+        try:
+            stat = os.stat(self.json_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._load(signature)
+
+        return self._data
+
+    def _load(self, signature):
+        """Load the JSON file.
+
+        Parameters
+        ----------
+        signature : tuple|None
+            The modification time and size of the JSON file.
+        """
+        try:
+            with open(self.json_path, "r", encoding="UTF-8") as json_file:
+                rows = json.load(json_file)
+        except (OSError, ValueError):
+            rows = []
+
+        column_values = [_get_column_values(row) for row in rows]
+        # NOTE: DataTables joins the values of all searchable columns with two spaces.
+        search_values = ["  ".join(values) for values in column_values]
+        sorted_by_title = sorted(range(len(rows)), key=lambda i: column_values[i][3])
+
+        self._data = (rows, column_values, search_values, sorted_by_title, OrderedDict())
+        self._signature = signature
+
+    def query(self, params):
+        """Answer a DataTables server-side processing request.
+
+        Parameters
+        ----------
+        params : dict
+            The request parameters sent by DataTables (``draw``, ``start``, ``length``,
+            ``search[value]``, ``order[0][column]``, ``columns[0][name]``, etc.).
+
+        Returns
+        -------
+        dict
+            The response expected by DataTables.
+        """
+        rows, column_values, search_values, sorted_by_title, results_cache = self._get_data()
+
+        try:
+            draw = int(params.get("draw", 0))
+            start = max(int(params.get("start", 0)), 0)
+            length = int(params.get("length", 10))
+        except ValueError:
+            draw, start, length = 0, 0, 10
+
+        # Map the column indexes used by the client to the column indexes of the index.
+        client_columns = {}
+        i = 0
+
+        while "columns[%d][name]" % i in params or "columns[%d][data]" % i in params:
+            name = params.get("columns[%d][name]" % i, "")
+
+            if name in COLUMNS:
+                client_columns[i] = COLUMNS.index(name)
+
+            i += 1
+
+        if not client_columns:
+            client_columns = dict(enumerate(range(len(COLUMNS))))
+
+        column_filters = []
+
+        for client_index, index in sorted(client_columns.items()):
+            term = params.get("columns[%d][search][value]" % client_index, "")
+
+            if term:
+                column_filters.append((index, term,
+                                       params.get("columns[%d][search][regex]" %
+                                                  client_index, "false") == "true"))
+
+        global_filter = (params.get("search[value]", ""),
+                         params.get("search[regex]", "false") == "true")
+
+        order = []
+        i = 0
+
+        while "order[%d][column]" % i in params:
+            try:
+                index = client_columns.get(int(params["order[%d][column]" % i]))
+            except ValueError:
+                index = None
+
+            if index is not None:
+                order.append((index, params.get("order[%d][dir]" % i, "asc") == "desc"))
+
+            i += 1
+
+        cache_key = (tuple(column_filters), global_filter, tuple(order))
+
+        with self._lock:
+            result = results_cache.get(cache_key)
+
+            if result is not None:
+                results_cache.move_to_end(cache_key)
+
+        if result is None:
+            result = self._filter(column_values, search_values, sorted_by_title,
+                                  column_filters, global_filter)
+
+            if order and order != [(3, False)]:
+                # NOTE: Python's sort is stable, so sort by the least significant column first.
+                for index, reverse in reversed(order):
+                    result.sort(key=lambda i: column_values[i][index], reverse=reverse)
+
+            with self._lock:
+                results_cache[cache_key] = result
+
+                while len(results_cache) > self._results_cache_size:
+                    results_cache.popitem(last=False)
+
+        page = result[start:] if length < 0 else result[start:start + length]
+
+        return {
+            "draw": draw,
+            "recordsTotal": len(rows),
+            "recordsFiltered": len(result),
+            "data": [rows[i] for i in page]
+        }
+
+    def _filter(self, column_values, search_values, sorted_by_title, column_filters,
+                global_filter):
+        """Filter the index.
+
+        Parameters
+        ----------
+        column_values : list
+            The column values of all rows.
+        search_values : list
+            The global search values of all rows.
+        sorted_by_title : list
+            The indexes of all rows sorted by title.
+        column_filters : list
+            A list of tuples containing a column index, a search term and whether the search
+            term is a regular expression.
+        global_filter : tuple
+            A search term and whether the search term is a regular expression.
+
+        Returns
+        -------
+        list
+            The indexes of the rows that passed all filters sorted by title.
+        """
+        tests = []
+
+        for index, term, is_regex in column_filters:
+            tests.append((index, self._get_test(term, is_regex)))
+
+        if global_filter[0]:
+            tests.append((None, self._get_test(*global_filter)))
+
+        if not tests:
+            return list(sorted_by_title)
+
+        result = []
+
+        for i in sorted_by_title:
+            values = column_values[i]
+
+            for index, test in tests:
+                if not test(search_values[i] if index is None else values[index]):
+                    break
+            else:
+                result.append(i)
+
+        return result
+
+    def _get_test(self, term, is_regex):
+        """Get a function to test values against a search term.
+
+        Parameters
+        ----------
+        term : str
+            A search term.
+        is_regex : bool
+            Whether the search term is a regular expression. If not, DataTables' "smart" search
+            is used (all words must be found in a value).
+
+        Returns
+        -------
+        method
+            A function that receives a lower cased value and returns whether it matches.
+        """
+        if is_regex:
+            return _compile_regex(term).search
+
+        words = _get_smart_search_words(term)
+
+        return lambda value: all(word in value for word in words)
+
+
+if __name__ == "__main__":
+    pass
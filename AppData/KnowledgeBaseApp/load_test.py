@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Small load test for the web server.
+
+It sends requests to one or more URLs from several concurrent clients for a fixed amount of
+time and reports the requests per second and the response times.
+
+Usage::
+
+    ./AppData/KnowledgeBaseApp/load_test.py [-c CLIENTS] [-d SECONDS] URL [URL ...]
+
+Example::
+
+    ./app.py server start --server=wsgiref &
+    ./AppData/KnowledgeBaseApp/load_test.py -c 16 -d 10 http://127.0.0.1:8888/ \\
+        "http://127.0.0.1:8888/data_tables?draw=1&start=0&length=100"
+"""
+import argparse
+import threading
+import time
+
+from urllib.error import URLError
+from urllib.request import urlopen
+
+
+def _client(urls, deadline, latencies, errors, lock):
+    """Send requests until the deadline.
+
+    Parameters
+    ----------
+    urls : list
+        URLs requested in turns.
+    deadline : float
+        Time (see :any:`time.monotonic`) at which to stop sending requests.
+    latencies : list
+        Where to store the response times of the successful requests.
+    errors : list
+        Where to store the failed requests.
+    lock : threading.Lock
+        Lock guarding ``latencies`` and ``errors``.
+    """
+    i = 0
+    local_latencies = []
+    local_errors = []
+
+    while time.monotonic() < deadline:
+        url = urls[i % len(urls)]
+        i += 1
+        start = time.monotonic()
+
+        try:
+            with urlopen(url, timeout=30) as response:
+                response.read()
+
+            local_latencies.append(time.monotonic() - start)
+        except (URLError, OSError) as err:
+            local_errors.append(err)
+
+    with lock:
+        latencies.extend(local_latencies)
+        errors.extend(local_errors)
+
+
+def _percentile(sorted_values, percent):
+    """Get a percentile.
+
+    Parameters
+    ----------
+    sorted_values : list
+        Sorted values.
+    percent : float
+        The percentile to get (0-100).
+
+    Returns
+    -------
+    float
+        The percentile value.
+    """
+    if not sorted_values:
+        return 0.0
+
+    return sorted_values[min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)]
+
+
+def run(urls, clients=8, duration=10):
+    """Run the load test.
+
+    Parameters
+    ----------
+    urls : list
+        URLs requested in turns by each client.
+    clients : int, optional
+        Amount of concurrent clients.
+    duration : float, optional
+        Duration of the test in seconds.
+
+    Returns
+    -------
+    dict
+        The test results.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + duration
+    threads = [threading.Thread(target=_client, args=(urls, deadline, latencies, errors, lock))
+               for i in range(clients)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.monotonic() - start
+    latencies.sort()
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": _percentile(latencies, 50),
+        "p95": _percentile(latencies, 95),
+        "p99": _percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0.0
+    }
+
+
+def main():
+    """Parse the command line arguments, run the load test and print the results.
+    """
+    parser = argparse.ArgumentParser(description="Small load test for the web server.")
+    parser.add_argument("urls", metavar="URL", nargs="+", help="URLs to request.")
+    parser.add_argument("-c", "--clients", type=int, default=8,
+                        help="Amount of concurrent clients (default: 8).")
+    parser.add_argument("-d", "--duration", type=float, default=10,
+                        help="Duration of the test in seconds (default: 10).")
+    args = parser.parse_args()
+    results = run(args.urls, clients=args.clients, duration=args.duration)
+
+    print("Requests:      %d" % results["requests"])
+    print("Errors:        %d" % results["errors"])
+    print("Requests/sec:  %.1f" % results["rps"])
+    print("Latency p50:   %.1f ms" % (results["p50"] * 1000))
+    print("Latency p95:   %.1f ms" % (results["p95"] * 1000))
+    print("Latency p99:   %.1f ms" % (results["p99"] * 1000))
+    print("Latency max:   %.1f ms" % (results["max"] * 1000))
+
+
+if __name__ == "__main__":
+    main()
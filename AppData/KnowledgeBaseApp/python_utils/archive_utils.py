@@ -0,0 +1,613 @@
+# -*- coding: utf-8 -*-
+"""Utilities to extract compressed archives.
+
+Attributes
+----------
+ARCHIVE_FORMATS : tuple
+    Archive formats that can be extracted by :any:`extract_archive`.
+CHUNK_SIZE : int
+    Size of the chunks in which the archive members are written to disk.
+"""
+import os
+import tarfile
+import time
+import zipfile
+
+from shutil import copy2
+from shutil import copyfileobj
+from shutil import rmtree
+from stat import S_ISDIR
+from stat import S_ISLNK
+from stat import S_ISREG
+from tempfile import mkstemp
+from zlib import crc32
+
+from . import exceptions
+
+ARCHIVE_FORMATS = ("zip", "tar")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class _Member():
+    """An archive member.
+
+    Attributes
+    ----------
+    crc : int|None
+        The CRC-32 of the member content (zip archives only).
+    kind : str
+        **dir**, **file**, **symlink** or **hardlink**.
+    link : str|None
+        The target of a symbolic link or the archive path of the target of a hard link.
+    mode : int
+        The permission bits of the member. 0 if the archive doesn't store them.
+    mtime : int
+        The modification time of the member.
+    open : method
+        Function that returns a file object to read the member content.
+    parts : tuple
+        The components of the member path.
+    size : int
+        The size of the member content.
+    """
+
+    def __init__(self, parts, kind, size=0, mtime=0, mode=0, crc=None, link=None, open=None):
+        """Initialization.
+
+        Parameters
+        ----------
+        See the class attributes.
+        """
+        self.parts = parts
+        self.kind = kind
+        self.size = size
+        self.mtime = mtime
+        self.mode = mode
+        self.crc = crc
+        self.link = link
+        self.open = open
+
+
+def _split_member_path(name):
+    """Split the path of an archive member into its components.
+
+    Parameters
+    ----------
+    name : str
+        The path of an archive member.
+
+    Returns
+    -------
+    tuple|None
+        The components of the path. None if the path points outside the extraction destination.
+    """
+    parts = tuple(part for part in name.replace("\\", "/").split("/") if part not in ("", "."))
+
+    if ".." in parts:
+        return None
+
+    return parts
+
+
+def _is_inside(path, real_destination):
+    """Check if a path resolves to a location inside a directory.
+
+    Parameters
+    ----------
+    path : str
+        The path to check. It doesn't need to exist.
+    real_destination : str
+        The directory, with all its symbolic links resolved (see :any:`os.path.realpath`).
+
+    Returns
+    -------
+    bool
+        If the path, with all its symbolic links resolved, is the directory or is inside it.
+    """
+    real_path = os.path.realpath(path)
+
+    return real_path == real_destination or \
+        real_path.startswith(os.path.join(real_destination, ""))
+
+
+def _iter_zip_members(archive):
+    """Iterate over the members of a zip archive.
+
+    Parameters
+    ----------
+    archive : zipfile.ZipFile
+        An opened zip archive.
+
+    Yields
+    ------
+    _Member|str
+        An archive member or the name of a member that will not be extracted.
+    """
+    for info in archive.infolist():
+        parts = _split_member_path(info.filename)
+
+        if parts is None:
+            yield info.filename
+            continue
+        elif not parts:
+            continue
+
+        mode = info.external_attr >> 16
+        mtime = int(time.mktime(info.date_time + (0, 0, -1)))
+
+        if info.is_dir():
+            yield _Member(parts, "dir", mtime=mtime)
+        elif S_ISLNK(mode):
+            yield _Member(parts, "symlink", mtime=mtime,
+                          link=archive.read(info).decode("UTF-8"))
+        else:
+            yield _Member(parts, "file", size=info.file_size, mtime=mtime, mode=mode & 0o777,
+                          crc=info.CRC, open=lambda info=info: archive.open(info))
+
+
+def _iter_tar_members(archive, destination):
+    """Iterate over the members of a tar archive.
+
+    Members are checked with :any:`tarfile.data_filter` (if available). Members rejected by
+    the filter (links pointing outside the extraction destination, device files, etc.) are
+    not extracted.
+
+    Parameters
+    ----------
+    archive : tarfile.TarFile
+        An opened tar archive.
+    destination : str
+        Path to the directory where the archive is extracted.
+
+    Yields
+    ------
+    _Member|str
+        An archive member or the name of a member that will not be extracted.
+    """
+    # NOTE: Members are read in the order they are stored. Compressed tar archives can't seek
+    # backwards without decompressing the archive again from the start.
+    for info in archive:
+        if hasattr(tarfile, "data_filter"):
+            try:
+                info = tarfile.data_filter(info, destination)
+            except tarfile.FilterError:
+                yield info.name
+                continue
+
+        parts = _split_member_path(info.name)
+
+        if parts is None:
+            yield info.name
+        elif not parts:
+            continue
+        elif info.isdir():
+            yield _Member(parts, "dir", mtime=int(info.mtime))
+        elif info.issym():
+            yield _Member(parts, "symlink", mtime=int(info.mtime), link=info.linkname)
+        elif info.islnk():
+            yield _Member(parts, "hardlink", mtime=int(info.mtime), link=info.linkname)
+        elif info.isreg():
+            yield _Member(parts, "file", size=info.size, mtime=int(info.mtime),
+                          mode=(info.mode or 0) & 0o777,
+                          open=lambda info=info: archive.extractfile(info))
+        else:
+            yield info.name
+
+
+def _file_crc(path):
+    """Get the CRC-32 of a file.
+
+    Parameters
+    ----------
+    path : str
+        Path to a file.
+
+    Returns
+    -------
+    int
+        The CRC-32 of the file.
+    """
+    crc = 0
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            crc = crc32(chunk, crc)
+
+    return crc
+
+
+def _is_extracted(member, path, st):
+    """Check if a member is already extracted.
+
+    A file is already extracted if a file with the same size and modification time (or the same
+    CRC-32 in zip archives) exists at its destination. The modification time of files whose CRC-32
+    matches is fixed so the next check only needs to compare their modification time. Files with
+    other hard links (see :any:`link_tree`) are left untouched, their modification time is also
+    the one of the files they are linked to.
+
+    Parameters
+    ----------
+    member : _Member
+        An archive member.
+    path : str
+        The destination of the member.
+    st : os.stat_result|None
+        The result of calling :any:`os.lstat` on the destination. None if it doesn't exist.
+
+    Returns
+    -------
+    bool
+        If the member is already extracted.
+    """
+    if st is None:
+        return False
+
+    if member.kind == "symlink":
+        return S_ISLNK(st.st_mode) and os.readlink(path) == member.link
+
+    if not S_ISREG(st.st_mode) or st.st_size != member.size:
+        return False
+
+    if int(st.st_mtime) == member.mtime:
+        return True
+
+    if member.crc is not None and _file_crc(path) == member.crc:
+        if st.st_nlink == 1:
+            os.utime(path, (member.mtime, member.mtime))
+
+        return True
+
+    return False
+
+
+def _remove_path(path):
+    """Remove a file, a symbolic link or a directory.
+
+    Parameters
+    ----------
+    path : str
+        The path to remove.
+    """
+    try:
+        if S_ISDIR(os.lstat(path).st_mode):
+            rmtree(path)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _write_member(member, path, st, source=None):
+    """Write an archive member to disk.
+
+    If the destination exists, the member is written into a temporary file that then replaces
+    the destination, so a file being served is never seen half written and other hard links to
+    the destination are not modified.
+
+    Parameters
+    ----------
+    member : _Member
+        An archive member.
+    path : str
+        The destination of the member.
+    st : os.stat_result|None
+        The result of calling :any:`os.lstat` on the destination. None if it doesn't exist.
+    source : str, optional
+        An already extracted file to copy instead of reading the member content (hard links).
+    """
+    parent = os.path.dirname(path)
+
+    if st is not None and S_ISDIR(st.st_mode):
+        rmtree(path)
+        st = None
+
+    if member.kind == "symlink":
+        tmp_path = os.path.join(parent, ".%s.%d.part" % (os.path.basename(path), os.getpid()))
+        _remove_path(tmp_path)
+        os.symlink(member.link, tmp_path)
+        os.replace(tmp_path, path)
+        return
+
+    if st is None:
+        fd, tmp_path = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666), path
+    else:
+        fd, tmp_path = mkstemp(dir=parent, prefix=".%s." % os.path.basename(path),
+                               suffix=".part")
+
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            if source is not None:
+                with open(source, "rb") as src:
+                    copyfileobj(src, dst, CHUNK_SIZE)
+            else:
+                with member.open() as src:
+                    copyfileobj(src, dst, CHUNK_SIZE)
+
+        if member.mode:
+            os.chmod(tmp_path, member.mode)
+
+        os.utime(tmp_path, (member.mtime, member.mtime))
+
+        if tmp_path != path:
+            os.replace(tmp_path, path)
+    except BaseException:
+        _remove_path(tmp_path)
+        raise
+
+
+def link_tree(source, destination):
+    """Copy a directory tree creating hard links to its files.
+
+    Used to prepare a copy of an extraction in which only the changed members are written
+    (:any:`extract_archive` replaces files instead of modifying them, so the files of the
+    original tree aren't modified). Files are copied if hard links aren't supported.
+
+    Parameters
+    ----------
+    source : str
+        The directory to copy.
+    destination : str
+        The directory copy. It must not exist.
+    """
+    dirs = [(source, destination)]
+
+    while dirs:
+        src_dir, dst_dir = dirs.pop()
+        os.makedirs(dst_dir)
+
+        for entry in os.scandir(src_dir):
+            dst_path = os.path.join(dst_dir, entry.name)
+
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), dst_path)
+            elif entry.is_dir():
+                dirs.append((entry.path, dst_path))
+            else:
+                try:
+                    os.link(entry.path, dst_path)
+                except OSError:
+                    copy2(entry.path, dst_path)
+
+
+def extract_archive(archive_path, destination, archive_format, top_dir_name=None,
+                    stop_event=None, logger=None):
+    """Extract an archive into a directory, skipping the members that are already extracted.
+
+    Members are streamed to disk one by one. Files and directories found at the destination
+    that aren't part of the archive are removed.
+
+    Members are never written outside the destination. Symbolic links are created after all
+    other members are extracted and only if they point inside the destination (absolute
+    targets are rejected). Members whose parent directory resolves to a location outside the
+    destination are not extracted.
+
+    Parameters
+    ----------
+    archive_path : str
+        Path to the archive.
+    destination : str
+        Path to the directory where the archive is extracted.
+    archive_format : str
+        The archive format (see :any:`ARCHIVE_FORMATS`). The compression of tar archives is
+        detected automatically.
+    top_dir_name : str, optional
+        If the archive contains a single top-level directory, it's extracted with this name
+        instead of its own.
+    stop_event : threading.Event, optional
+        Event that, when set, aborts the extraction.
+    logger : object, optional
+        See <class :any:`LogSystem`>. Used to log the members that aren't extracted.
+
+    Returns
+    -------
+    dict
+        The amount of ``extracted``, ``skipped`` (already extracted) and ``removed`` files and the
+        amount of ``bytes_extracted`` and ``bytes_skipped``.
+
+    Raises
+    ------
+    exceptions.InvalidArgument
+        Unsupported archive format.
+    exceptions.OperationAborted
+        The stop event was set.
+    """
+    if archive_format == "zip":
+        archive = zipfile.ZipFile(archive_path)
+        members = _iter_zip_members(archive)
+    elif archive_format == "tar":
+        archive = tarfile.open(archive_path, "r:*")
+        members = _iter_tar_members(archive, destination)
+    else:
+        raise exceptions.InvalidArgument("Unsupported archive format: %s" % archive_format)
+
+    report = dict.fromkeys(("extracted", "skipped", "removed",
+                            "bytes_extracted", "bytes_skipped"), 0)
+    kept = []
+    links = []
+    # NOTE: The top-level directory is renamed while extracting, assuming the first top-level
+    # directory found is the only one. If another one is found, the renamed directory is given
+    # back its name and the remaining members are extracted without renaming.
+    top_dir = None
+    rename_top_dir = bool(top_dir_name)
+
+    def get_path(parts):
+        if rename_top_dir and top_dir is not None and parts[0] == top_dir:
+            parts = (top_dir_name,) + parts[1:]
+
+        return os.path.join(destination, *parts)
+
+    def skip(member):
+        if logger is not None:
+            logger.warning("Archive member not extracted: %s" % "/".join(member.parts))
+
+    def make_parent(path):
+        parent = os.path.dirname(path)
+
+        if parent not in dirs:
+            if not _is_inside(parent, real_destination):
+                return False
+
+            os.makedirs(parent, exist_ok=True)
+            dirs.add(parent)
+
+        return True
+
+    def extract(member, path, source=None):
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            st = None
+
+        if _is_extracted(member, path, st):
+            report["skipped"] += 1
+            report["bytes_skipped"] += member.size
+        else:
+            _write_member(member, path, st, source)
+            report["extracted"] += 1
+            report["bytes_extracted"] += member.size
+
+    os.makedirs(destination, exist_ok=True)
+    real_destination = os.path.realpath(destination)
+    # NOTE: Directories known to exist and to be inside the destination. Avoids checking the
+    # parent directory of every member. Symbolic links are created last, so a directory
+    # checked while extracting the other members can't be replaced by a link.
+    dirs = {destination}
+
+    with archive:
+        for member in members:
+            if stop_event is not None and stop_event.is_set():
+                raise exceptions.OperationAborted("Extraction of <%s> aborted." % archive_path)
+
+            if isinstance(member, str):
+                if logger is not None:
+                    logger.warning("Archive member not extracted: %s" % member)
+
+                continue
+
+            if len(member.parts) > 1 or member.kind == "dir":
+                if top_dir is None:
+                    top_dir = member.parts[0]
+                elif rename_top_dir and member.parts[0] != top_dir:
+                    rename_top_dir = False
+                    renamed_path = os.path.join(destination, top_dir_name)
+                    original_path = os.path.join(destination, top_dir)
+
+                    if renamed_path != original_path and os.path.lexists(renamed_path):
+                        _remove_path(original_path)
+                        os.rename(renamed_path, original_path)
+
+            # NOTE: Like GNU tar, symbolic links are created once all other members are
+            # extracted, so no member is ever written through a link found in the archive.
+            if member.kind == "symlink":
+                links.append(member)
+                continue
+
+            path = get_path(member.parts)
+
+            if not make_parent(path):
+                skip(member)
+                continue
+
+            if member.kind == "dir":
+                if path not in dirs:
+                    if not os.path.isdir(path) or os.path.islink(path):
+                        _remove_path(path)
+                        os.makedirs(path)
+
+                    dirs.add(path)
+
+                kept.append(member.parts)
+                continue
+
+            source = None
+
+            if member.kind == "hardlink":
+                link_parts = _split_member_path(member.link)
+                source = get_path(link_parts) if link_parts else None
+
+                if source is None or not os.path.isfile(source) or \
+                        not _is_inside(source, real_destination):
+                    skip(member)
+                    continue
+
+                st = os.stat(source)
+                member.size = st.st_size
+                member.mtime = int(st.st_mtime)
+
+            kept.append(member.parts)
+            extract(member, path, source)
+
+        for member in links:
+            path = get_path(member.parts)
+
+            if os.path.isabs(member.link) or not make_parent(path) or \
+                    not _is_inside(os.path.join(os.path.dirname(path), member.link),
+                                   real_destination):
+                skip(member)
+                continue
+
+            kept.append(member.parts)
+            extract(member, path)
+
+    report["removed"] = _remove_stale_paths(destination, {get_path(parts) for parts in kept})
+
+    # NOTE: A link is checked when it's created, but a link created after it can change the
+    # location it resolves to.
+    for member in links:
+        path = get_path(member.parts)
+
+        if os.path.islink(path) and not _is_inside(path, real_destination):
+            _remove_path(path)
+            skip(member)
+
+    return report
+
+
+def _remove_stale_paths(destination, kept):
+    """Remove the paths inside a directory that weren't extracted from an archive.
+
+    Parameters
+    ----------
+    destination : str
+        The directory where an archive was extracted.
+    kept : set
+        The paths of the archive members. The parent directories of these paths are also kept.
+
+    Returns
+    -------
+    int
+        The amount of removed files and directories.
+    """
+    kept_dirs = set()
+
+    for path in kept:
+        parent = os.path.dirname(path)
+
+        while parent != destination and parent not in kept_dirs:
+            kept_dirs.add(parent)
+            parent = os.path.dirname(parent)
+
+    removed = 0
+    dirs = [destination]
+
+    while dirs:
+        for entry in os.scandir(dirs.pop()):
+            if entry.path in kept_dirs:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                    continue
+            elif entry.path in kept:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+
+                continue
+
+            _remove_path(entry.path)
+            removed += 1
+
+    return removed
+
+
+if __name__ == "__main__":
+    pass
@@ -11,6 +11,15 @@ Homepage and documentation: http://bottlepy.org/
 
 Copyright (c) 2009-2018, Marcel Hellkamp.
 License: MIT (see LICENSE for details)
+
+.. note::
+    This is a slightly modified version of the bottle module.
+
+    **Modifications**:
+
+    - The body of the responses to ``Range`` requests sent by ``static_file`` is a file-like
+      object limited to the requested range (``_FileRange``) instead of a generator, so servers
+      can send it with ``wsgi.file_wrapper`` (e.g., using ``sendfile``).
 """
 import sys
 
@@ -2919,6 +2928,37 @@ def _file_iter_range(fp, offset, bytes, maxread=1024 * 1024, close=False):
         fp.close()
 
 
+class _FileRange(object):
+    """ A file-like object limited to a range of a file. It's positioned at the
+        start of the range, so servers that send files with ``sendfile`` and
+        ``Content-Length`` can send it. The range is also available as the
+        ``offset`` and ``length`` attributes. """
+
+    def __init__(self, fp, offset, length, maxread=1024 * 1024):
+        self.fp, self.offset, self.length = fp, offset, length
+        self.maxread, self.remaining = maxread, length
+        fp.seek(offset)
+
+    def fileno(self):
+        return self.fp.fileno()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        part = self.fp.read(size) if size else b''
+        self.remaining -= len(part)
+        return part
+
+    def close(self):
+        self.fp.close()
+
+    def __iter__(self):
+        part = self.read(self.maxread)
+        while part:
+            yield part
+            part = self.read(self.maxread)
+
+
 def static_file(filename, root,
                 mimetype=True,
                 download=False,
@@ -3023,7 +3063,7 @@ def static_file(filename, root,
         headers["Content-Range"] = "bytes %d-%d/%d" % (offset, end - 1, clen)
         headers["Content-Length"] = str(end - offset)
         if body:
-            body = _file_iter_range(body, offset, end - offset, close=True)
+            body = _FileRange(body, offset, end - offset)
         return HTTPResponse(body, status=206, **headers)
     return HTTPResponse(body, **headers)
 
@@ -1,7 +1,23 @@
 # -*- coding: utf-8 -*-
 """Bottle.py utilities.
+
+Attributes
+----------
+SERVER_BACKENDS : tuple
+    The names of the available server backends. See :any:`WebAppServer`.
 """
 import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import ServerHandler
+from wsgiref.simple_server import WSGIRequestHandler
+from wsgiref.simple_server import WSGIServer
+from wsgiref.util import FileWrapper
 
 try:
     from . import bottle
@@ -10,11 +26,409 @@ except (ImportError, SystemError):
 
 bottle_app = bottle.Bottle()
 
+SERVER_BACKENDS = ("wsgiref", "threaded", "prefork")
 
-_missing_psutil_msg = """Missing **psutil** module. Read the documentation.
-This module is used to programmatically terminate the HTTP server.
-Without this Python module, the server can only be stopped/restarted manually.
-"""
+# Environment variable used to pass the listening socket to a server re-executed by a graceful
+# restart. See :any:`WebAppServer`.
+_listen_fd_env = "BOTTLE_UTILS_LISTEN_FD"
+
+
+class _FileWrapper(FileWrapper):
+    """File wrapper (``wsgi.file_wrapper``) used by the servers.
+
+    Files are sent with :any:`_ServerHandler.sendfile`. If they can't, they are read in big
+    blocks instead of the 8 KiB blocks used by default.
+    """
+
+    def __init__(self, filelike, blksize=1024 * 1024):
+        super().__init__(filelike, blksize)
+
+
+class _ServerHandler(ServerHandler):
+    """WSGI handler that sends files with the ``sendfile`` system call.
+    """
+    wsgi_file_wrapper = _FileWrapper
+
+    def sendfile(self):
+        """Send the wrapped file with ``os.sendfile``.
+
+        The file is sent from its current position (or from its ``offset`` attribute) until its
+        end (or ``length`` bytes, if it has a ``length`` attribute). See ``bottle._FileRange``.
+
+        Returns
+        -------
+        bool
+            If the file was sent. False if the file or the socket can't be used with
+            ``os.sendfile`` (the file is sent by iterating the file wrapper instead).
+        """
+        sock = getattr(self.request_handler, "connection", None)
+
+        # NOTE: Sockets with a timeout are non-blocking at the OS level.
+        if not hasattr(os, "sendfile") or sock is None or sock.gettimeout() is not None:
+            return False
+
+        filelike = self.result.filelike
+
+        try:
+            in_fd = filelike.fileno()
+            offset = getattr(filelike, "offset", None)
+
+            if offset is None:
+                offset = filelike.tell()
+
+            length = getattr(filelike, "length", None)
+
+            if length is None:
+                length = os.fstat(in_fd).st_size - offset
+        except (AttributeError, OSError, ValueError):
+            return False
+
+        if not self.headers_sent:
+            self.send_headers()
+
+        self._flush()
+        out_fd = sock.fileno()
+
+        while length > 0:
+            # NOTE: Limit the size of each call. Linux sends at most ~2 GiB per call anyway.
+            sent = os.sendfile(out_fd, in_fd, offset, min(length, 1024 * 1024 * 1024))
+
+            # The file was truncated.
+            if not sent:
+                break
+
+            offset += sent
+            length -= sent
+            self.bytes_sent += sent
+
+        return True
+
+
+class _RequestHandler(WSGIRequestHandler):
+    """Request handler that prevents reverse DNS lookups and sends files with ``sendfile``.
+    """
+
+    def address_string(self):
+        return self.client_address[0]
+
+    def handle(self):
+        """Handle a single HTTP request.
+
+        Same as :any:`wsgiref.simple_server.WSGIRequestHandler.handle`, but using
+        :any:`_ServerHandler`.
+        """
+        self.raw_requestline = self.rfile.readline(65537)
+
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ""
+            self.request_version = ""
+            self.command = ""
+            self.send_error(414)
+            return
+
+        if not self.parse_request():
+            return
+
+        handler = _ServerHandler(self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+                                 multithread=False)
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI server handling each request in a new thread.
+
+    Request threads aren't daemonic and are joined when the server is closed, so requests
+    being handled are finished before the server exits.
+    """
+    daemon_threads = False
+    block_on_close = True
+
+
+class WebAppServer(bottle.ServerAdapter):
+    """Bottle server adapter with several backends implemented with the standard library.
+
+    Backends:
+
+    - **wsgiref**: Single threaded server. Bottle's default server.
+    - **threaded**: Each request is handled in a new thread.
+    - **prefork**: A master process forks a fixed amount of single threaded worker processes
+      that accept connections from the same listening socket. Dead workers are replaced.
+
+    Signals handled by the server (by the master process when using the **prefork** backend):
+
+    - **SIGTERM**: Stop accepting connections, finish the requests being handled and exit.
+    - **SIGHUP**: Graceful restart. Finish the requests being handled and execute the server
+      again (loading the code again) in the same process. The listening socket is passed to
+      the new server, so connections made during the restart wait in the socket backlog
+      instead of being refused.
+
+    Attributes
+    ----------
+    backend : str
+        One of :any:`SERVER_BACKENDS`.
+    pid_file : str|None
+        Path to the file storing the process ID of the server.
+    workers : int
+        Amount of worker processes used by the **prefork** backend.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, backend="wsgiref", workers=None,
+                 pid_file=None, **options):
+        """Initialization.
+
+        Parameters
+        ----------
+        host : str, optional
+            The host name used by the web server.
+        port : str, optional
+            The port number used by the web server.
+        backend : str, optional
+            One of :any:`SERVER_BACKENDS`.
+        workers : int, optional
+            Amount of worker processes used by the **prefork** backend. If not specified, the
+            amount of CPUs is used.
+        pid_file : str, optional
+            Path to the file storing the process ID of the server.
+        **options
+            Keyword arguments.
+
+        Raises
+        ------
+        ValueError
+            If ``backend`` isn't one of :any:`SERVER_BACKENDS`.
+        """
+        super().__init__(host=host, port=port, **options)
+
+        if backend not in SERVER_BACKENDS:
+            raise ValueError("Invalid server backend: %s. Available backends: %s" %
+                             (backend, ", ".join(SERVER_BACKENDS)))
+
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.pid_file = pid_file
+
+    def run(self, app):
+        """Run server.
+
+        Parameters
+        ----------
+        app : object
+            The WSGI application.
+        """
+        sock = self._get_listening_socket()
+
+        if self.pid_file:
+            with open(self.pid_file, "w", encoding="UTF-8") as pid_file:
+                pid_file.write(str(os.getpid()))
+
+        if self.backend == "prefork":
+            signum = self._run_prefork(app, sock)
+        else:
+            signum = self._serve(app, sock, _ThreadingWSGIServer
+                                 if self.backend == "threaded" else WSGIServer)
+
+        if signum == signal.SIGHUP:
+            self._execute_again(sock)
+
+        sock.close()
+
+        if self.pid_file:
+            try:
+                os.remove(self.pid_file)
+            except OSError:
+                pass
+
+    def _get_listening_socket(self):
+        """Get the listening socket.
+
+        Returns
+        -------
+        socket.socket
+            The socket inherited from a graceful restart or a newly created socket.
+        """
+        fd = os.environ.pop(_listen_fd_env, None)
+
+        if fd is not None:
+            return socket.socket(fileno=int(fd))
+
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET,
+                             socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(socket.SOMAXCONN)
+
+        return sock
+
+    def _make_server(self, app, sock, server_class):
+        """Create a WSGI server using an already listening socket.
+
+        Parameters
+        ----------
+        app : object
+            The WSGI application.
+        sock : socket.socket
+            The listening socket.
+        server_class : class
+            A :any:`wsgiref.simple_server.WSGIServer` class.
+
+        Returns
+        -------
+        object
+            The WSGI server.
+        """
+        handler_class = _RequestHandler
+
+        if self.quiet:
+            class handler_class(_RequestHandler):
+                def log_request(*args, **kwargs):
+                    pass
+
+        srv = server_class(sock.getsockname()[:2], handler_class, bind_and_activate=False)
+        srv.socket.close()
+        srv.socket = sock
+        srv.server_address = sock.getsockname()
+        srv.server_name = socket.getfqdn(srv.server_address[0])
+        srv.server_port = srv.server_address[1]
+        srv.setup_environ()
+        srv.set_app(app)
+
+        return srv
+
+    def _serve(self, app, sock, server_class):
+        """Serve requests until SIGTERM or SIGHUP is received.
+
+        Parameters
+        ----------
+        app : object
+            The WSGI application.
+        sock : socket.socket
+            The listening socket.
+        server_class : class
+            A :any:`wsgiref.simple_server.WSGIServer` class.
+
+        Returns
+        -------
+        int|None
+            The received signal. None if the server was interrupted with Ctrl-C.
+        """
+        srv = self._make_server(app, sock, server_class)
+        received = []
+
+        def handle_signal(signum, frame):
+            received.append(signum)
+            # NOTE: shutdown() waits for serve_forever() to return. It has to be called from
+            # another thread.
+            threading.Thread(target=srv.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGHUP, handle_signal)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM, signal.SIGHUP})
+
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+        # NOTE: Closing the server closes its socket and waits for the requests being handled.
+        # Give it a duplicate to close so the listening socket can still be used.
+        srv.socket = sock.dup()
+        srv.server_close()
+
+        return received[0] if received else None
+
+    def _run_prefork(self, app, sock):
+        """Run the master process of the **prefork** backend.
+
+        Parameters
+        ----------
+        app : object
+            The WSGI application.
+        sock : socket.socket
+            The listening socket.
+
+        Returns
+        -------
+        int|None
+            The received signal. None if the server was interrupted with Ctrl-C.
+        """
+        # NOTE: A non-blocking listening socket prevents idle workers from blocking on accept()
+        # when another worker accepted the connection first.
+        sock.setblocking(False)
+        children = set()
+        received = []
+
+        signals = {signal.SIGTERM, signal.SIGHUP}
+
+        def spawn_worker():
+            # NOTE: Block signals until the worker sets its own signal handlers.
+            signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+
+            try:
+                pid = os.fork()
+
+                if pid == 0:
+                    try:
+                        self._serve(app, sock, WSGIServer)
+                    finally:
+                        os._exit(0)
+
+                children.add(pid)
+            finally:
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+
+        def handle_signal(signum, frame):
+            received.append(signum)
+
+            for pid in list(children):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGHUP, handle_signal)
+
+        for i in range(self.workers):
+            spawn_worker()
+
+        try:
+            while children:
+                try:
+                    pid = os.wait()[0]
+                except ChildProcessError:
+                    break
+
+                children.discard(pid)
+
+                if not received:
+                    # Replace dead workers.
+                    time.sleep(0.1)
+                    spawn_worker()
+        except KeyboardInterrupt:
+            # NOTE: Ctrl-C is sent to the whole process group; workers exit by themselves.
+            pass
+
+        sock.setblocking(True)
+
+        return received[0] if received else None
+
+    def _execute_again(self, sock):
+        """Execute the web application again in the current process passing it the listening
+        socket.
+
+        Parameters
+        ----------
+        sock : socket.socket
+            The listening socket.
+        """
+        sock.set_inheritable(True)
+        env = dict(os.environ)
+        env[_listen_fd_env] = str(sock.fileno())
+        main_file = os.path.abspath(sys.modules["__main__"].__file__)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execve(sys.executable, [sys.executable, main_file] + sys.argv[1:], env)
 
 
 class WebApp():
@@ -22,13 +436,19 @@ class WebApp():
 
     Attributes
     ----------
+    backend : str
+        The server backend. See :any:`WebAppServer`.
     host : str
         The host name used by the web server.
+    pid_file : str|None
+        Path to the file storing the process ID of the server.
     port : str
         The port number used by the web server.
+    workers : int|None
+        Amount of worker processes used by the **prefork** backend.
     """
 
-    def __init__(self, host, port):
+    def __init__(self, host, port, backend="wsgiref", workers=None, pid_file=None):
         """Initialization.
 
         Parameters
@@ -37,14 +457,102 @@ class WebApp():
             The host name used by the web server.
         port : str
             The port number used by the web server.
+        backend : str, optional
+            The server backend. See :any:`WebAppServer`.
+        workers : int, optional
+            Amount of worker processes used by the **prefork** backend.
+        pid_file : str, optional
+            Path to the file storing the process ID of the server.
         """
         self.host = host
         self.port = port
+        self.backend = backend
+        self.workers = workers
+        self.pid_file = pid_file
 
     def run(self):
         """Run web application.
         """
-        bottle_app.run(host=self.host, port=self.port)
+        bottle_app.run(server=WebAppServer(host=self.host, port=self.port,
+                                           backend=self.backend,
+                                           workers=self.workers,
+                                           pid_file=self.pid_file))
+
+
+def get_server_pid(server_args):
+    """Get the process ID of a running server.
+
+    Parameters
+    ----------
+    server_args : dict
+        Server arguments.
+
+    Returns
+    -------
+    int|None
+        The process ID stored in the PID file. None if there is no PID file or if the process
+        it refers to isn't the web application (a stale PID file).
+    """
+    try:
+        with open(server_args.get("pid_file"), "r", encoding="UTF-8") as pid_file:
+            pid = int(pid_file.read().strip())
+
+        os.kill(pid, 0)
+    except (OSError, TypeError, ValueError):
+        return None
+
+    # NOTE: Make sure that the process ID wasn't reused by another process.
+    try:
+        with open("/proc/%d/cmdline" % pid, "rb") as cmdline_file:
+            cmdline = cmdline_file.read().decode("UTF-8", "replace").split("\0")
+    except OSError:
+        # No procfs. Trust the PID file.
+        return pid
+
+    web_app_path = server_args.get("web_app_path")
+
+    if any(os.path.abspath(arg) == web_app_path for arg in cmdline if arg):
+        return pid
+
+    return None
+
+
+def get_child_pids(pid):
+    """Get the process IDs of the children of a process.
+
+    Parameters
+    ----------
+    pid : int
+        A process ID.
+
+    Returns
+    -------
+    list
+        The process IDs of the children of the process. An empty list if there is no procfs.
+    """
+    child_pids = []
+
+    try:
+        proc_entries = os.listdir("/proc")
+    except OSError:
+        return child_pids
+
+    for entry in proc_entries:
+        if not entry.isdigit():
+            continue
+
+        try:
+            with open("/proc/%s/stat" % entry, "rb") as stat_file:
+                # NOTE: The process name (2nd field) is enclosed in parentheses and it can contain
+                # spaces. The parent process ID is the 2nd field after it.
+                stat = stat_file.read()
+        except OSError:
+            continue
+
+        if int(stat[stat.rindex(b")") + 2:].split()[1]) == pid:
+            child_pids.append(int(entry))
+
+    return child_pids
 
 
 def start_server(server_args):
@@ -59,13 +567,20 @@ def start_server(server_args):
     os.execv(server_args.get("web_app_path"), [" "] + [
         server_args.get("host"),
         server_args.get("port"),
-        os.path.dirname(server_args.get("web_app_path"))
+        os.path.dirname(server_args.get("web_app_path")),
+        server_args.get("backend", "wsgiref"),
+        str(server_args.get("workers") or 0),
+        server_args.get("pid_file") or ""
     ])
 
 
-def stop_server(restart=False, server_args={}, logger=None):
+def stop_server(restart=False, server_args={}, logger=None, timeout=30):
     """Stop HTTP server.
 
+    The server is found through its PID file. It finishes the requests being handled before
+    exiting. A restart is performed by the running server itself (see :any:`WebAppServer`),
+    so it keeps the host, port and backend it was started with.
+
     Parameters
     ----------
     restart : bool, optional
@@ -74,35 +589,50 @@ def stop_server(restart=False, server_args={}, logger=None):
         Server arguments.
     logger : None, optional
         See :any:`LogSystem`.
-
-    Returns
-    -------
-    None
-        Stop execution.
+    timeout : int, optional
+        Seconds to wait for the server to exit before killing it. Its child processes (the
+        workers of the **prefork** backend) are killed too.
     """
-    try:
-        import psutil
-    except (ImportError, SystemError):
-        logger.warning(_missing_psutil_msg)
+    pid = get_server_pid(server_args)
+
+    if pid is None:
+        if restart:
+            start_server(server_args)
+        else:
+            logger.warning("The server isn't running.")
+
+        return
+
+    if restart:
+        os.kill(pid, signal.SIGHUP)
+        logger.info("The server is restarting.")
         return
 
-    # NOTE: Do not stop at the first occurrence of the application one is looking for;
-    # always iterate through all processes and terminate all occurrences.
-    # If the server is launched with different hosts/ports, one could end up
-    # serving the same location through different hosts/ports. This is just a conjecture;
-    # I didn't really test it, but it seems obvious at a glance.
-    for proc in psutil.process_iter():
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
         try:
-            # NOTE: Using proc.cmdline() to check the entire path because putil.name() NEVER
-            # F*CKING gives a complete process name!!! FFS!!! I implemented the use of a f*cking
-            # third-party module to simplify things, and I always end up eating the same sh*t!!!
-            if server_args.get("web_app_path") in proc.cmdline():
-                proc.terminate()
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            break
 
-    if restart:
-        start_server(server_args)
+        time.sleep(0.1)
+    else:
+        logger.warning("The server didn't stop in %d seconds. Killing it." % timeout)
+
+        # NOTE: The workers have to be found before killing the master. Once it's dead, they
+        # are adopted by another process.
+        for kill_pid in [pid] + get_child_pids(pid):
+            try:
+                os.kill(kill_pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    try:
+        os.remove(server_args.get("pid_file"))
+    except OSError:
+        pass
 
 
 def handle_server(action="", server_args={}, logger=None):
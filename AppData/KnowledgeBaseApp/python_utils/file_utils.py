@@ -1,17 +1,51 @@
 # -*- coding: utf-8 -*-
 """Common utilities to perform file operations.
+
+Attributes
+----------
+COPY_STRATEGIES : tuple
+    Strategies used by :any:`custom_copy2` to place a file at its destination, in the order in
+    which they are attempted. **reflink** creates a copy-on-write clone of the file (only
+    supported by some file systems, like Btrfs or XFS), **hardlink** creates a hard link,
+    **symlink** creates a symbolic link and **copy** copies the file bytes.
+FICLONE : int
+    The ``FICLONE`` ioctl request code (Linux).
+UNSUPPORTED_ERRNOS : set
+    Error numbers that mean that a copy strategy isn't supported by the system or between two
+    file systems.
+RENAME_EXCHANGE : int
+    The ``renameat2`` flag to atomically exchange two paths (Linux).
 """
+import errno
+import json
 import os
 
+from contextlib import contextmanager
 from glob import glob
 from shutil import copy2
 from shutil import copystat
 from shutil import ignore_patterns
 from shutil import rmtree
 from stat import ST_MTIME
+from stat import S_IMODE
+from stat import S_ISLNK
+from tempfile import NamedTemporaryFile
 
 from . import exceptions
 
+COPY_STRATEGIES = ("reflink", "hardlink", "symlink", "copy")
+
+FICLONE = 0x40049409
+
+RENAME_EXCHANGE = 2
+
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.EPERM, errno.ENOTTY
+}
+
+# NOTE: Strategies that failed once for a pair of devices aren't attempted again.
+_unsupported_strategies = set()
+
 
 def expand_path(path):
     """Expand environment variables used in ``path``. See :any:`os.path.expandvars` and
@@ -210,12 +244,239 @@ def newer(source, target):
     return mtime1 > mtime2
 
 
+def update_copy_report(report, key, amount=1):
+    """Update a copy report.
+
+    Parameters
+    ----------
+    report : dict|None
+        The copy report. Amount of files ``copied``, ``skipped`` (the destination was up to date)
+        and ``failed``, amount of files placed with each copy strategy (see
+        :any:`COPY_STRATEGIES`), amount of ``bytes_copied`` by the **copy** strategy and amount of
+        ``bytes_skipped``. Nothing is done if it's None.
+    key : str
+        The counter to update.
+    amount : int, optional
+        The amount to add to the counter.
+    """
+    if report is not None:
+        report[key] = report.get(key, 0) + amount
+
+
+def reflink(source, destination):
+    """Create a copy-on-write clone of a file.
+
+    Parameters
+    ----------
+    source : str
+        Source file path.
+    destination : str
+        Target file path. It must not exist.
+
+    Raises
+    ------
+    OSError
+        If the file system doesn't support cloning files or the files are in different file
+        systems.
+    """
+    import fcntl
+
+    with open(source, "rb") as src_file, open(destination, "xb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.remove(destination)
+            raise
+
+
+def exchange_paths(path1, path2):
+    """Atomically exchange two paths.
+
+    Parameters
+    ----------
+    path1 : str
+        A file or directory path.
+    path2 : str
+        A file or directory path.
+
+    Returns
+    -------
+    bool
+        Whether the paths were exchanged. False if the system or the file system doesn't support
+        exchanging paths.
+
+    Raises
+    ------
+    OSError
+        If the paths couldn't be exchanged for any other reason.
+    """
+    import ctypes
+    import errno
+
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (AttributeError, OSError):
+        return False
+
+    at_fdcwd = -100
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p,
+                          ctypes.c_uint]
+
+    if renameat2(at_fdcwd, os.fsencode(path1), at_fdcwd, os.fsencode(path2),
+                 RENAME_EXCHANGE) == 0:
+        return True
+
+    err = ctypes.get_errno()
+
+    if err in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+        return False
+
+    raise OSError(err, os.strerror(err), path1, None, path2)
+
+
+def _place_file(source, destination, strategy):
+    """Place a file at its destination.
+
+    The strategies (see :any:`COPY_STRATEGIES`) are attempted starting at ``strategy`` until one
+    of them succeeds. Links and clones are created next to the destination and then renamed
+    over it. A strategy that isn't supported (see :any:`UNSUPPORTED_ERRNOS`) isn't attempted
+    again for the same pair of devices. Any other error only affects the current file.
+
+    Parameters
+    ----------
+    source : str
+        Source file path.
+    destination : str
+        Target file path.
+    strategy : str
+        The first strategy to attempt.
+
+    Returns
+    -------
+    str
+        The strategy used.
+    """
+    # NOTE: Symbolic links are copied as they are.
+    if strategy != "copy" and not os.path.islink(source):
+        devices = (os.stat(source).st_dev, os.stat(os.path.dirname(destination)).st_dev)
+
+        for strategy in COPY_STRATEGIES[COPY_STRATEGIES.index(strategy):-1]:
+            if (strategy, devices) in _unsupported_strategies:
+                continue
+
+            temp_destination = "%s.%s-%d.tmp" % (destination, strategy, os.getpid())
+
+            try:
+                if strategy == "reflink":
+                    reflink(source, temp_destination)
+                    copystat(source, temp_destination)
+                elif strategy == "hardlink":
+                    os.link(source, temp_destination)
+                elif strategy == "symlink":
+                    os.symlink(os.path.abspath(source), temp_destination)
+
+                os.replace(temp_destination, destination)
+
+                return strategy
+            except (OSError, ImportError) as err:
+                if not isinstance(err, OSError) or err.errno in UNSUPPORTED_ERRNOS:
+                    _unsupported_strategies.add((strategy, devices))
+
+                if os.path.lexists(temp_destination):
+                    os.remove(temp_destination)
+
+    # NOTE: Remove links left by other strategies. Otherwise, the linked file is overwritten.
+    if os.path.islink(destination) or (os.path.exists(destination) and
+                                       os.stat(destination).st_nlink > 1):
+        os.remove(destination)
+
+    copy2(source, destination, follow_symlinks=False)
+
+    return "copy"
+
+
+def is_same_content(source, destination, hash_index):
+    """Check if a file destination has the same content as its source.
+
+    The sizes of the files are compared first, then their modification times (in nanoseconds)
+    and finally their hashes.
+
+    Parameters
+    ----------
+    source : str
+        Source file path.
+    destination : str
+        Target file path.
+    hash_index : hash_utils.FileHashIndex
+        The index used to get the hashes of the files without reading them again if they didn't
+        change since they were last hashed.
+
+    Returns
+    -------
+    bool
+        If the destination exists and has the same content as the source.
+
+    Raises
+    ------
+    Exception
+        Raise if "source" does not exist.
+    """
+    if not os.path.exists(source):
+        raise Exception("File <%s> does not exist!!!" % os.path.abspath(source))
+
+    try:
+        dst_stat = os.lstat(destination)
+    except FileNotFoundError:
+        return False
+
+    src_stat = os.lstat(source)
+
+    # NOTE: Symbolic links (copied as they are) are compared by their modification time.
+    if S_ISLNK(src_stat.st_mode) or S_ISLNK(dst_stat.st_mode):
+        return not newer(source, destination)
+
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+
+    return hash_index.get_hash(source, src_stat) == hash_index.get_hash(destination, dst_stat)
+
+
+def is_placed(source, destination):
+    """Check if a file destination is a link to its source.
+
+    Parameters
+    ----------
+    source : str
+        Source file path.
+    destination : str
+        Target file path.
+
+    Returns
+    -------
+    bool
+        If the destination is a hard link or a symbolic link pointing to the source.
+    """
+    try:
+        if os.path.islink(destination):
+            return not os.path.islink(source) and \
+                os.readlink(destination) == os.path.abspath(source)
+
+        return os.path.samefile(source, destination)
+    except OSError:
+        return False
+
+
 def custom_copy2(source, destination, logger=None, log_copied_file=False, relative_path="",
-                 overwrite=False):
+                 overwrite=False, report=None, strategy="copy", hash_index=None):
     """Custom copy function.
 
     This function is basically :any:`shutil.copy2`, but it uses the :any:`newer` function
-    before performing the copy.
+    (or the :any:`is_same_content` function if ``hash_index`` is specified) before performing
+    the copy.
 
     Parameters
     ----------
@@ -231,21 +492,55 @@ def custom_copy2(source, destination, logger=None, log_copied_file=False, relati
         A relative path to exctract from the path that's going to be logged.
     overwrite : bool, optional
         Overwrite existent files without doing any checks.
+    report : dict, optional
+        A copy report to update. See :any:`update_copy_report`.
+    strategy : str, optional
+        The first copy strategy to attempt. See :any:`COPY_STRATEGIES`.
+    hash_index : hash_utils.FileHashIndex, optional
+        If specified, the file is only copied if its content is different from the content of
+        the destination. Otherwise, it's copied if it's newer than the destination.
+
+    Warning
+    -------
+    Files placed with the **hardlink** or **symlink** strategies share their data with their
+    sources. Modifying them modifies their sources.
     """
     try:
-        if overwrite or newer(source, destination):
+        # NOTE: A link to the source is never "older" than its source. If it was placed with
+        # another strategy, it's replaced.
+        placed = is_placed(source, destination)
+
+        if placed and strategy != "copy" and not overwrite:
+            changed = False
+        elif overwrite or placed:
+            changed = True
+        elif hash_index is not None:
+            changed = not is_same_content(source, destination, hash_index)
+        else:
+            changed = newer(source, destination)
+
+        if changed:
             destination_parent = os.path.dirname(destination)
 
             if not is_real_dir(destination_parent):
-                os.makedirs(destination_parent)
+                os.makedirs(destination_parent, exist_ok=True)
 
-            copy2(source, destination, follow_symlinks=False)
+            used_strategy = _place_file(source, destination, strategy)
+            update_copy_report(report, "copied")
+            update_copy_report(report, used_strategy)
+
+            if used_strategy == "copy":
+                update_copy_report(report, "bytes_copied", os.lstat(destination).st_size)
 
             if log_copied_file:
                 path_to_log = os.path.relpath(destination, relative_path) \
                     if relative_path else destination
                 logger.info("**File copied:** %s" % path_to_log, date=False)
+        else:
+            update_copy_report(report, "skipped")
+            update_copy_report(report, "bytes_skipped", os.lstat(source).st_size)
     except Exception as err:
+        update_copy_report(report, "failed")
         logger.error(err)
 
 
@@ -296,7 +591,8 @@ def copy_create_symlink(source, destination, source_is_symlink=False,
 
 
 def custom_copytree(src, dst, symlinks=True, ignored_patterns=None, ignore_dangling_symlinks=True,
-                    logger=None, log_copied_file=False, relative_path="", overwrite=False):
+                    logger=None, log_copied_file=False, relative_path="", overwrite=False,
+                    report=None, strategy="copy", hash_index=None):
     """Recursively copy a directory tree.
 
     This function is basically the same as :any:`shutil.copytree`, but with the following
@@ -328,6 +624,12 @@ def custom_copytree(src, dst, symlinks=True, ignored_patterns=None, ignore_dangl
         A relative path to exctract from the path that's going to be logged.
     overwrite : bool, optional
         Overwrite existent files without doing any checks.
+    report : dict, optional
+        A copy report to update. See :any:`update_copy_report`.
+    strategy : str, optional
+        See :any:`custom_copy2`.
+    hash_index : hash_utils.FileHashIndex, optional
+        See :any:`custom_copy2`.
 
     Returns
     -------
@@ -348,7 +650,7 @@ def custom_copytree(src, dst, symlinks=True, ignored_patterns=None, ignore_dangl
             ignored_names = set()
 
         if not os.path.exists(dst):
-            os.makedirs(dst)
+            os.makedirs(dst, exist_ok=True)
     except Exception as err:
         logger.error(err)
 
@@ -386,13 +688,19 @@ def custom_copytree(src, dst, symlinks=True, ignored_patterns=None, ignore_dangl
                                         ignored_patterns=ignored_patterns,
                                         logger=logger,
                                         log_copied_file=log_copied_file,
-                                        relative_path=relative_path)
+                                        relative_path=relative_path,
+                                        report=report,
+                                        strategy=strategy,
+                                        hash_index=hash_index)
                     else:
                         custom_copy2(srcname, dstname,
                                      logger=logger,
                                      log_copied_file=log_copied_file,
                                      relative_path=relative_path,
-                                     overwrite=overwrite)
+                                     overwrite=overwrite,
+                                     report=report,
+                                     strategy=strategy,
+                                     hash_index=hash_index)
             elif os.path.isdir(srcname):
                 custom_copytree(srcname, dstname,
                                 symlinks=symlinks,
@@ -400,14 +708,20 @@ def custom_copytree(src, dst, symlinks=True, ignored_patterns=None, ignore_dangl
                                 logger=logger,
                                 log_copied_file=log_copied_file,
                                 relative_path=relative_path,
-                                overwrite=overwrite)
+                                overwrite=overwrite,
+                                report=report,
+                                strategy=strategy,
+                                hash_index=hash_index)
             else:
                 # Will raise a SpecialFileError for unsupported file types
                 custom_copy2(srcname, dstname,
                              logger=logger,
                              log_copied_file=log_copied_file,
                              relative_path=relative_path,
-                             overwrite=overwrite)
+                             overwrite=overwrite,
+                             report=report,
+                             strategy=strategy,
+                             hash_index=hash_index)
         # Catch the Error from the recursive custom_copytree so that we can
         # continue with other files
         except exceptions.Error as err:
@@ -428,6 +742,123 @@ def custom_copytree(src, dst, symlinks=True, ignored_patterns=None, ignore_dangl
     return dst
 
 
+@contextmanager
+def atomic_write(file_path, mode="w", encoding="UTF-8"):
+    """Write a file atomically.
+
+    The data is written into a temporary file created in the same directory as ``file_path``
+    which is then renamed to ``file_path``. Readers of ``file_path`` will see either the old
+    content or the new content, never a partially written file. If an exception is raised
+    while writing, the temporary file is removed and ``file_path`` is left untouched.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the file to write.
+    mode : str, optional
+        File mode. Either "w" or "wb".
+    encoding : str, optional
+        File encoding. Ignored in binary mode.
+
+    Yields
+    ------
+    file object
+        The temporary file object to write to.
+    """
+    file_parent = os.path.dirname(os.path.abspath(file_path))
+    temp_file = NamedTemporaryFile(mode=mode,
+                                   encoding=None if "b" in mode else encoding,
+                                   dir=file_parent,
+                                   prefix=".%s." % os.path.basename(file_path),
+                                   suffix=".tmp",
+                                   delete=False)
+
+    try:
+        with temp_file:
+            yield temp_file
+
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        # NOTE: Temporary files are created readable only by their owner. Keep the permissions
+        # of the file being replaced or use the usual permissions for new files.
+        try:
+            file_mode = S_IMODE(os.stat(file_path).st_mode)
+        except OSError:
+            file_mode = 0o644
+
+        os.chmod(temp_file.name, file_mode)
+        os.replace(temp_file.name, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_file.name)
+        except OSError:
+            pass
+
+        raise
+
+
+def dump_json_array(items, file_obj, chunk_size=1000, **kwargs):
+    """Serialize an iterable as a JSON array into a file object.
+
+    Unlike ``json.dump(list(items), file_obj)``, the items are encoded and written as they are
+    produced, so neither the list of items nor the whole JSON document are kept in memory.
+    The output is identical to the one produced by :any:`json.dumps` for a list.
+
+    Parameters
+    ----------
+    items : iterable
+        The items to serialize. Each item must be serializable by :any:`json.dumps`.
+    file_obj : file object
+        A text file object opened for writing.
+    chunk_size : int, optional
+        Amount of encoded items joined before writing them into ``file_obj``.
+    **kwargs
+        Keyword arguments passed to :any:`json.JSONEncoder`. The ``indent`` argument isn't
+        supported, the items are written in a single line.
+
+    Returns
+    -------
+    int
+        The amount of items written.
+
+    Raises
+    ------
+    ValueError
+        If ``indent`` is given.
+    """
+    if kwargs.get("indent") is not None:
+        raise ValueError("dump_json_array doesn't support indentation.")
+
+    encode = json.JSONEncoder(**kwargs).encode
+    item_separator = kwargs.get("separators", (", ", ": "))[0]
+    count = 0
+    chunk = []
+
+    def write_chunk():
+        if count > len(chunk):
+            file_obj.write(item_separator)
+
+        file_obj.write(item_separator.join(chunk))
+
+    file_obj.write("[")
+
+    for item in items:
+        chunk.append(encode(item))
+        count += 1
+
+        if len(chunk) >= chunk_size:
+            write_chunk()
+            chunk = []
+
+    if chunk:
+        write_chunk()
+
+    file_obj.write("]")
+
+    return count
+
+
 def get_folder_size(dir_path):
     """Get folder size
 
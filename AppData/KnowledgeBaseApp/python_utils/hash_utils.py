@@ -5,11 +5,18 @@ Attributes
 ----------
 HASH_FUNCS : dict
     Hash functions.
+HASH_INDEX_VERSION : int
+    :any:`FileHashIndex` format version. Indexes stored with a different version are discarded.
 """
 
 import hashlib
+import json
 import os
 
+from threading import Lock
+
+from .file_utils import atomic_write
+
 HASH_FUNCS = {
     "md5": hashlib.md5,
     "sha1": hashlib.sha1,
@@ -19,8 +26,11 @@ HASH_FUNCS = {
 
 __blocksize = 128 * 1024
 
+HASH_INDEX_VERSION = 1
+
 
-def dir_hash(dirname, hashfunc="sha256", followlinks=False):
+def dir_hash(dirname, hashfunc="sha256", followlinks=False, ignored_dirs=[],
+             include_names=False, hash_index=None):
     """Get directory hash.
 
     Parameters
@@ -31,6 +41,14 @@ def dir_hash(dirname, hashfunc="sha256", followlinks=False):
         Hash function to use.
     followlinks : bool, optional
         See :any:`os.walk`.
+    ignored_dirs : list, optional
+        Names of directories whose files aren't hashed (e.g., ``.git``).
+    include_names : bool, optional
+        Include the file paths (relative to ``dirname``) in the hash, so renaming a file
+        changes the hash.
+    hash_index : FileHashIndex, optional
+        Index used to get the file hashes (see :any:`FileHashIndex`). ``hashfunc`` must be the
+        hash function of the index.
 
     Returns
     -------
@@ -50,9 +68,20 @@ def dir_hash(dirname, hashfunc="sha256", followlinks=False):
     hashvalues = []
 
     for root, dirs, files in os.walk(dirname, topdown=True, followlinks=followlinks):
-        hashvalues.extend(
-            [file_hash(os.path.join(root, f), hasher=hash_func) for f in sorted(files)]
-        )
+        dirs[:] = [d for d in dirs if d not in ignored_dirs]
+
+        for f in sorted(files):
+            filepath = os.path.join(root, f)
+
+            if hash_index is not None:
+                hashvalue = hash_index.get_hash(filepath)
+            else:
+                hashvalue = file_hash(filepath, hasher=hash_func)
+
+            if include_names:
+                hashvalue = os.path.relpath(filepath, dirname) + ":" + hashvalue
+
+            hashvalues.append(hashvalue)
 
     return _reduce_hash(hashvalues, hash_func)
 
@@ -91,6 +120,147 @@ def file_hash(filepath, hashfunc="sha256", hasher=None):
     return h.hexdigest()
 
 
+class FileHashIndex():
+    """Persistent index of file hashes.
+
+    The hash of a file is stored together with its device, inode, modification time (in
+    nanoseconds) and size. As long as these don't change, the file isn't read again to get its
+    hash.
+
+    An instance can be shared between threads.
+
+    Attributes
+    ----------
+    stats : dict
+        Amount of hashes that were ``reused`` from the index and amount of files (and bytes)
+        that were ``hashed``.
+    """
+
+    def __init__(self, index_path=None, hashfunc="sha256"):
+        """Initialize.
+
+        Parameters
+        ----------
+        index_path : str, optional
+            Path to the index file. If not specified, the index isn't persistent.
+        hashfunc : str, optional
+            The name of a hash function.
+        """
+        self.stats = {
+            "reused": 0,
+            "hashed": 0,
+            "bytes_hashed": 0
+        }
+        self._index_path = index_path
+        self._hashfunc = hashfunc
+        self._old_files = {}
+        self._files = {}
+        self._lock = Lock()
+
+        if index_path:
+            self._load()
+
+    def _load(self):
+        """Load the stored index.
+        """
+        try:
+            with open(self._index_path, "r", encoding="UTF-8") as index_file:
+                index = json.loads(index_file.read())
+
+            if index.get("version") == HASH_INDEX_VERSION and \
+                    index.get("hashfunc") == self._hashfunc:
+                self._old_files = index.get("files", {})
+        except Exception:
+            self._old_files = {}
+
+    def save(self):
+        """Save the index.
+
+        Entries of files that weren't hashed during the current run are kept as long as their
+        files still exist and didn't change.
+        """
+        if not self._index_path:
+            return
+
+        with self._lock:
+            files = dict(self._files)
+
+        for key, entry in self._old_files.items():
+            if key in files:
+                continue
+
+            try:
+                stat = os.stat(entry[3])
+            except OSError:
+                continue
+
+            if key == self._get_key(stat) and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+                files[key] = entry
+
+        index_parent = os.path.dirname(self._index_path)
+
+        if not os.path.exists(index_parent):
+            os.makedirs(index_parent)
+
+        with atomic_write(self._index_path) as index_file:
+            json.dump({
+                "version": HASH_INDEX_VERSION,
+                "hashfunc": self._hashfunc,
+                "files": files
+            }, index_file)
+
+    def _get_key(self, stat):
+        """Get the key of a file.
+
+        Parameters
+        ----------
+        stat : os.stat_result
+            The file status.
+
+        Returns
+        -------
+        str
+            The device and inode of the file.
+        """
+        return "%d:%d" % (stat.st_dev, stat.st_ino)
+
+    def get_hash(self, filepath, stat=None):
+        """Get the hash of a file.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to a file.
+        stat : os.stat_result, optional
+            The status of the file, if already known.
+
+        Returns
+        -------
+        str
+            The file hash.
+        """
+        stat = stat or os.stat(filepath)
+        key = self._get_key(stat)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        entry = self._files.get(key) or self._old_files.get(key)
+
+        if entry and entry[:2] == signature:
+            entry = entry[:3] + [os.path.abspath(filepath)]
+
+            with self._lock:
+                self.stats["reused"] += 1
+        else:
+            entry = signature + [file_hash(filepath, self._hashfunc), os.path.abspath(filepath)]
+
+            with self._lock:
+                self.stats["hashed"] += 1
+                self.stats["bytes_hashed"] += stat.st_size
+
+        self._files[key] = entry
+
+        return entry[2]
+
+
 def _reduce_hash(hashlist, hashfunc):
     """Reduce hash.
 
@@ -180,6 +180,66 @@ class LogSystem():
         return msg.replace(self._user_home, "~")
 
 
+class BufferedLogSystem():
+    """Log messages into a buffer to log them later as a single block.
+
+    Used by tasks performed in parallel so the messages of each task aren't interleaved with
+    the messages of other tasks. It has the same logging methods as :any:`LogSystem`.
+    """
+
+    def __init__(self):
+        """Initialization.
+        """
+        self._messages = []
+        self._extend()
+
+    def _extend(self):
+        """Extend class' functions.
+        """
+        for l in list(_log_levels) + ["log_dry_run"]:
+            setattr(self, l.lower(), self._make_log_function(l.lower()))
+
+    def _make_log_function(self, method_name):
+        """Make log function.
+
+        Parameters
+        ----------
+        method_name : str
+            The name of the :any:`LogSystem` method that will log the buffered message.
+
+        Returns
+        -------
+        method
+            A function that will be dynamically attached to ``self``.
+        """
+        def f(*args, **kwargs):
+            """Buffer message.
+
+            Parameters
+            ----------
+            *args
+                Arguments.
+            **kwargs
+                Keyword arguments.
+            """
+            self._messages.append((method_name, args, kwargs))
+
+        return f
+
+    def flush(self, logger):
+        """Log all buffered messages and empty the buffer.
+
+        Parameters
+        ----------
+        logger : LogSystem
+            The logger.
+        """
+        messages, self._messages = self._messages, []
+
+        for method_name, args, kwargs in messages:
+            getattr(logger, method_name)(*args, **kwargs)
+
+
 def generate_log_path(storage_dir="tmp/logs", prefix="", subfix="", delimiter="_"):
     """Generate log file name.
 
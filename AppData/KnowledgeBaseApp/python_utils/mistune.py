@@ -13,6 +13,12 @@ The fastest markdown parser in pure Python with renderer feature.
     **Modifications**:
 
     - Removed the use of ``startswith`` and ``endswith`` in some string checks.
+    - Added the ``offset_parsing`` option. When enabled, the block and inline lexers scan the
+      text with offsets (``pattern.match(text, pos)``) instead of slicing off every matched
+      token, which makes parsing large documents linear instead of quadratic. The output is the
+      same in both modes.
+    - The rendered parts of a document are joined once instead of being concatenated one by one,
+      which was also quadratic for large documents.
 """
 
 import inspect
@@ -54,6 +60,107 @@ def _pure_pattern(regex):
     return pattern
 
 
+_offset_patterns = {}
+
+
+def _offset_pattern(regex):
+    """Get the version of a rule that can be matched at an offset.
+
+    ``^`` only matches at the real beginning of a string (or of a line with ``re.M``), not at
+    the position passed to ``match``. So the ``^`` anchors at the start of the top level
+    alternatives are removed (``match`` is already anchored) and a ``\\b`` right after them is
+    replaced by ``(?=\\w)``, which is what it means at the beginning of a sliced text.
+    """
+    try:
+        return _offset_patterns[regex]
+    except KeyError:
+        pass
+
+    pattern = regex.pattern
+    parts = []
+    depth = 0
+    in_class = False
+    at_start = True
+    i = 0
+
+    while i < len(pattern):
+        char = pattern[i]
+        token = pattern[i:i + 2] if char == '\\' else char
+        i += len(token)
+
+        if at_start and token == '^':
+            continue
+
+        if at_start and token == '\\b':
+            token = '(?=\\w)'
+
+        at_start = False
+
+        if in_class:
+            in_class = token != ']'
+        elif token == '[':
+            in_class = True
+            # NOTE: A ] right after [ or [^ is part of the class.
+            if pattern[i:i + 1] == '^':
+                token += '^'
+                i += 1
+            if pattern[i:i + 1] == ']':
+                token += ']'
+                i += 1
+        elif token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == '|' and depth == 0:
+            at_start = True
+
+        parts.append(token)
+
+    _offset_patterns[regex] = re.compile(''.join(parts), regex.flags)
+
+    return _offset_patterns[regex]
+
+
+def _join(placeholder, parts):
+    """Join rendered parts into the type of ``Renderer.placeholder``.
+
+    Concatenating strings in a loop copies the whole result on every step, so strings are joined
+    in one go. Other placeholder types are still concatenated.
+    """
+    if isinstance(placeholder, str):
+        return placeholder + ''.join(parts)
+
+    for part in parts:
+        placeholder += part
+
+    return placeholder
+
+
+def _get_offset_rules(lexer, rules, prefix):
+    """Get the offset versions of the rules of a lexer and the methods that handle them.
+
+    The result is cached by the lexer for each list of rules. The cache is checked against the
+    current rules of the lexer's grammar, so rules can still be replaced at any time.
+    """
+    patterns = tuple(getattr(lexer.rules, key) for key in rules)
+
+    try:
+        cached_patterns, offset_rules = lexer._offset_rules[tuple(rules)]
+    except KeyError:
+        pass
+    else:
+        if cached_patterns == patterns:
+            return offset_rules
+
+    offset_rules = [
+        (_offset_pattern(pattern), getattr(lexer, prefix + key))
+        for key, pattern in zip(rules, patterns)
+    ]
+    lexer._offset_rules[tuple(rules)] = (patterns, offset_rules)
+
+    return offset_rules
+
+
 def _keyify(key):
     key = escape(key.lower(), quote=True)
     return _key_pattern.sub(' ', key)
@@ -210,6 +317,8 @@ class BlockLexer(object):
         self._max_recursive_depth = kwargs.get('max_recursive_depth', 6)
         self._list_depth = 0
         self._blockquote_depth = 0
+        self._offset_parsing = kwargs.get('offset_parsing')
+        self._offset_rules = {}
         self.default_rules = self.default_rules[:]
 
     def __call__(self, text, rules=None):
@@ -220,6 +329,9 @@ class BlockLexer(object):
 
         rules = rules or self.default_rules
 
+        if self._offset_parsing:
+            return self._parse_with_offsets(text, rules)
+
         def manipulate(text):
             for key in rules:
                 rule = getattr(self.rules, key)
@@ -239,6 +351,23 @@ class BlockLexer(object):
                 raise RuntimeError('Infinite loop at: %s' % text)
         return self.tokens
 
+    def _parse_with_offsets(self, text, rules):
+        rules = _get_offset_rules(self, rules, 'parse_')
+        pos = 0
+        length = len(text)
+
+        while pos < length:
+            for rule, parse in rules:
+                m = rule.match(text, pos)
+                if m:
+                    break
+            else:  # pragma: no cover
+                raise RuntimeError('Infinite loop at: %s' % text[pos:])
+
+            parse(m)
+            pos = m.end()
+        return self.tokens
+
     def parse_newline(self, m):
         length = len(m.group(0))
         if length > 1:
@@ -550,6 +679,8 @@ class InlineLexer(object):
         self._in_link = False
         self._in_footnote = False
         self._parse_inline_html = kwargs.get('parse_inline_html')
+        self._offset_parsing = kwargs.get('offset_parsing')
+        self._offset_rules = {}
         self.default_rules = self.default_rules[:]
         self.inline_html_rules = self.inline_html_rules[:]
 
@@ -568,6 +699,9 @@ class InlineLexer(object):
         if self._in_footnote and 'footnote' in rules:
             rules.remove('footnote')
 
+        if self._offset_parsing:
+            return self._output_with_offsets(text, rules)
+
         output = self.renderer.placeholder()
 
         def manipulate(text):
@@ -594,6 +728,29 @@ class InlineLexer(object):
 
         return output
 
+    def _output_with_offsets(self, text, rules):
+        rules = _get_offset_rules(self, rules, 'output_')
+        parts = []
+        pos = 0
+        length = len(text)
+
+        while pos < length:
+            for pattern, output_rule in rules:
+                m = pattern.match(text, pos)
+                if not m:
+                    continue
+                self.line_match = m
+                out = output_rule(m)
+                if out is not None:
+                    break
+            else:  # pragma: no cover
+                raise RuntimeError('Infinite loop at: %s' % text[pos:])
+
+            parts.append(out)
+            pos = m.end()
+
+        return _join(self.renderer.placeholder(), parts)
+
     def output_escape(self, m):
         text = m.group(1)
         return self.renderer.escape(text)
@@ -970,7 +1127,9 @@ class Markdown(object):
 
         self.inline = inline or InlineLexer(renderer, **kwargs)
 
-        self.block = block or BlockLexer(BlockGrammar())
+        self.block = block or BlockLexer(
+            BlockGrammar(), offset_parsing=kwargs.get('offset_parsing')
+        )
         self.footnotes = []
         self.tokens = []
 
@@ -1033,10 +1192,10 @@ class Markdown(object):
 
         self.inline.setup(self.block.def_links, self.block.def_footnotes)
 
-        out = self.renderer.placeholder()
+        parts = []
         while self.pop():
-            out += self.tok()
-        return out
+            parts.append(self.tok())
+        return _join(self.renderer.placeholder(), parts)
 
     def tok(self):
         t = self.token['type']
@@ -1048,10 +1207,10 @@ class Markdown(object):
         return getattr(self, 'output_%s' % t)()
 
     def tok_text(self):
-        text = self.token['text']
+        lines = [self.token['text']]
         while self.peek()['type'] == 'text':
-            text += '\n' + self.pop()['text']
-        return self.inline(text)
+            lines.append(self.pop()['text'])
+        return self.inline('\n'.join(lines))
 
     def output_newline(self):
         return self.renderer.newline()
@@ -1086,53 +1245,53 @@ class Markdown(object):
         header += self.renderer.table_row(cell)
 
         # body part
-        body = self.renderer.placeholder()
+        rows = []
         for i, row in enumerate(self.token['cells']):
             cell = self.renderer.placeholder()
             for j, value in enumerate(row):
                 align = aligns[j] if j < aligns_length else None
                 flags = {'header': False, 'align': align}
                 cell += self.renderer.table_cell(self.inline(value), **flags)
-            body += self.renderer.table_row(cell)
+            rows.append(self.renderer.table_row(cell))
 
-        return self.renderer.table(header, body)
+        return self.renderer.table(header, _join(self.renderer.placeholder(), rows))
 
     def output_block_quote(self):
-        body = self.renderer.placeholder()
+        parts = []
         while self.pop()['type'] != 'block_quote_end':
-            body += self.tok()
-        return self.renderer.block_quote(body)
+            parts.append(self.tok())
+        return self.renderer.block_quote(_join(self.renderer.placeholder(), parts))
 
     def output_list(self):
         ordered = self.token['ordered']
-        body = self.renderer.placeholder()
+        parts = []
         while self.pop()['type'] != 'list_end':
-            body += self.tok()
-        return self.renderer.list(body, ordered)
+            parts.append(self.tok())
+        return self.renderer.list(_join(self.renderer.placeholder(), parts), ordered)
 
     def output_list_item(self):
-        body = self.renderer.placeholder()
+        parts = []
         while self.pop()['type'] != 'list_item_end':
             if self.token['type'] == 'text':
-                body += self.tok_text()
+                parts.append(self.tok_text())
             else:
-                body += self.tok()
+                parts.append(self.tok())
 
-        return self.renderer.list_item(body)
+        return self.renderer.list_item(_join(self.renderer.placeholder(), parts))
 
     def output_loose_item(self):
-        body = self.renderer.placeholder()
+        parts = []
         while self.pop()['type'] != 'list_item_end':
-            body += self.tok()
-        return self.renderer.list_item(body)
+            parts.append(self.tok())
+        return self.renderer.list_item(_join(self.renderer.placeholder(), parts))
 
     def output_footnote(self):
         self.inline._in_footnote = True
-        body = self.renderer.placeholder()
+        parts = []
         key = self.token['key']
         while self.pop()['type'] != 'footnote_end':
-            body += self.tok()
-        self.footnotes.append({'key': key, 'text': body})
+            parts.append(self.tok())
+        self.footnotes.append({'key': key, 'text': _join(self.renderer.placeholder(), parts)})
         self.inline._in_footnote = False
         return self.renderer.placeholder()
 
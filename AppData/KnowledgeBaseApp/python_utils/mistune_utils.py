@@ -8,13 +8,28 @@
     - Added support for ``kbd`` tag. ``[[Ctrl]]`` will render as ``<kbd>Ctrl</kbd>``.
     - Added **table** and **table-bordered** classes to the ``<table>`` HTML tag.
     - Added **blockquote** class to the ``<blockquote>`` HTML tag.
+
+Markdown parsers keep state while parsing a document, so each thread uses its own parsers. They
+are created the first time a thread renders a document and reused afterwards.
+
+Documents are parsed with the ``offset_parsing`` mode of the vendored mistune module by default,
+so the time it takes to render a document grows linearly with its size.
+
+Attributes
+----------
+KBD_TAG_RULE : re.Pattern
+    The ``kbd`` tag rule (``[[Keyboard key]]``).
 """
 import re
 
+from threading import local
+
 from .mistune import InlineLexer
 from .mistune import Markdown
 from .mistune import Renderer
 
+KBD_TAG_RULE = re.compile(r'^\[\[(?=\S)([\s\S]*?\S)\]\]')
+
 
 class MistuneCustomRenderer(Renderer):
     """Mistune custom renderer.
@@ -83,7 +98,7 @@ class MistuneCustomInlineLexer(InlineLexer):
     def enable_kbd_tag(self):
         """Enable <kbd> HTML tag rules.
         """
-        self.rules.kbd_tag = re.compile(r'^\[\[(?=\S)([\s\S]*?\S)\]\]')  # [[Keyboard key]]
+        self.rules.kbd_tag = KBD_TAG_RULE
 
         self.default_rules.insert(3, "kbd_tag")
 
@@ -104,14 +119,68 @@ class MistuneCustomInlineLexer(InlineLexer):
         return self.renderer.kbd_tag(text)
 
 
+# NOTE: The renderer doesn't keep any state, it's shared by all parsers.
 _mistune_renderer = MistuneCustomRenderer()
-_mistune_inline_lexer = MistuneCustomInlineLexer(_mistune_renderer)
+_thread_data = local()
+
+
+def _get_parser(escape, offset_parsing, kwargs):
+    """Get a Markdown parser of the current thread.
+
+    Parameters
+    ----------
+    escape : bool
+        See :any:`md`.
+    offset_parsing : bool
+        See :any:`md`.
+    kwargs : dict
+        See :any:`md`.
+
+    Returns
+    -------
+    tuple
+        The key of the parser (see :any:`_discard_parser`) and the parser.
+    """
+    try:
+        parsers = _thread_data.parsers
+    except AttributeError:
+        parsers = _thread_data.parsers = {}
+
+    key = (escape, offset_parsing, tuple(sorted(kwargs.items())))
+
+    try:
+        return key, parsers[key]
+    except KeyError:
+        pass
+
+    inline_lexer = MistuneCustomInlineLexer(_mistune_renderer, offset_parsing=offset_parsing)
+
+    # Enable new feature/s.
+    inline_lexer.enable_kbd_tag()
+
+    parsers[key] = Markdown(renderer=_mistune_renderer,
+                            inline=inline_lexer,
+                            escape=escape,
+                            offset_parsing=offset_parsing,
+                            **kwargs)
+
+    return key, parsers[key]
 
-# Enable new feature/s.
-_mistune_inline_lexer.enable_kbd_tag()
 
+def _discard_parser(key):
+    """Discard a Markdown parser of the current thread.
 
-def md(text, escape=True, **kwargs):
+    Used when a parser fails, since it might be left in an inconsistent state.
+
+    Parameters
+    ----------
+    key : tuple
+        The key of the parser.
+    """
+    _thread_data.parsers.pop(key, None)
+
+
+def md(text, escape=True, offset_parsing=True, **kwargs):
     """Render markdown formatted text to html.
 
     Parameters
@@ -120,6 +189,9 @@ def md(text, escape=True, **kwargs):
         Markdown string to parse into HTML.
     escape : bool, optional
         If set to False, all HTML tags will not be escaped.
+    offset_parsing : bool, optional
+        If set to False, use the original parsing mode of mistune, which slices off every parsed
+        token from the text. It's slow (quadratic) for large documents.
     **kwargs
         Extra keyword arguments.
 
@@ -128,9 +200,41 @@ def md(text, escape=True, **kwargs):
     str
         HTML string.
     """
-    return Markdown(renderer=_mistune_renderer,
-                    inline=_mistune_inline_lexer,
-                    escape=escape, **kwargs)(text)
+    key, parser = _get_parser(escape, offset_parsing, kwargs)
+
+    try:
+        return parser(text)
+    except BaseException:
+        _discard_parser(key)
+        raise
+
+
+def md_many(texts, escape=True, offset_parsing=True, **kwargs):
+    """Render several markdown formatted texts to html.
+
+    Parameters
+    ----------
+    texts : iterable
+        Markdown strings to parse into HTML.
+    escape : bool, optional
+        See :any:`md`.
+    offset_parsing : bool, optional
+        See :any:`md`.
+    **kwargs
+        See :any:`md`.
+
+    Returns
+    -------
+    list
+        The HTML strings, in the same order as ``texts``.
+    """
+    key, parser = _get_parser(escape, offset_parsing, kwargs)
+
+    try:
+        return [parser(text) for text in texts]
+    except BaseException:
+        _discard_parser(key)
+        raise
 
 
 if __name__ == "__main__":
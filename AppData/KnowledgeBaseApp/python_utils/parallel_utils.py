@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Utilities to perform tasks in parallel.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+def iter_per_key(func, items, get_key, max_workers=8, max_per_key=4):
+    """Call a function for each item in a thread pool limiting how many items that share the
+    same key are handled at the same time.
+
+    Used, for example, to throttle network operations per host. Items are started in the
+    order they are passed, skipping (but not reordering) items whose key reached its limit.
+
+    Parameters
+    ----------
+    func : method
+        Function called with each item as its only argument.
+    items : iterable
+        The items to handle.
+    get_key : method
+        Function that receives an item and returns its key.
+    max_workers : int, optional
+        Maximum amount of items handled at the same time.
+    max_per_key : int, optional
+        Maximum amount of items with the same key handled at the same time.
+
+    Yields
+    ------
+    tuple
+        An item and the :any:`concurrent.futures.Future` holding the result of calling ``func``
+        with it. Items are yielded in the order they are finished.
+    """
+    queues = {}
+    order = 0
+
+    for item in items:
+        queues.setdefault(get_key(item), deque()).append((order, item))
+        order += 1
+
+    running = {}
+    running_per_key = dict.fromkeys(queues, 0)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while queues or running:
+                while len(running) < max_workers:
+                    # Next item in order among the keys that didn't reach their limit.
+                    available = [key for key in queues if running_per_key[key] < max_per_key]
+
+                    if not available:
+                        break
+
+                    key = min(available, key=lambda k: queues[k][0][0])
+                    item = queues[key].popleft()[1]
+
+                    if not queues[key]:
+                        del queues[key]
+
+                    running[executor.submit(func, item)] = (item, key)
+                    running_per_key[key] += 1
+
+                done = wait(running, return_when=FIRST_COMPLETED)[0]
+
+                for future in done:
+                    item, key = running.pop(future)
+                    running_per_key[key] -= 1
+
+                    yield item, future
+        finally:
+            # Do not start items that weren't started yet (e.g. on KeyboardInterrupt).
+            queues.clear()
+
+            for future in running:
+                future.cancel()
+
+
+if __name__ == "__main__":
+    pass
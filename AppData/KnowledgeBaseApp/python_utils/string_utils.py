@@ -9,6 +9,7 @@ import unicodedata
 from collections import UserDict
 from collections.abc import Mapping
 from collections.abc import Sequence
+from functools import lru_cache
 
 from . import file_utils
 
@@ -150,10 +151,94 @@ def do_string_substitutions(dir_path, replacement_data,
                     os.rename(dir_path, os.path.join(os.path.dirname(dir_path), dname_renamed))
 
 
+@lru_cache(maxsize=256)
+def _compile_patterns(patterns):
+    """Compile shell-style patterns into a single regular expression.
+
+    Parameters
+    ----------
+    patterns : tuple
+        Shell-style patterns (see :any:`fnmatch.fnmatch`).
+
+    Returns
+    -------
+    re.Pattern|None
+        A regular expression matching the names that match one or more of the patterns. None
+        if there are no patterns.
+    """
+    if not patterns:
+        return None
+
+    return re.compile("|".join("(?:%s)" % fnmatch.translate(os.path.normcase(pattern))
+                               for pattern in patterns))
+
+
+class SuperFilter():
+    """Compiled version of :any:`super_filter`.
+
+    The inclusion and exclusion patterns are compiled once into one regular expression each,
+    so a filter can be reused to filter many lists of names (e.g., the files of each directory
+    of a tree).
+    """
+
+    def __init__(self, inclusion_patterns=[], exclusion_patterns=[]):
+        """Initialization.
+
+        Parameters
+        ----------
+        inclusion_patterns : list, optional
+            A list of patterns to keep in names.
+        exclusion_patterns : list, optional
+            A list of patterns to exclude from names.
+        """
+        self._inclusion_regex = _compile_patterns(tuple(inclusion_patterns))
+        self._exclusion_regex = _compile_patterns(tuple(exclusion_patterns))
+
+    def match(self, name):
+        """Check if a name passes the filter.
+
+        Parameters
+        ----------
+        name : str
+            A name.
+
+        Returns
+        -------
+        bool
+            If the name matches one or more inclusion patterns (or there are no inclusion
+            patterns) and doesn't match any exclusion pattern.
+        """
+        name = os.path.normcase(name)
+
+        if self._inclusion_regex is not None and self._inclusion_regex.match(name) is None:
+            return False
+
+        return self._exclusion_regex is None or self._exclusion_regex.match(name) is None
+
+    def filter(self, names):
+        """Filter names.
+
+        Parameters
+        ----------
+        names : list
+            A list of strings to filter.
+
+        Returns
+        -------
+        list
+            The names that pass the filter, in the same order as in ``names``.
+        """
+        if self._inclusion_regex is None and self._exclusion_regex is None:
+            return list(names)
+
+        return [name for name in names if self.match(name)]
+
+
 def super_filter(names, inclusion_patterns=[], exclusion_patterns=[]):
     """Super filter.
 
     Enhanced version of fnmatch.filter() that accepts multiple inclusion and exclusion patterns.
+    To filter several lists of names with the same patterns, use :any:`SuperFilter`.
 
     - If only ``inclusion_patterns`` is specified, only the names which match one or more \
     patterns are returned.
@@ -174,16 +259,14 @@ def super_filter(names, inclusion_patterns=[], exclusion_patterns=[]):
     Returns
     -------
     list
-        A filtered list of strings.
+        A filtered list of strings, in the same order as in ``names``.
 
     Note
     ----
     Based on: `Filtering with multiple inclusion and exclusion patterns \
     <https://codereview.stackexchange.com/a/74849>`__
     """
-    included = multi_filter(names, inclusion_patterns) if inclusion_patterns else names
-    excluded = multi_filter(names, exclusion_patterns) if exclusion_patterns else []
-    return list(set(included) - set(excluded))
+    return SuperFilter(inclusion_patterns, exclusion_patterns).filter(names)
 
 
 def multi_filter(names, patterns):
@@ -203,8 +286,13 @@ def multi_filter(names, patterns):
     str
         A name in names parameter that matches any of the patterns in patterns parameter.
     """
+    regex = _compile_patterns(tuple(patterns))
+
+    if regex is None:
+        return
+
     for name in names:
-        if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+        if regex.match(os.path.normcase(name)):
             yield name
 
 
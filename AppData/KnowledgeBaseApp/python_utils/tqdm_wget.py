@@ -1,14 +1,56 @@
 # -*- coding: utf-8 -*-
 """Module to download files. It displays a progress bar of the download progress.
+
+Files are downloaded into a ``<filename>.part`` file which is renamed to ``<filename>`` once
+the download is complete. An interrupted download is resumed on the next attempt with a
+``Range`` request. Connections are kept alive and reused for several downloads from the same
+host (see :any:`ConnectionPool`).
+
+Attributes
+----------
+CHUNK_SIZE : int
+    Size of the chunks read from the responses.
+MAX_REDIRECTS : int
+    Maximum amount of redirections followed.
+USER_AGENT : str
+    The ``User-Agent`` header sent with the requests.
 """
 # NOTE: Web developers can go f*ck themselves!!!
 import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
-from urllib.request import urlretrieve
+import json
+import os
+import sys
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.client import HTTPException
+from http.client import HTTPSConnection
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
 
 from .tqdm import tqdm
 
+CHUNK_SIZE = 64 * 1024
+
+MAX_REDIRECTS = 10
+
+USER_AGENT = "Python-urllib/%d.%d" % sys.version_info[:2]
+
+
+class DownloadError(Exception):
+    """Download error.
+    """
+    pass
+
+
+class DownloadAborted(DownloadError):
+    """Download aborted.
+    """
+    pass
+
 
 class TqdmUpTo(tqdm):
     """Provides ``update_to(n)`` which uses ``tqdm.update(delta_n)``.
@@ -39,7 +81,170 @@ class TqdmUpTo(tqdm):
         self.update(b * bsize - self.n)  # will also set self.n = b * bsize
 
 
-def download(url, filename):
+class ConnectionPool():
+    """Pool of persistent HTTP connections.
+
+    Connections are stored per scheme, host and port. A connection is only returned to the pool
+    after its response was completely read.
+
+    An instance can be shared between threads.
+    """
+
+    def __init__(self, timeout=60):
+        """Initialize.
+
+        Parameters
+        ----------
+        timeout : int, optional
+            Timeout (in seconds) of the connections' blocking operations.
+        """
+        self._timeout = timeout
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def get(self, scheme, netloc, new=False):
+        """Get a connection.
+
+        Parameters
+        ----------
+        scheme : str
+            URL scheme (http or https).
+        netloc : str
+            URL network location (host and port).
+        new : bool, optional
+            Always create a new connection instead of reusing an idle one.
+
+        Returns
+        -------
+        http.client.HTTPConnection
+            An idle connection from the pool or a new one.
+
+        Raises
+        ------
+        DownloadError
+            If the URL scheme isn't supported.
+        """
+        if not new:
+            with self._lock:
+                idle = self._connections.get((scheme, netloc))
+
+                if idle:
+                    return idle.pop()
+
+        if scheme == "https":
+            return HTTPSConnection(netloc, timeout=self._timeout,
+                                   context=ssl._create_default_https_context())
+        elif scheme == "http":
+            return HTTPConnection(netloc, timeout=self._timeout)
+
+        raise DownloadError("Unsupported URL scheme: %s" % scheme)
+
+    def put(self, scheme, netloc, conn):
+        """Return a connection to the pool.
+
+        Parameters
+        ----------
+        scheme : str
+            URL scheme (http or https).
+        netloc : str
+            URL network location (host and port).
+        conn : http.client.HTTPConnection
+            The connection.
+        """
+        with self._lock:
+            self._connections.setdefault((scheme, netloc), []).append(conn)
+
+    def close(self):
+        """Close all idle connections.
+        """
+        with self._lock:
+            connections, self._connections = self._connections, {}
+
+        for idle in connections.values():
+            for conn in idle:
+                conn.close()
+
+
+def _request(pool, url, headers):
+    """Send a GET request following redirections.
+
+    Parameters
+    ----------
+    pool : ConnectionPool
+        The connection pool.
+    url : str
+        The URL.
+    headers : dict
+        Request headers.
+
+    Returns
+    -------
+    tuple
+        The URL that responded (after following redirections), the connection used and its
+        response. The response must be completely read before returning the connection to the
+        pool.
+
+    Raises
+    ------
+    DownloadError
+        If there are too many redirections.
+    """
+    for i in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+
+        if parts.query:
+            path += "?" + parts.query
+
+        # NOTE: A connection kept alive might have been closed by the server. Retry once with
+        # a new connection. Other idle connections of the pool might be as stale as the first
+        # one, so the retry doesn't take them.
+        for attempt in range(2):
+            conn = pool.get(parts.scheme, parts.netloc, new=bool(attempt))
+
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                break
+            except (HTTPException, ConnectionError):
+                conn.close()
+
+                if attempt:
+                    raise
+
+        if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+            response.read()
+            pool.put(parts.scheme, parts.netloc, conn)
+            url = urljoin(url, response.getheader("Location"))
+            continue
+
+        return url, conn, response
+
+    raise DownloadError("Too many redirections: %s" % url)
+
+
+def _read_part_info(part_info_path):
+    """Read the information stored about a partial download.
+
+    Parameters
+    ----------
+    part_info_path : str
+        Path to the file storing the information.
+
+    Returns
+    -------
+    dict
+        The ``url``, ``etag`` and ``last_modified`` of the partially downloaded file.
+    """
+    try:
+        with open(part_info_path, "r", encoding="UTF-8") as part_info_file:
+            return json.loads(part_info_file.read())
+    except Exception:
+        return {}
+
+
+def download(url, filename, etag=None, last_modified=None, pool=None, position=None,
+             desc=None, stop_event=None):
     """Download file.
 
     Parameters
@@ -48,10 +253,243 @@ def download(url, filename):
         The URL to the file to download.
     filename : str
         Downloaded file destination.
+    etag : str, optional
+        The ``ETag`` of the existent ``filename``. If specified (or if ``last_modified`` is
+        specified) and ``filename`` exists, a conditional request is sent. If the remote file
+        didn't change, it isn't downloaded.
+    last_modified : str, optional
+        The ``Last-Modified`` date of the existent ``filename``.
+    pool : ConnectionPool, optional
+        The pool of connections to use. If not specified, a pool used only for this download
+        is created.
+    position : int, optional
+        The line in which to display the progress bar. See :any:`tqdm.tqdm`.
+    desc : str, optional
+        The progress bar description.
+    stop_event : threading.Event, optional
+        If set, the download is aborted (the downloaded data is kept to resume it later).
+
+    Returns
+    -------
+    dict
+        The ``status`` of the download (**downloaded** or **not_modified**), the ``etag``,
+        ``last_modified`` and ``size`` of the file and the amount of bytes downloaded
+        (``downloaded``) and ``resumed`` from a previous attempt.
+
+    Raises
+    ------
+    DownloadAborted
+        If the download was aborted.
+    DownloadError
+        If the server responded with an error.
+    """
+    own_pool = pool is None
+    pool = pool or ConnectionPool()
+    part_path = filename + ".part"
+    part_info_path = part_path + ".json"
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": "identity"
+    }
+
+    part_info = _read_part_info(part_info_path)
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+    if offset and part_info.get("url") == url and \
+            (part_info.get("etag") or part_info.get("last_modified")):
+        headers["Range"] = "bytes=%d-" % offset
+        # NOTE: The rest of the file is only sent if the remote file didn't change since the
+        # download started. Otherwise, the whole file is sent.
+        headers["If-Range"] = part_info.get("etag") or part_info.get("last_modified")
+    else:
+        offset = 0
+
+        if os.path.exists(filename):
+            if etag:
+                headers["If-None-Match"] = etag
+
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+    try:
+        final_url, conn, response = _request(pool, url, headers)
+        parts = urlsplit(final_url)
+        result = {
+            "status": "downloaded",
+            "etag": response.getheader("ETag"),
+            "last_modified": response.getheader("Last-Modified"),
+            "size": None,
+            "downloaded": 0,
+            "resumed": 0
+        }
+
+        if response.status == 304:
+            response.read()
+            pool.put(parts.scheme, parts.netloc, conn)
+            result.update({
+                "status": "not_modified",
+                "etag": result["etag"] or etag,
+                "last_modified": result["last_modified"] or last_modified,
+                "size": os.path.getsize(filename)
+            })
+
+            return result
+
+        if response.status == 416 and offset:
+            # NOTE: The partial file is useless. Start over.
+            response.read()
+            pool.put(parts.scheme, parts.netloc, conn)
+            os.remove(part_path)
+
+            return download(url, filename, etag=etag, last_modified=last_modified, pool=pool,
+                            position=position, desc=desc, stop_event=stop_event)
+
+        if response.status not in (200, 206):
+            response.read()
+            conn.close()
+            raise DownloadError("HTTP Error %d: %s (%s)" % (response.status, response.reason, url))
+
+        if response.status == 200:
+            offset = 0
+
+        length = response.getheader("Content-Length")
+        total = offset + int(length) if length and length.isdigit() else None
+
+        with open(part_info_path, "w", encoding="UTF-8") as part_info_file:
+            part_info_file.write(json.dumps({
+                "url": url,
+                "etag": result["etag"] if response.status == 200 else part_info.get("etag"),
+                "last_modified": result["last_modified"] if response.status == 200
+                else part_info.get("last_modified")
+            }))
+
+        try:
+            with open(part_path, "ab" if offset else "wb") as part_file, \
+                    TqdmUpTo(unit="B", unit_scale=True, unit_divisor=1024, miniters=1,
+                             total=total, initial=offset, position=position, desc=desc,
+                             leave=position is None) as t:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    if stop_event is not None and stop_event.is_set():
+                        raise DownloadAborted("Download aborted: %s" % url)
+
+                    part_file.write(chunk)
+                    t.update(len(chunk))
+                    result["downloaded"] += len(chunk)
+
+                size = part_file.tell()
+        except BaseException:
+            # NOTE: The response wasn't completely read. The connection can't be reused.
+            conn.close()
+            raise
+
+        if total is not None and size != total:
+            conn.close()
+            raise DownloadError("Incomplete download (%d of %d bytes): %s" % (size, total, url))
+
+        pool.put(parts.scheme, parts.netloc, conn)
+        os.replace(part_path, filename)
+        os.remove(part_info_path)
+
+        # NOTE: The validators of a resumed download are the ones of the initial response.
+        if response.status == 206:
+            result["etag"] = part_info.get("etag")
+            result["last_modified"] = part_info.get("last_modified")
+
+        result["size"] = size
+        result["resumed"] = offset
+
+        return result
+    finally:
+        if own_pool:
+            pool.close()
+
+
+def download_many(jobs, max_workers=4):
+    """Download several files at the same time.
+
+    Each download displays its own progress bar.
+
+    Parameters
+    ----------
+    jobs : list
+        A list of dictionaries containing the arguments for :any:`download` (``url``,
+        ``filename`` and optionally ``etag``, ``last_modified`` and ``desc``).
+    max_workers : int, optional
+        Maximum amount of files downloaded at the same time.
+
+    Returns
+    -------
+    list
+        The results of the downloads in the order of ``jobs``. Each result is the value
+        returned by :any:`download` or the exception raised by it.
+
+    Raises
+    ------
+    KeyboardInterrupt
+        If the downloads were interrupted. Partially downloaded files are kept.
     """
-    with TqdmUpTo(unit="B", unit_scale=True, unit_divisor=1024, miniters=1) as t:
-        urlretrieve(url, filename=filename, reporthook=t.update_to, data=None)
-        t.total = t.n
+    from concurrent.futures import FIRST_COMPLETED
+    from concurrent.futures import wait
+
+    pool = ConnectionPool()
+    stop_event = threading.Event()
+    positions = list(range(max_workers))
+    positions_lock = threading.Lock()
+    results = [None] * len(jobs)
+
+    def run(job):
+        """Download a file displaying its progress bar at a free position.
+
+        Parameters
+        ----------
+        job : dict
+            See ``jobs``.
+
+        Returns
+        -------
+        dict|Exception
+            See :any:`download`.
+        """
+        with positions_lock:
+            position = positions.pop(0)
+
+        try:
+            return download(job["url"], job["filename"],
+                            etag=job.get("etag"),
+                            last_modified=job.get("last_modified"),
+                            desc=job.get("desc"),
+                            pool=pool,
+                            position=position,
+                            stop_event=stop_event)
+        except Exception as err:
+            return err
+        finally:
+            with positions_lock:
+                positions.append(position)
+                positions.sort()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    try:
+        pending = {executor.submit(run, job): i for i, job in enumerate(jobs)}
+
+        while pending:
+            done = wait(pending, return_when=FIRST_COMPLETED)[0]
+
+            for future in done:
+                results[pending.pop(future)] = future.result()
+    except (KeyboardInterrupt, SystemExit):
+        stop_event.set()
+
+        for future in pending:
+            future.cancel()
+
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        pool.close()
+
+    return results
 
 
 if __name__ == "__main__":
@@ -0,0 +1,627 @@
+# -*- coding: utf-8 -*-
+"""Rendering of Markdown/reStructuredText documents and cache of rendered documents.
+
+Attributes
+----------
+RENDERER_VERSION : str
+    The version of the renderers defined in this module. See :any:`get_renderer_version`.
+
+Note
+----
+This module is imported by the web application, which isn't executed as part of the
+``KnowledgeBaseApp`` package. It should only import modules from the standard library
+(and from ``python_utils``, which is importable from both places).
+"""
+import hashlib
+import json
+import os
+import sys
+
+from collections import OrderedDict
+from threading import Lock
+
+try:
+    from .python_utils import file_utils
+    from .python_utils import mistune_utils
+except (ImportError, SystemError):
+    from python_utils import file_utils
+    from python_utils import mistune_utils
+
+try:
+    from docutils import core as docutils_core
+except (ImportError, SystemError):
+    docutils_core = None
+
+
+def get_file_signature(file_path):
+    """Get file signature.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a file.
+
+    Returns
+    -------
+    tuple
+        The modification time (in nanoseconds) and the size of a file.
+
+    Raises
+    ------
+    OSError
+        If the file cannot be accessed.
+    """
+    stat = os.stat(file_path)
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_rst(input_string):
+    """Parse resTrructuredText.
+
+    Parameters
+    ----------
+    input_string : str
+        The rST string to parse.
+
+    Returns
+    -------
+    str
+        The parsed rST string.
+    """
+    overrides = {
+        "input_encoding": "unicode",
+        "doctitle_xform": True,
+        "initial_header_level": 1
+    }
+    parts = docutils_core.publish_parts(source=input_string, source_path=None,
+                                        writer_name="html5", settings_overrides=overrides)
+
+    return parts["html_body"]
+
+
+def get_render_kind(file_path, handler):
+    """Get how a document is rendered.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a document.
+    handler : str
+        The handler of the document ("h" key of its "JSON data object").
+
+    Returns
+    -------
+    str|None
+        ``rst``, ``md`` or None if the document isn't rendered (it is served as is).
+    """
+    # TODO: Using "md" for .rst because I couldn't find an RST icon between the thousands of
+    # icons in NerdFont. Some day I might stumble upon one. LOL
+    if handler.lower() == "md":
+        # NOTE: Try to parse reStructuredText and fallback to Markdown.
+        if file_path.lower()[-4:] == ".rst" and docutils_core is not None:
+            return "rst"
+
+        return "md"
+
+    return None
+
+
+def render(raw_data, kind):
+    """Render a document.
+
+    Parameters
+    ----------
+    raw_data : str
+        The content of a document.
+    kind : str
+        How the document is rendered. See :any:`get_render_kind`.
+
+    Returns
+    -------
+    str
+        The rendered document. The content of the document as is if it couldn't be rendered.
+    """
+    try:
+        if kind == "rst":
+            return parse_rst(raw_data)
+
+        return mistune_utils.md(raw_data)
+    except Exception:
+        return raw_data
+
+
+def get_renderer_version(*file_paths, extra=""):
+    """Get a renderer version from the source files that define how documents are rendered.
+
+    Parameters
+    ----------
+    *file_paths
+        Paths to source files.
+    extra : str, optional
+        Extra data to include in the version (e.g., the version of an external renderer).
+
+    Returns
+    -------
+    str
+        A renderer version that changes every time any of the source files changes.
+    """
+    digest = hashlib.sha1(extra.encode("UTF-8"))
+
+    for file_path in file_paths:
+        try:
+            with open(file_path, "rb") as source_file:
+                digest.update(source_file.read())
+        except OSError:
+            digest.update(file_path.encode("UTF-8"))
+
+    return digest.hexdigest()[:16]
+
+
+def parse_if_none_match(header):
+    """Parse the value of an ``If-None-Match`` header.
+
+    Parameters
+    ----------
+    header : str|None
+        The header value.
+
+    Returns
+    -------
+    set
+        The entity tags found in the header (weak entity tags are returned as strong ones).
+    """
+    if not header:
+        return set()
+
+    tags = set()
+
+    for tag in header.split(","):
+        tag = tag.strip()
+
+        if tag.startswith("W/"):
+            tag = tag[2:]
+
+        if tag:
+            tags.add(tag)
+
+    return tags
+
+
+RENDERER_VERSION = get_renderer_version(
+    __file__, mistune_utils.__file__, os.path.join(os.path.dirname(mistune_utils.__file__),
+                                                   "mistune.py"),
+    extra=docutils_core.__version__ if docutils_core is not None else "")
+
+
+class RenderCache():
+    """Cache of rendered documents.
+
+    Rendered documents are kept in memory in a least recently used cache limited in size.
+    Optionally, they are also stored in a directory so they survive server restarts.
+
+    An entry is only valid if the modification time and size of its source file and the
+    renderer version are the same as when the entry was stored.
+
+    Documents stored in the cache directory can also be rendered ahead of time. See
+    :any:`prerender_documents`.
+
+    Attributes
+    ----------
+    stats : dict
+        Cache counters. Memory hits, disk hits, misses, evictions, amount of entries and
+        size in bytes of the entries in memory.
+    version : str
+        The renderer version.
+    """
+
+    def __init__(self, version=RENDERER_VERSION, max_bytes=32 * 1024 * 1024, cache_dir=None,
+                 root=None):
+        """Initialize.
+
+        Parameters
+        ----------
+        version : str, optional
+            The renderer version. See :any:`get_renderer_version`.
+        max_bytes : int, optional
+            Maximum size in bytes of the entries kept in memory.
+        cache_dir : str, optional
+            Path to a directory to store rendered documents. If not specified, documents are
+            only cached in memory.
+        root : str, optional
+            Path to the folder containing the source files. Rendered documents are stored
+            inside ``cache_dir`` in a tree parallel to this folder. Source files outside this
+            folder are only cached in memory.
+        """
+        self.version = version
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "entries": 0,
+            "bytes": 0
+        }
+        self._max_bytes = max_bytes
+        self._cache_dir = cache_dir if root else None
+        self._root = root
+        self._lock = Lock()
+        # Key: (file_path, kind). Value: (signature, html, size).
+        self._entries = OrderedDict()
+
+    def get_etag(self, file_path, kind, signature, extra=""):
+        """Get the entity tag of a rendered document.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the source file.
+        kind : str
+            How the document is rendered (e.g., md, rst).
+        signature : tuple
+            The signature of the source file. See :any:`get_file_signature`.
+        extra : str, optional
+            Extra data sent with the rendered document.
+
+        Returns
+        -------
+        str
+            A quoted entity tag.
+        """
+        digest = hashlib.sha1(("%s\0%s\0%s\0%d\0%d\0" % (
+            self.version, kind, file_path, signature[0], signature[1])).encode("UTF-8",
+                                                                               "surrogateescape"))
+        digest.update(extra.encode("UTF-8", "surrogateescape"))
+
+        return '"%s"' % digest.hexdigest()
+
+    def get(self, file_path, kind):
+        """Get a rendered document.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the source file.
+        kind : str|None
+            How the document is rendered. See :any:`get_render_kind`. If None, the content of
+            the source file is returned as is and it isn't cached.
+
+        Returns
+        -------
+        tuple
+            The signature of the source file used to render the document and the rendered
+            document.
+
+        Raises
+        ------
+        OSError
+            If the source file cannot be read.
+        """
+        # NOTE: Get the signature before reading the file. If the file changes while it is
+        # being rendered, the entry will be considered stale on the next request.
+        signature = get_file_signature(file_path)
+
+        if kind is None:
+            return signature, self._read_source(file_path)
+
+        key = (file_path, kind)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+
+                return signature, entry[1]
+
+        html = self._read_from_disk(key, signature)
+
+        if html is None:
+            try:
+                html = render(self._read_source(file_path), kind)
+            finally:
+                with self._lock:
+                    self.stats["misses"] += 1
+
+            self._write_to_disk(key, signature, html)
+        else:
+            with self._lock:
+                self.stats["disk_hits"] += 1
+
+        self._store(key, signature, html)
+
+        return signature, html
+
+    def is_fresh(self, file_path, kind):
+        """Check if a rendered document stored in the cache directory is fresh.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the source file.
+        kind : str
+            How the document is rendered. See :any:`get_render_kind`.
+
+        Returns
+        -------
+        bool
+            If the stored document exists and is fresh.
+
+        Raises
+        ------
+        OSError
+            If the source file cannot be accessed.
+        """
+        return self._read_from_disk((file_path, kind), get_file_signature(file_path),
+                                    header_only=True) is not None
+
+    def prerender(self, file_path, kind):
+        """Render a document and store it in the cache directory only if the stored document
+        is missing or stale.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the source file.
+        kind : str
+            How the document is rendered. See :any:`get_render_kind`.
+
+        Returns
+        -------
+        bool
+            If the document was rendered.
+
+        Raises
+        ------
+        OSError
+            If the source file cannot be read.
+        """
+        signature = get_file_signature(file_path)
+        key = (file_path, kind)
+
+        if self._read_from_disk(key, signature, header_only=True) is not None:
+            return False
+
+        self._write_to_disk(key, signature, render(self._read_source(file_path), kind))
+
+        return True
+
+    def get_stats(self):
+        """Get a copy of the cache counters.
+
+        Returns
+        -------
+        dict
+            See :any:`RenderCache.stats`.
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def _read_source(self, file_path):
+        """Read a source file.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the source file.
+
+        Returns
+        -------
+        str
+            The content of the source file.
+        """
+        with open(file_path, "r", encoding="UTF-8") as source_file:
+            return source_file.read()
+
+    def _store(self, key, signature, html):
+        """Store a rendered document in memory, evicting the least recently used entries if
+        needed.
+
+        Parameters
+        ----------
+        key : tuple
+            The entry key.
+        signature : tuple
+            The signature of the source file.
+        html : str
+            The rendered document.
+        """
+        size = sys.getsizeof(html)
+
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+
+            if old_entry is not None:
+                self.stats["bytes"] -= old_entry[2]
+
+            self._entries[key] = (signature, html, size)
+            self.stats["bytes"] += size
+
+            while self.stats["bytes"] > self._max_bytes:
+                evicted = self._entries.popitem(last=False)[1]
+                self.stats["bytes"] -= evicted[2]
+                self.stats["evictions"] += 1
+
+            self.stats["entries"] = len(self._entries)
+
+    def _get_disk_path(self, key):
+        """Get the path of the file storing a rendered document.
+
+        Parameters
+        ----------
+        key : tuple
+            The entry key.
+
+        Returns
+        -------
+        tuple
+            The path to a file inside the cache directory and the path of the source file
+            relative to the root folder. None if the document cannot be stored on disk.
+        """
+        if not self._cache_dir:
+            return None
+
+        rel_path = os.path.relpath(key[0], self._root)
+
+        if rel_path.startswith(os.pardir):
+            return None
+
+        return os.path.join(self._cache_dir, "%s.%s.html" % (rel_path, key[1])), rel_path
+
+    def _read_from_disk(self, key, signature, header_only=False):
+        """Read a rendered document from the cache directory.
+
+        Parameters
+        ----------
+        key : tuple
+            The entry key.
+        signature : tuple
+            The signature of the source file.
+        header_only : bool, optional
+            Only check if the stored document is fresh; do not read it.
+
+        Returns
+        -------
+        str|None
+            The rendered document (an empty string if ``header_only`` is True). None if it
+            isn't stored or if it is stale.
+        """
+        disk_path = self._get_disk_path(key)
+
+        if disk_path is None:
+            return None
+
+        try:
+            with open(disk_path[0], "r", encoding="UTF-8") as cache_file:
+                header = json.loads(cache_file.readline())
+
+                if header.get("v") != self.version or header.get("p") != disk_path[1] or \
+                        header.get("s") != list(signature):
+                    return None
+
+                return "" if header_only else cache_file.read()
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _write_to_disk(self, key, signature, html):
+        """Store a rendered document in the cache directory.
+
+        The first line of the file is a JSON object with the renderer version, the source path
+        and the source signature used to validate the entry.
+
+        Parameters
+        ----------
+        key : tuple
+            The entry key.
+        signature : tuple
+            The signature of the source file.
+        html : str
+            The rendered document.
+        """
+        disk_path = self._get_disk_path(key)
+
+        if disk_path is None:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(disk_path[0]), exist_ok=True)
+
+            with file_utils.atomic_write(disk_path[0]) as cache_file:
+                cache_file.write(json.dumps({
+                    "v": self.version,
+                    "p": disk_path[1],
+                    "s": list(signature)
+                }) + "\n")
+                cache_file.write(html)
+        except (OSError, UnicodeError):
+            # NOTE: The disk cache is an optimization. Failing to store an entry isn't an error.
+            pass
+
+
+def _prerender_job(job):
+    """See :any:`RenderCache.prerender`. Used by process pools.
+
+    Parameters
+    ----------
+    job : tuple
+        The cache directory, the root folder, the path of the source file and how it is
+        rendered.
+
+    Returns
+    -------
+    bool|None
+        If the document was rendered. None if the source file couldn't be read.
+    """
+    cache_dir, root, file_path, kind = job
+
+    try:
+        return RenderCache(cache_dir=cache_dir, root=root).prerender(file_path, kind)
+    except (OSError, UnicodeError):
+        return None
+
+
+def prerender_documents(documents, cache_dir, root, workers=None):
+    """Render documents ahead of time using a process pool.
+
+    Documents whose stored rendered version is fresh are skipped without starting any process.
+
+    Parameters
+    ----------
+    documents : list
+        A list of tuples containing the path to a source file and how it is rendered.
+    cache_dir : str
+        See :any:`RenderCache` > cache_dir parameter.
+    root : str
+        See :any:`RenderCache` > root parameter.
+    workers : int, optional
+        Maximum amount of processes used to render documents. If not specified,
+        :any:`concurrent.futures.ProcessPoolExecutor` decides.
+
+    Returns
+    -------
+    dict
+        Amount of documents rendered, skipped (already fresh) and failed (unreadable).
+    """
+    cache = RenderCache(cache_dir=cache_dir, root=root)
+    stats = {
+        "rendered": 0,
+        "skipped": 0,
+        "failed": 0
+    }
+    jobs = []
+
+    for file_path, kind in documents:
+        try:
+            is_fresh = cache.is_fresh(file_path, kind)
+        except OSError:
+            stats["failed"] += 1
+            continue
+
+        if is_fresh:
+            stats["skipped"] += 1
+        else:
+            jobs.append((cache_dir, root, file_path, kind))
+
+    if len(jobs) < 2 or workers == 1:
+        results = map(_prerender_job, jobs)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_prerender_job, jobs, chunksize=8))
+
+    for result in results:
+        if result is None:
+            stats["failed"] += 1
+        else:
+            stats["rendered" if result else "skipped"] += 1
+
+    return stats
+
+
+if __name__ == "__main__":
+    pass
@@ -11,20 +11,37 @@ repo_service_url_map : dict
     List of repositories service URLs.
 repositories_data_tables_json_path : str
     Path to the repositories_data_tables.json file.
+repositories_file_hashes_path : str
+    Path to the file where the hashes of the repository files copied into the www folder (and
+    their sources) are stored. See :any:`hash_utils.FileHashIndex`.
+repositories_state_json_path : str
+    Path to the file where the state of each repository (last known remote HEAD, last time it
+    changed, last time it was handled and the fingerprint of the sources of its last Sphinx
+    documentation build) is stored.
 root_folder : str
     The main folder containing the application. All commands must be executed
     from this location without exceptions.
 """
+import hashlib
 import json
 import os
+import time
 
 from runpy import run_path
+from subprocess import CalledProcessError
+from subprocess import DEVNULL
+from subprocess import PIPE
+from subprocess import STDOUT
+from urllib.parse import urlparse
 
 from . import app_utils
 from .python_utils import cmd_utils
 from .python_utils import exceptions
 from .python_utils import file_utils
+from .python_utils import hash_utils
 from .python_utils import json_schema_utils
+from .python_utils import log_system
+from .python_utils import parallel_utils
 from .python_utils import shell_utils
 from .python_utils import string_utils
 from .schemas import repositories_schema
@@ -40,6 +57,16 @@ repositories_data_tables_json_path = os.path.join(root_folder,
                                                   "data_storage",
                                                   "repositories_data_tables.json")
 
+repositories_file_hashes_path = os.path.join(root_folder,
+                                             "UserData",
+                                             "data_storage",
+                                             "repositories_file_hashes.json")
+
+repositories_state_json_path = os.path.join(root_folder,
+                                            "UserData",
+                                            "data_storage",
+                                            "repositories_state.json")
+
 repo_service_url_map = {
     "github": "https://github.com/",
     "bitbucket": "https://bitbucket.org/",
@@ -91,6 +118,7 @@ class RepositoriesHandler():
         self.logger = logger
 
         self._data_tables_obj = []
+        self._repositories_state = self._load_repositories_state()
 
         self._validate_repo_data()
 
@@ -114,6 +142,104 @@ class RepositoriesHandler():
             ]),
             logger=self.logger)
 
+    def _load_repositories_state(self):
+        """Load the stored state of the repositories.
+
+        Returns
+        -------
+        dict
+            The state of each repository keyed by its path relative to the data storage folder.
+            See :any:`RepositoriesHandler._get_repo_state_key`.
+        """
+        try:
+            with open(repositories_state_json_path, "r", encoding="UTF-8") as state_file:
+                return json.loads(state_file.read())
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            self.logger.warning("Discarding unreadable repositories state.")
+            self.logger.warning(err, date=False)
+
+        return {}
+
+    def _save_repositories_state(self):
+        """Save the state of the repositories.
+        """
+        if self._dry_run:
+            return
+
+        try:
+            state_parent = os.path.dirname(repositories_state_json_path)
+
+            if not os.path.exists(state_parent):
+                os.makedirs(state_parent)
+
+            with file_utils.atomic_write(repositories_state_json_path) as state_file:
+                json.dump(self._repositories_state, state_file, indent=4, sort_keys=True)
+        except Exception as err:
+            self.logger.error(err)
+
+    def _get_repo_state_key(self, repo_data):
+        """Get the key used to store the state of a repository.
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+
+        Returns
+        -------
+        str
+            The repository path relative to the data storage folder.
+        """
+        return os.path.join("%s_repositories" % repo_data.get("repo_service", "github"),
+                            self._get_folder_name(repo_data))
+
+    def _get_repo_data_digest(self, repo_data):
+        """Get a digest of the repository data.
+
+        It's used to detect changes to the repository data that require the repository files
+        to be handled again (e.g., a new file name added to ``repo_file_names``).
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+
+        Returns
+        -------
+        str
+            The digest.
+        """
+        return hashlib.sha1(json.dumps(repo_data, sort_keys=True).encode("UTF-8")).hexdigest()
+
+    def _is_repo_handled(self, repo_data, repo_data_digest):
+        """Check if the files of a repository were already handled.
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+        repo_data_digest : str
+            See :any:`RepositoriesHandler._get_repo_data_digest`.
+
+        Returns
+        -------
+        bool
+            If the repository didn't change since its files were last copied into the www folder,
+            its data didn't change either and the copied files are still there.
+        """
+        state = self._repositories_state.get(self._get_repo_state_key(repo_data), {})
+
+        if "last_handled" not in state or state.get("handled_data") != repo_data_digest:
+            return False
+
+        if state.get("last_changed", 0) > state["last_handled"]:
+            return False
+
+        return os.path.exists(os.path.join(app_utils.PATHS["www_base"],
+                                           self._get_repo_state_key(repo_data)))
+
     def _generate_repositories_data_tables_json_file(self):
         """Generate the JSON file for the repository.
         """
@@ -133,8 +259,8 @@ class RepositoriesHandler():
                 self.logger.log_dry_run("JSON file will be created at:\n%s" %
                                         repositories_data_tables_json_path)
             else:
-                with open(repositories_data_tables_json_path, "w") as json_file:
-                    json_file.write(json.dumps(self._data_tables_obj))
+                with file_utils.atomic_write(repositories_data_tables_json_path) as json_file:
+                    file_utils.dump_json_array(self._data_tables_obj, json_file)
         except Exception as err:
             self.logger.error(err)
 
@@ -164,16 +290,27 @@ class RepositoriesHandler():
                     with open(file_path, "a") as file_to_append:
                         file_to_append.write(file_data)
 
-    def _handle_sphinx_docs_repo_type(self, repo_data):
+    def _handle_sphinx_docs_repo_type(self, repo_data, rows, logger, **kwargs):
         """Handle repositories set to build their Sphinx documentation.
 
         Parameters
         ----------
         repo_data : dict
             Repository data.
+        rows : list
+            Where to store the DataTables data of the repository.
+        logger : object
+            See <class :any:`LogSystem`>.
+        **kwargs
+            Keyword arguments. Not used.
+
+        Returns
+        -------
+        bool
+            If the repository was handled without errors.
         """
         try:
-            self._data_tables_obj.append({
+            rows.append({
                 "t": repo_data.get("kb_title", ""),
                 "c": repo_data.get("kb_category", "Uncategorized"),
                 # Path to files relative to the www folder
@@ -184,23 +321,45 @@ class RepositoriesHandler():
                 "s": self._get_repo_url(repo_data)
             })
         except Exception as err:
-            self.logger.error("%s-%s" % (repo_data.get("repo_owner"), repo_data.get("repo_name")))
-            self.logger.error(err)
+            logger.error("%s-%s" % (repo_data.get("repo_owner"), repo_data.get("repo_name")))
+            logger.error(err)
+            return False
 
-    def _handle_files_repo_type(self, repo_data):
+        return True
+
+    def _handle_files_repo_type(self, repo_data, rows, logger, copy_files=True, report=None,
+                                hash_index=None):
         """Handle repositories set to manage one or more files on them.
 
         Parameters
         ----------
         repo_data : dict
             Repository data.
+        rows : list
+            Where to store the DataTables data of the repository.
+        logger : object
+            See <class :any:`LogSystem`>.
+        copy_files : bool, optional
+            Copy the repository files into the www folder. If False, only the DataTables data
+            is generated.
+        report : dict, optional
+            The copy report to update. See :any:`file_utils.update_copy_report`.
+        hash_index : hash_utils.FileHashIndex, optional
+            See :any:`file_utils.custom_copy2`.
+
+        Returns
+        -------
+        bool
+            If the repository was handled without errors.
         """
+        success = True
+
         try:
             repo_path = self._get_path(repo_data)
             repo_file_names = repo_data.get("repo_file_names", [])
             repo_file_patterns_include = repo_data.get("repo_file_patterns_include", [])
-            repo_file_patterns_ignore = repo_data.get("repo_file_patterns_ignore", [])
-            repo_file_patterns_ignore.extend(global_repo_file_patterns_ignore)
+            repo_file_patterns_ignore = repo_data.get("repo_file_patterns_ignore", []) + \
+                global_repo_file_patterns_ignore
             filenames = []
 
             # To have a default and to avoid having to specify repo_file_names in every
@@ -212,16 +371,17 @@ class RepositoriesHandler():
                 filenames += repo_file_names
             else:
                 temp_files_list = []
+                ignored_dirs = set(custom_copytree_global_ignored_patterns)
+                # NOTE: The patterns are compiled once for all the directories of the repository.
+                files_filter = string_utils.SuperFilter(repo_file_patterns_include,
+                                                        repo_file_patterns_ignore)
 
                 for root, dirs, files in os.walk(repo_path, topdown=True):
                     # <3 https://stackoverflow.com/a/19859907
                     # Modify dirs in-place to avoid visiting undesired directories.
-                    dirs[:] = [d for d in dirs
-                               if d not in set(custom_copytree_global_ignored_patterns)]
+                    dirs[:] = [d for d in dirs if d not in ignored_dirs]
 
-                    for f_name in string_utils.super_filter(files,
-                                                            repo_file_patterns_include,
-                                                            repo_file_patterns_ignore):
+                    for f_name in files_filter.filter(files):
                         temp_files_list.append(self._get_file_rel_path(root, f_name, repo_path))
 
                 # Second filtering to apply exclusion_patterns. In case that there is
@@ -245,7 +405,7 @@ class RepositoriesHandler():
                     source_path = os.path.join(repo_path, file_rel_path)
                     destination_path = os.path.join(app_utils.PATHS["www_base"], www_path)
 
-                    self._data_tables_obj.append({
+                    rows.append({
                         "t": title,
                         "c": repo_data.get("kb_category", "Uncategorized"),
                         # Path to files relative to the www folder
@@ -256,43 +416,55 @@ class RepositoriesHandler():
                     })
 
                     # If copy_full_repo is True, there is no need to copy the actually used files.
-                    if not repo_data.get("copy_full_repo"):
+                    if copy_files and not repo_data.get("copy_full_repo"):
                         try:
                             if self._dry_run:
-                                self.logger.log_dry_run("A file will be copied:")
-                                self.logger.log_dry_run("Source: %s" % source_path)
-                                self.logger.log_dry_run("Destination: %s" % destination_path)
+                                logger.log_dry_run("A file will be copied:")
+                                logger.log_dry_run("Source: %s" % source_path)
+                                logger.log_dry_run("Destination: %s" % destination_path)
                             else:
-                                file_utils.custom_copy2(source_path, destination_path, self.logger,
+                                file_utils.custom_copy2(source_path, destination_path, logger,
                                                         log_copied_file=True,
-                                                        relative_path=app_utils.PATHS["www_base"])
+                                                        relative_path=app_utils.PATHS["www_base"],
+                                                        report=report,
+                                                        strategy=repo_data.get("copy_strategy",
+                                                                               "copy"),
+                                                        hash_index=hash_index)
                         except Exception as err1:
-                            self.logger.error(err1)
+                            success = False
+                            logger.error(err1)
                 except Exception as err2:
-                    self.logger.error(file_name)
-                    self.logger.error(err2)
+                    success = False
+                    logger.error(file_name)
+                    logger.error(err2)
                     continue
 
-            if repo_data.get("copy_full_repo"):
+            if copy_files and repo_data.get("copy_full_repo"):
                 full_repo_destination_path = os.path.join(app_utils.PATHS["www_base"],
                                                           "%s_repositories" % repo_data.get(
                                                               "repo_service", "github"),
                                                           self._get_folder_name(repo_data))
                 if self._dry_run:
-                    self.logger.log_dry_run("A folder will be copied:")
-                    self.logger.log_dry_run("Source: %s" % repo_path)
-                    self.logger.log_dry_run("Destination: %s" % full_repo_destination_path)
+                    logger.log_dry_run("A folder will be copied:")
+                    logger.log_dry_run("Source: %s" % repo_path)
+                    logger.log_dry_run("Destination: %s" % full_repo_destination_path)
                 else:
                     file_utils.custom_copytree(repo_path,
                                                full_repo_destination_path,
                                                ignored_patterns=custom_copytree_global_ignored_patterns,
-                                               logger=self.logger,
+                                               logger=logger,
                                                log_copied_file=True,
-                                               relative_path=app_utils.PATHS["www_base"])
+                                               relative_path=app_utils.PATHS["www_base"],
+                                               report=report,
+                                               strategy=repo_data.get("copy_strategy", "copy"),
+                                               hash_index=hash_index)
 
         except Exception as err3:
-            self.logger.error("%s-%s" % (repo_data.get("repo_owner"), repo_data.get("repo_name")))
-            self.logger.error(err3)
+            success = False
+            logger.error("%s-%s" % (repo_data.get("repo_owner"), repo_data.get("repo_name")))
+            logger.error(err3)
+
+        return success
 
     def _get_file_rel_path(self, root_dir, file_name, start_path):
         """Get file relative path.
@@ -442,38 +614,123 @@ class RepositoriesHandler():
                                         repo_data.get("repo_owner"),
                                         repo_data.get("repo_name"))
 
-    def _do_pull(self, repo_data):
+    def _get_repo_host(self, repo_data):
+        """Get the host name of a repository URL.
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+
+        Returns
+        -------
+        str
+            The host name (e.g., github.com).
+        """
+        return urlparse(self._get_repo_url(repo_data)).netloc or \
+            repo_data.get("repo_service", "github")
+
+    def _get_head(self, repo_data, remote=False):
+        """Get the identifier of the current HEAD of a repository.
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+        remote : bool, optional
+            Get the HEAD of the remote repository (``git ls-remote``/``hg identify``, which
+            connect to the repository service) instead of the HEAD of the local repository.
+
+        Returns
+        -------
+        str|None
+            The identifier of the HEAD. None if it couldn't be obtained.
+        """
+        repo_type = repo_data.get("repo_type", "git")
+
+        if remote:
+            cmd = ["git", "ls-remote", self._get_repo_url(repo_data), "HEAD"] \
+                if repo_type == "git" else ["hg", "identify", "--id", self._get_repo_url(repo_data)]
+        else:
+            cmd = ["git", "rev-parse", "HEAD"] if repo_type == "git" else ["hg", "identify", "--id"]
+
+        try:
+            p = cmd_utils.run_cmd(cmd, stdout=PIPE, stderr=DEVNULL, stdin=DEVNULL,
+                                  env=cmd_utils.get_environment(
+                                      set_vars={"GIT_TERMINAL_PROMPT": "0"}),
+                                  cwd=self._get_path(repo_data), timeout=120)
+        except Exception:
+            return None
+
+        output = p.stdout.decode("UTF-8", "replace").split()
+
+        return output[0] if p.returncode == 0 and output else None
+
+    def _run_repo_cmd(self, cmd, cwd, logger):
+        """Run a repository command capturing its output.
+
+        Parameters
+        ----------
+        cmd : str
+            The command to run.
+        cwd : str
+            The directory in which to run the command.
+        logger : object
+            See <class :any:`LogSystem`>. The output of the command is logged with it.
+
+        Raises
+        ------
+        subprocess.CalledProcessError
+            If the command fails.
+        """
+        # NOTE: Commands run in parallel and their output is captured. Never wait for a
+        # password that nobody will be able to type.
+        env = cmd_utils.get_environment(set_vars={"GIT_TERMINAL_PROMPT": "0"})
+
+        try:
+            p = cmd_utils.run_cmd(cmd, stdout=PIPE, stderr=STDOUT, stdin=DEVNULL, env=env,
+                                  shell=True, check=True, cwd=cwd)
+            output = p.stdout
+        except CalledProcessError as err:
+            output = err.output
+            raise
+        finally:
+            output = (output or b"").decode("UTF-8", "replace").strip()
+
+            if output:
+                logger.info(output, date=False)
+
+    def _do_pull(self, repo_data, logger=None):
         """Pull from the repository.
 
         Parameters
         ----------
         repo_data : dict
             Repository data.
+        logger : object, optional
+            See <class :any:`LogSystem`>. If not specified, ``self.logger`` is used.
         """
+        logger = logger or self.logger
         cmd = "%s pull" % repo_data.get("repo_type", "git")
         cwd = self._get_path(repo_data)
 
         if self._dry_run:
-            self.logger.log_dry_run("Command that will be executed:\n%s" % cmd)
-            self.logger.log_dry_run("Command will be executed on directory:\n%s" % cwd)
+            logger.log_dry_run("Command that will be executed:\n%s" % cmd)
+            logger.log_dry_run("Command will be executed on directory:\n%s" % cwd)
         else:
-            cmd_utils.run_cmd(
-                cmd,
-                stdout=None,
-                stderr=None,
-                shell=True,
-                check=True,
-                cwd=cwd
-            )
-
-    def _do_clone(self, repo_data):
+            self._run_repo_cmd(cmd, cwd, logger)
+
+    def _do_clone(self, repo_data, logger=None):
         """Clone the repository.
 
         Parameters
         ----------
         repo_data : dict
             Repository data.
+        logger : object, optional
+            See <class :any:`LogSystem`>. If not specified, ``self.logger`` is used.
         """
+        logger = logger or self.logger
         repo_type = repo_data.get("repo_type", "git")
 
         cmd = "{cmd} clone {depth} {url} {path}".format(
@@ -485,19 +742,42 @@ class RepositoriesHandler():
         cwd = self._get_storage_path(repo_data)
 
         if self._dry_run:
-            self.logger.log_dry_run("Command that will be executed:\n%s" % cmd)
-            self.logger.log_dry_run("Command will be executed on directory:\n%s" % cwd)
+            logger.log_dry_run("Command that will be executed:\n%s" % cmd)
+            logger.log_dry_run("Command will be executed on directory:\n%s" % cwd)
         else:
-            cmd_utils.run_cmd(
-                cmd,
-                stdout=None,
-                stderr=None,
-                shell=True,
-                check=True,
-                cwd=cwd,
-            )
-
-    def handle_all_repositories(self):
+            self._run_repo_cmd(cmd, cwd, logger)
+
+    def _handle_repository(self, repo_data, handler, copy_files, hash_index):
+        """Handle a repository.
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+        handler : method
+            The repository handler (e.g., :any:`RepositoriesHandler._handle_files_repo_type`).
+        copy_files : bool
+            See :any:`RepositoriesHandler._handle_files_repo_type`.
+        hash_index : hash_utils.FileHashIndex
+            See :any:`RepositoriesHandler._handle_files_repo_type`.
+
+        Returns
+        -------
+        tuple
+            The DataTables data of the repository, its copy report (see
+            :any:`file_utils.update_copy_report`), the messages logged while handling the
+            repository (see :any:`log_system.BufferedLogSystem`) and whether the repository was
+            handled without errors.
+        """
+        rows = []
+        report = {}
+        logger = log_system.BufferedLogSystem()
+        success = handler(repo_data, rows, logger, copy_files=copy_files, report=report,
+                          hash_index=hash_index)
+
+        return rows, report, logger, success and not report.get("failed")
+
+    def handle_all_repositories(self, full=False, workers=None):
         """Handle all repositories.
 
         The main tasks of this method are to populate the ``self._data_tables_obj`` list with
@@ -507,7 +787,30 @@ class RepositoriesHandler():
         Repositories whose handler is **sphinx_docs** will have their DataTables data generated,
         but are purposely handled (the Sphinx documentations built) separately in
         ``self.build_sphinx_docs``.
+
+        The files of repositories that didn't change (see
+        :any:`RepositoriesHandler.update_all_repositories`) since they were last handled aren't
+        copied again. The files of the rest of the repositories are only copied if their content
+        changed (see :any:`file_utils.is_same_content`).
+
+        Repositories are handled in parallel. Their DataTables data is merged and their messages
+        are displayed in the same order in which they would be handled one by one.
+
+        Parameters
+        ----------
+        full : bool, optional
+            Copy the files of all repositories.
+        workers : int, optional
+            Maximum amount of repositories handled at the same time. If not specified, the
+            default of :any:`concurrent.futures.ThreadPoolExecutor` is used.
         """
+        from concurrent.futures import ThreadPoolExecutor
+
+        repos_unchanged = 0
+        total_report = {}
+        jobs = []
+        hash_index = hash_utils.FileHashIndex(repositories_file_hashes_path)
+
         self.logger.info(shell_utils.get_cli_separator("-"), date=False)
         self.logger.info("Handling repositories...")
 
@@ -523,26 +826,204 @@ class RepositoriesHandler():
             repo_handler = repo_data.get("repo_handler", "files")
 
             if repo_handler:
-                handler = getattr(self, "_handle_%s_repo_type" % repo_handler)
-
                 try:
-                    handler(repo_data)
+                    handler = getattr(self, "_handle_%s_repo_type" % repo_handler)
                 except AttributeError as err:
                     self.logger.warning("Repository handler: %s" % repo_handler)
                     self.logger.error(err)
                     continue
 
+                repo_data_digest = None
+                copy_files = True
+
+                if repo_handler == "files":
+                    repo_data_digest = self._get_repo_data_digest(repo_data)
+                    copy_files = full or not self._is_repo_handled(repo_data, repo_data_digest)
+
+                    if not copy_files:
+                        repos_unchanged += 1
+
+                jobs.append((repo_data, handler, copy_files, repo_data_digest))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # NOTE: Executor.map yields the results in the order of the jobs, which keeps the
+            # order of the DataTables data and of the displayed messages deterministic.
+            results = executor.map(lambda job: self._handle_repository(*job[:3], hash_index),
+                                   jobs)
+
+            for (repo_data, handler, copy_files, repo_data_digest), result in zip(jobs, results):
+                rows, report, repo_logger, success = result
+
+                repo_logger.flush(self.logger)
+                self._data_tables_obj.extend(rows)
+
+                for key, value in report.items():
+                    file_utils.update_copy_report(total_report, key, value)
+
+                if repo_data_digest and success and copy_files and not self._dry_run:
+                    state = self._repositories_state.setdefault(
+                        self._get_repo_state_key(repo_data), {})
+                    state["last_handled"] = time.time()
+                    state["handled_data"] = repo_data_digest
+
         self._generate_repositories_data_tables_json_file()
+        self._save_repositories_state()
+
+        if not self._dry_run:
+            try:
+                hash_index.save()
+            except Exception as err:
+                self.logger.error(err)
+
+        if repos_unchanged > 0:
+            self.logger.info("%d unchanged repositories whose files weren't copied again." %
+                             repos_unchanged)
+
+        if total_report:
+            self.logger.info("Files copied: %d (%.1f MiB). Up to date: %d (%.1f MiB). "
+                             "Failed: %d." % (
+                total_report.get("copied", 0),
+                total_report.get("bytes_copied", 0) / 1048576,
+                total_report.get("skipped", 0),
+                total_report.get("bytes_skipped", 0) / 1048576,
+                total_report.get("failed", 0)
+            ))
+            self.logger.info("Copy strategies used: %s." % ", ".join(
+                "%s: %d" % (strategy, total_report.get(strategy, 0))
+                for strategy in file_utils.COPY_STRATEGIES
+            ))
+            self.logger.info("Files hashed: %d (%.1f MiB). Hashes reused: %d." % (
+                hash_index.stats["hashed"],
+                hash_index.stats["bytes_hashed"] / 1048576,
+                hash_index.stats["reused"]
+            ))
+
         self.logger.info("Finished handling all repositories.")
 
-    def update_all_repositories(self, do_not_pull=False):
+    def _update_repository(self, repo_data, do_not_pull=False, skip_unchanged=False):
+        """Update a repository.
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+        do_not_pull : bool, optional
+            See :any:`RepositoriesHandler.update_all_repositories`.
+        skip_unchanged : bool, optional
+            See :any:`RepositoriesHandler.update_all_repositories`.
+
+        Returns
+        -------
+        tuple
+            The result of the update (cloned, pulled, unchanged, omitted, warning or error), the
+            messages logged while updating the repository (see
+            :any:`log_system.BufferedLogSystem`), the exception raised if the update failed and
+            the changes to the state of the repository.
+        """
+        logger = log_system.BufferedLogSystem()
+        repo_path = self._get_path(repo_data)
+        state = {}
+
+        try:
+            repo_parent = os.path.dirname(repo_path)
+
+            if not os.path.exists(repo_parent):
+                os.makedirs(repo_parent, exist_ok=True)
+
+            # START USING THIS WHEN GIT GAINS SOME FREAKING SENSE!!!
+            # If the repository path exists, check if it is a valid repository
+            # and proceed to attempt to pull from it.
+            # p = cmd_utils.run_cmd(self._get_check_repo_cmd(repo_data.get("repo_type", "git")),
+            #                       stdout=DEVNULL,
+            #                       stderr=DEVNULL,
+            #                       cwd=repo_path)
+            if not file_utils.is_real_dir(repo_path):
+                # If the repository path doesn't exists, attempt to clone the
+                # repository and get out of the loop.
+                logger.warning("<%s-%s> doesn't seem to exist." %
+                               (repo_data.get("repo_owner"), repo_data.get("repo_name")))
+                logger.info("Cloning repository...")
+                self._do_clone(repo_data, logger)
+                state["last_changed"] = time.time()
+
+                # NOTE: A fresh clone is at the remote HEAD. Recording it spares a full pull on
+                # the next update with skip_unchanged.
+                if not self._dry_run:
+                    remote_head = self._get_head(repo_data)
+
+                    if remote_head is not None:
+                        state["remote_head"] = remote_head
+
+                return "cloned", logger, None, state
+
+            if do_not_pull:
+                return "omitted", logger, None, state
+
+            # Do the wrong thing until Git allows me to do the right thing.
+            # Check for the .git or .hg directories to decide if a folder is a repository.
+            if file_utils.is_real_dir(os.path.join(repo_path, ".%s" %
+                                                   repo_data.get("repo_type", "git"))):
+                remote_head = None
+
+                if skip_unchanged and not self._dry_run:
+                    remote_head = self._get_head(repo_data, remote=True)
+                    recorded_head = self._repositories_state.get(
+                        self._get_repo_state_key(repo_data), {}).get("remote_head")
+
+                    if remote_head is None:
+                        logger.warning("Couldn't get the remote HEAD of <%s-%s> repository." %
+                                       (repo_data.get("repo_owner"), repo_data.get("repo_name")))
+                    elif remote_head == recorded_head:
+                        return "unchanged", logger, None, state
+
+                logger.info("Pulling from <%s-%s> repository." %
+                            (repo_data.get("repo_owner"), repo_data.get("repo_name")))
+                old_head = self._get_head(repo_data)
+                self._do_pull(repo_data, logger)
+
+                # NOTE: The remote HEAD is recorded after a successful pull so a failed pull is
+                # attempted again on the next run.
+                if remote_head is not None:
+                    state["remote_head"] = remote_head
+
+                if old_head is None or self._get_head(repo_data) != old_head:
+                    state["last_changed"] = time.time()
+
+                return "pulled", logger, None, state
+            else:
+                logger.warning("Manual intervention required!")
+                logger.warning("The following path doesn't seem to be a repository:")
+                logger.warning(repo_path)
+                return "warning", logger, None, state
+        except Exception as err:
+            logger.error(err)
+            logger.error(repo_path)
+            return "error", logger, err, state
+
+    def update_all_repositories(self, do_not_pull=False, workers=None, max_per_host=None,
+                                skip_unchanged=False):
         """Main function to update repositories.
 
+        Repositories are updated in parallel. The messages logged while updating a repository
+        are displayed together once the repository was updated.
+
+        The last time each repository changed (it was cloned or a pull modified its HEAD) is
+        recorded. It's used by :any:`RepositoriesHandler.handle_all_repositories` to avoid copying
+        the files of repositories that didn't change.
+
         Parameters
         ----------
         do_not_pull : bool, optional
             Just clone the repositories that where not handled before, do not pull from existent
             repositories.
+        workers : int, optional
+            Maximum amount of repositories updated at the same time. Default: 8.
+        max_per_host : int, optional
+            Maximum amount of repositories from the same host (e.g., github.com) updated at the
+            same time. Default: 4.
+        skip_unchanged : bool, optional
+            Before pulling from a repository, compare the HEAD of the remote repository with the
+            one recorded the last time it was pulled. If it didn't move, do not pull.
 
         Raises
         ------
@@ -555,58 +1036,39 @@ class RepositoriesHandler():
         repos_count = len(self._repositories_data)
         repos_processed = 0
         repos_omitted = 0
+        repos_unchanged = 0
+
+        try:
+            for repo_data, future in parallel_utils.iter_per_key(
+                    lambda repo_data: self._update_repository(repo_data, do_not_pull,
+                                                              skip_unchanged),
+                    self._repositories_data,
+                    self._get_repo_host,
+                    max_workers=workers or 8,
+                    max_per_key=max_per_host or 4):
+                repos_processed += 1
+                result, repo_logger, err, state = future.result()
 
-        for repo_data in self._repositories_data:
-            repos_processed += 1
-            try:
                 self.logger.info(shell_utils.get_cli_separator(), date=False)
                 self.logger.info("%s/%s" % (repos_processed, repos_count), date=False)
+                repo_logger.flush(self.logger)
 
-                repo_path = self._get_path(repo_data)
-                repo_parent = os.path.dirname(repo_path)
-
-                if not os.path.exists(repo_parent):
-                    os.makedirs(repo_parent)
-
-                # START USING THIS WHEN GIT GAINS SOME FREAKING SENSE!!!
-                # If the repository path exists, check if it is a valid repository
-                # and proceed to attempt to pull from it.
-                # p = cmd_utils.run_cmd(self._get_check_repo_cmd(repo_data.get("repo_type", "git")),
-                #                       stdout=DEVNULL,
-                #                       stderr=DEVNULL,
-                #                       cwd=repo_path)
-                if not file_utils.is_real_dir(repo_path):
-                    # If the repository path doesn't exists, attempt to clone the
-                    # repository and get out of the loop.
-                    self.logger.warning("<%s-%s> doesn't seem to exist." %
-                                        (repo_data.get("repo_owner"), repo_data.get("repo_name")))
-                    self.logger.info("Cloning repository...")
-                    self._do_clone(repo_data)
-                    continue
+                if state and not self._dry_run:
+                    self._repositories_state.setdefault(
+                        self._get_repo_state_key(repo_data), {}).update(state)
 
-                if do_not_pull:
+                if result == "omitted":
                     repos_omitted += 1
-                    continue
-
-                # Do the wrong thing until Git allows me to do the right thing.
-                # Check for the .git or .hg directories to decide if a folder is a repository.
-                if file_utils.is_real_dir(os.path.join(repo_path, ".%s" %
-                                                       repo_data.get("repo_type", "git"))):
-                    self.logger.info("Pulling from <%s-%s> repository." %
-                                     (repo_data.get("repo_owner"), repo_data.get("repo_name")))
-                    self._do_pull(repo_data)
-                else:
-                    warnings.append(repo_path)
-                    self.logger.warning("Manual intervention required!")
-                    self.logger.warning("The following path doesn't seem to be a repository:")
-                    self.logger.warning(repo_path)
-            except Exception as err:
-                errors.append((err, repo_data))
-                self.logger.error(err)
-                self.logger.error(repo_path)
-                continue
-            except KeyboardInterrupt:
-                raise exceptions.KeyboardInterruption()
+                elif result == "unchanged":
+                    repos_unchanged += 1
+                elif result == "warning":
+                    warnings.append(self._get_path(repo_data))
+                elif result == "error":
+                    errors.append((err, repo_data))
+        except KeyboardInterrupt:
+            raise exceptions.KeyboardInterruption()
+        finally:
+            self._save_repositories_state()
 
         if warnings:
             self.logger.warning("Manual intervention required!")
@@ -627,9 +1089,107 @@ class RepositoriesHandler():
         if repos_omitted > 0:
             self.logger.info("%d repositories omitted from pulling." % repos_omitted)
 
-    def build_sphinx_docs(self):
+        if repos_unchanged > 0:
+            self.logger.info("%d unchanged repositories omitted from pulling." % repos_unchanged)
+
+    def _get_sphinx_docs_fingerprint(self, repo_data, sources_path, hash_index):
+        """Get the fingerprint of the sources of a Sphinx documentation.
+
+        Parameters
+        ----------
+        repo_data : dict
+            Repository data.
+        sources_path : str
+            Path to the documentation sources.
+        hash_index : hash_utils.FileHashIndex
+            Index used to get the file hashes.
+
+        Returns
+        -------
+        str
+            A digest of the repository data, the sources (including file names) and the conf.py
+            file.
+        """
+        conf_path = os.path.join(sources_path, "conf.py")
+        fingerprint = [
+            self._get_repo_data_digest(repo_data),
+            hash_utils.dir_hash(sources_path,
+                                ignored_dirs=custom_copytree_global_ignored_patterns,
+                                include_names=True,
+                                hash_index=hash_index),
+            hash_index.get_hash(conf_path) if os.path.isfile(conf_path) else None
+        ]
+
+        return hashlib.sha1(json.dumps(fingerprint).encode("utf-8")).hexdigest()
+
+    def _build_sphinx_docs(self, cmd, cwd):
+        """Build a Sphinx documentation.
+
+        Parameters
+        ----------
+        cmd : list
+            The ``sphinx-build`` command.
+        cwd : str
+            Path to the documentation sources.
+
+        Returns
+        -------
+        tuple
+            The logger holding the messages logged while building the documentation (see
+            :any:`log_system.BufferedLogSystem`), whether it was built and the build duration.
+        """
+        logger = log_system.BufferedLogSystem()
+        start = time.time()
+
+        try:
+            result = cmd_utils.run_cmd(cmd, stdout=PIPE, stderr=STDOUT, cwd=cwd,
+                                       universal_newlines=True)
+        except Exception as err:
+            logger.error(err)
+            return logger, False, time.time() - start
+
+        duration = time.time() - start
+
+        if result.returncode:
+            logger.error("Command failed with exit status %d." % result.returncode)
+            logger.error(result.stdout, date=False)
+            return logger, False, duration
+
+        warnings = [line for line in result.stdout.splitlines() if "WARNING:" in line]
+
+        if warnings:
+            logger.warning("%d warning/s:" % len(warnings))
+            logger.warning("\n".join(warnings), date=False)
+
+        logger.success("Built in %.2f seconds." % duration)
+
+        return logger, True, duration
+
+    def build_sphinx_docs(self, full=False, workers=None):
         """Build Sphinx documentation.
+
+        The documentation of a repository is only built if its sources (see
+        :any:`RepositoriesHandler._get_sphinx_docs_fingerprint`) changed since it was last built.
+        Documentations are built in parallel and each build uses several processes
+        (``sphinx-build -j``).
+
+        Parameters
+        ----------
+        full : bool, optional
+            Build all documentations, even the ones whose sources didn't change.
+        workers : int, optional
+            Maximum amount of documentations built at the same time. Default: a quarter of the
+            amount of CPUs (at least 1). The CPUs are shared between the builds.
         """
+        from concurrent.futures import ThreadPoolExecutor
+
+        cpu_count = os.cpu_count() or 1
+        workers = workers or max(1, cpu_count // 4)
+        sphinx_jobs = max(1, cpu_count // workers)
+        hash_index = hash_utils.FileHashIndex(repositories_file_hashes_path)
+        builds = []
+        repos_unchanged = 0
+
         for repo_data in [repo for repo in self._repositories_data
                           if repo.get("repo_handler") == "sphinx_docs"]:
             self.logger.info(shell_utils.get_cli_separator("-"), date=False)
@@ -642,20 +1202,89 @@ class RepositoriesHandler():
             html_path = os.path.join(app_utils.PATHS["www_base"],
                                      self._get_sphinx_generated_pages_storage(repo_data), "html")
 
-            cmd = ["sphinx-build", ".", "-b", "html", "-d", doctrees_path, html_path]
+            cmd = ["sphinx-build", ".", "-b", "html", "-j", str(sphinx_jobs),
+                   "-d", doctrees_path, html_path]
             cwd = os.path.join(self._get_path(repo_data), repo_data.get("repo_sources_path", ""))
 
+            try:
+                fingerprint = self._get_sphinx_docs_fingerprint(repo_data, cwd, hash_index)
+            except Exception as err:
+                self.logger.error(err)
+                continue
+
+            state = self._repositories_state.get(self._get_repo_state_key(repo_data), {})
+
+            if not full and state.get("sphinx_docs_fingerprint") == fingerprint and \
+                    os.path.isdir(html_path):
+                self.logger.info("Sources unchanged since the last build.", date=False)
+                repos_unchanged += 1
+                continue
+
             if self._dry_run:
                 self.logger.log_dry_run("Command that will be executed:\n%s" % cmd)
                 self.logger.log_dry_run("Command will be executed on directory:\n%s" % cwd)
-            else:
-                cmd_utils.run_cmd(cmd,
-                                  stdout=None,
-                                  stderr=None,
-                                  cwd=cwd)
+                continue
+
+            builds.append((repo_data, cmd, cwd, html_path, fingerprint))
+
+        build_times = []
+
+        if builds:
+            self.logger.info(shell_utils.get_cli_separator("-"), date=False)
+            self.logger.info(
+                "Building %d Sphinx documentation/s (%d at a time, %d processes each)." %
+                (len(builds), workers, sphinx_jobs))
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(lambda build: self._build_sphinx_docs(*build[1:3]), builds)
+
+                try:
+                    for (repo_data, cmd, cwd, html_path, fingerprint), (logger, built, duration) \
+                            in zip(builds, results):
+                        self.logger.info(shell_utils.get_cli_separator("-"), date=False)
+                        self.logger.info("Repository: %s-%s" %
+                                         (repo_data.get("repo_owner"), repo_data.get("repo_name")),
+                                         date=False)
+                        logger.flush(self.logger)
+                        build_times.append((duration, repo_data, built))
+
+                        if not built:
+                            continue
+
+                        if repo_data.get("kb_file_append", []):
+                            self._append_data_to_files(html_path, repo_data)
+
+                        self._repositories_state.setdefault(
+                            self._get_repo_state_key(repo_data), {}).update({
+                                "sphinx_docs_fingerprint": fingerprint,
+                                "sphinx_docs_build_time": round(duration, 2)
+                            })
+                except (KeyboardInterrupt, SystemExit):
+                    raise exceptions.KeyboardInterruption()
+
+        if not self._dry_run:
+            self._save_repositories_state()
+
+            try:
+                hash_index.save()
+            except Exception as err:
+                self.logger.error(err)
+
+        self.logger.info(shell_utils.get_cli_separator("-"), date=False)
+
+        if repos_unchanged > 0:
+            self.logger.info("%d Sphinx documentation/s with unchanged sources omitted." %
+                             repos_unchanged)
+
+        if build_times:
+            self.logger.info("Build times (%.2f seconds in total):" %
+                             sum(build[0] for build in build_times))
 
-            if repo_data.get("kb_file_append", []):
-                self._append_data_to_files(html_path, repo_data)
+            for duration, repo_data, built in sorted(build_times, key=lambda build: -build[0]):
+                self.logger.info("%8.2fs %s-%s%s" % (duration,
+                                                     repo_data.get("repo_owner"),
+                                                     repo_data.get("repo_name"),
+                                                     "" if built else " (failed)"), date=False)
 
     def get_data_tables_obj(self):
         """Obtain the JSON data generated for all repositories.
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""Persistent scan manifest used to incrementally generate the data_tables.json file.
+
+Attributes
+----------
+ENTRY_DIR : int
+    Entry type of a real directory.
+ENTRY_DIR_LINK : int
+    Entry type of a symbolic link pointing to a directory.
+ENTRY_FILE : int
+    Entry type of a real file (or any other non-directory entry that isn't a symbolic link).
+ENTRY_FILE_LINK : int
+    Entry type of a symbolic link not pointing to a directory (including dangling symbolic links).
+MANIFEST_VERSION : int
+    Manifest format version. Manifests stored with a different version are discarded.
+RACY_THRESHOLD : float
+    Directories modified less than this amount of seconds before being listed aren't trusted on
+    the next run. Their modification time might not reflect changes made right after listing them.
+"""
+import json
+import os
+import time
+
+from threading import Lock
+
+from .python_utils import file_utils
+
+from stat import S_ISDIR
+
+ENTRY_FILE = 0
+ENTRY_DIR = 1
+ENTRY_FILE_LINK = 2
+ENTRY_DIR_LINK = 3
+
+MANIFEST_VERSION = 2
+
+RACY_THRESHOLD = 2.0
+
+
+def get_file_signature(file_path):
+    """Get file signature.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a file.
+
+    Returns
+    -------
+    list|None
+        A list containing the modification time (in nanoseconds) and the size of a file. None if
+        the file doesn't exist.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ScanManifest():
+    """Scan manifest.
+
+    It keeps a record of the modification time and the entries of every directory listed
+    through :any:`ScanManifest.list_dir`. On the next run, a directory whose modification time
+    didn't change is not listed again; its recorded entries are used instead.
+
+    An instance can be shared between threads as long as each thread lists different directories.
+
+    A directory modification time only changes when entries are added, removed or renamed
+    inside it, which is exactly the information needed to generate the data_tables.json file.
+
+    The data of each source (see :any:`ScanManifest.get_source_data`) is stored in its own
+    file inside a folder next to the manifest file. The manifest only stores the signatures of
+    the files the data was generated from.
+
+    Attributes
+    ----------
+    logger : LogSystem
+        The logger.
+    stats : dict
+        Amount of directories that were reused from the manifest and amount of directories that
+        were listed again.
+    """
+
+    def __init__(self, manifest_path, full=False, dry_run=False, logger=None):
+        """Initialize.
+
+        Parameters
+        ----------
+        manifest_path : str
+            Path to the manifest file.
+        full : bool, optional
+            Ignore the stored manifest. All directories will be listed again.
+        dry_run : bool, optional
+            Do not store the data of the sources.
+        logger : LogSystem
+            The logger.
+        """
+        self.logger = logger
+        self.stats = {
+            "reused": 0,
+            "rescanned": 0
+        }
+        self._manifest_path = manifest_path
+        self._sources_path = os.path.splitext(manifest_path)[0] + "_sources"
+        self._dry_run = dry_run
+        self._old_dirs = {}
+        self._old_sources = {}
+        self._dirs = {}
+        self._sources = {}
+        self._stats_lock = Lock()
+
+        if not full:
+            self._load()
+
+    def _load(self):
+        """Load the stored manifest.
+        """
+        try:
+            with open(self._manifest_path, "r", encoding="UTF-8") as manifest_file:
+                manifest = json.loads(manifest_file.read())
+
+            if manifest.get("version") == MANIFEST_VERSION:
+                self._old_dirs = manifest.get("dirs", {})
+                self._old_sources = manifest.get("sources", {})
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            self.logger.warning("Discarding unreadable scan manifest.")
+            self.logger.warning(err, date=False)
+
+    def save(self):
+        """Save the manifest.
+
+        Only the directories and sources visited during the current run are stored. Directories
+        that were removed are dropped from the manifest this way.
+        """
+        manifest_parent = os.path.dirname(self._manifest_path)
+
+        if not os.path.exists(manifest_parent):
+            os.makedirs(manifest_parent)
+
+        with file_utils.atomic_write(self._manifest_path) as manifest_file:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "dirs": self._dirs,
+                "sources": self._sources
+            }, manifest_file)
+
+    def list_dir(self, dir_path, rel_path):
+        """List directory.
+
+        Parameters
+        ----------
+        dir_path : str
+            Path to a directory.
+        rel_path : str
+            Path used as the directory key inside the manifest.
+
+        Returns
+        -------
+        dict
+            The entries of a directory. A dictionary mapping entry names to entry types.
+            An empty dictionary if ``dir_path`` cannot be listed.
+        """
+        # Directory already listed during the current run.
+        if rel_path in self._dirs:
+            return self._dirs[rel_path]["e"]
+
+        try:
+            dir_stat = os.stat(dir_path)
+        except OSError:
+            return {}
+
+        if not S_ISDIR(dir_stat.st_mode):
+            return {}
+
+        mtime_ns = dir_stat.st_mtime_ns
+        record = self._old_dirs.get(rel_path)
+        reused = record is not None and record["m"] == mtime_ns
+
+        with self._stats_lock:
+            self.stats["reused" if reused else "rescanned"] += 1
+
+        if not reused:
+            try:
+                entries = self._scan_entries(dir_path)
+            except OSError:
+                return {}
+
+            record = {
+                # Do not store the modification time of directories modified right before
+                # being listed. They will be listed again on the next run.
+                "m": None if time.time() - mtime_ns / 1e9 < RACY_THRESHOLD else mtime_ns,
+                "e": entries
+            }
+
+        self._dirs[rel_path] = record
+
+        return record["e"]
+
+    def _scan_entries(self, dir_path):
+        """Scan directory entries.
+
+        Parameters
+        ----------
+        dir_path : str
+            Path to a directory.
+
+        Returns
+        -------
+        dict
+            A dictionary mapping entry names to entry types.
+        """
+        entries = {}
+
+        # NOTE: DirEntry objects cache the entry type returned by the system when listing a
+        # directory. Only symbolic links require an additional system call to know their target.
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    entries[entry.name] = ENTRY_DIR_LINK if entry.is_dir() else ENTRY_FILE_LINK
+                else:
+                    entries[entry.name] = ENTRY_DIR if entry.is_dir() else ENTRY_FILE
+
+        return entries
+
+    def walk(self, dir_path, rel_path):
+        """Walk a directory tree bottom-up.
+
+        It mimics :any:`os.walk` (with ``topdown=False`` and ``followlinks=False``), but sub-directories
+        and file names are always sorted so the generated data is always the same.
+
+        Parameters
+        ----------
+        dir_path : str
+            Path to a directory.
+        rel_path : str
+            Path used as the directory key inside the manifest.
+
+        Yields
+        ------
+        tuple
+            The relative path of a directory and its entries (see :any:`ScanManifest.list_dir`).
+        """
+        entries = self.list_dir(dir_path, rel_path)
+
+        for name in sorted(entries):
+            if entries[name] == ENTRY_DIR:
+                yield from self.walk(os.path.join(dir_path, name), os.path.join(rel_path, name))
+
+        yield rel_path, entries
+
+    def get_source_data(self, source_name, file_paths, data_getter):
+        """Get source data.
+
+        Parameters
+        ----------
+        source_name : str
+            A source name.
+        file_paths : list
+            Paths to the files from which the data of a source is generated.
+        data_getter : method
+            Function called to generate the data of a source when any of the files in
+            ``file_paths`` changed since the data was stored.
+
+        Returns
+        -------
+        list
+            The data of a source.
+        """
+        # NOTE: Get the signature before generating the data. If a file changes while the data
+        # is being generated, the data will be generated again on the next run.
+        signature = [get_file_signature(file_path) for file_path in file_paths]
+        record = self._old_sources.get(source_name)
+        data_path = os.path.join(self._sources_path, source_name + ".json")
+        self._sources[source_name] = {"s": signature}
+
+        if record is not None and record["s"] == signature:
+            try:
+                with open(data_path, "r", encoding="UTF-8") as data_file:
+                    return json.loads(data_file.read())
+            except (OSError, ValueError):
+                pass
+
+        data = data_getter()
+
+        # NOTE: The data is stored right away instead of when the manifest is saved, so it
+        # doesn't need to be kept in memory until then. The manifest is the one that decides if
+        # the stored data is reused, so storing data that ends up not being used is harmless.
+        if not self._dry_run:
+            if not os.path.exists(self._sources_path):
+                os.makedirs(self._sources_path)
+
+            with file_utils.atomic_write(data_path) as data_file:
+                file_utils.dump_json_array(data, data_file)
+
+        return data
+
+
+def is_dir_entry(entry_type, follow_links=False):
+    """Check if an entry type is a directory.
+
+    Parameters
+    ----------
+    entry_type : int
+        An entry type.
+    follow_links : bool, optional
+        Whether to consider symbolic links pointing to directories as directories.
+
+    Returns
+    -------
+    bool
+        If the entry type is a directory.
+    """
+    return entry_type == ENTRY_DIR or (follow_links and entry_type == ENTRY_DIR_LINK)
+
+
+if __name__ == "__main__":
+    pass
@@ -86,7 +86,7 @@ archives_schema = {
                     "--bzip2",
                     "-j"
                 ],
-                "description": "The decompress argument used by the ``tar`` program."
+                "description": "The compression of a tar archive. It's detected automatically, so this key is optional."
             }
         }
     }
@@ -123,6 +123,10 @@ repositories_schema = {
                 "type": "boolean",
                 "description": "Whether to copy the full repository to its final location or not."
             },
+            "copy_strategy": {
+                "enum": ["reflink", "hardlink", "symlink", "copy"],
+                "description": "How to place the repository files at their final location. The strategies are attempted in the listed order starting at the chosen one."
+            },
             "repo_handler": {
                 "enum": ["files", "sphinx_docs", "code_recipes"],
                 "description": "Repository handler."
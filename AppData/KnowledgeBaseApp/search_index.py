@@ -0,0 +1,1199 @@
+# -*- coding: utf-8 -*-
+"""Full-text search index of the documents listed in the data_tables.json file.
+
+The index is stored in a single binary file that is memory mapped by the web application.
+The file layout is the following (all integers are little endian, on big endian systems the
+arrays are byte swapped when they are read instead of being used directly from the memory map):
+
+- Header (see :any:`HEADER`).
+- Documents data. A JSON list containing one ``[path, title, category, handler, source,
+  mtime_ns, size]`` list per document. The index of a document in this list is its ID.
+- Documents length. One unsigned 32 bits integer per document (the amount of tokens).
+- Excerpts. One unsigned 64 bits integer per document, plus one, with the offset of the
+  excerpt of each document (relative to the end of the offsets), followed by the UTF-8
+  encoded excerpts. An excerpt is the beginning of the text of a document (see
+  :any:`EXCERPT_SIZE`). Search result snippets are built from it.
+- Postings. For each term, the IDs of the documents containing the term (sorted, unsigned 32
+  bits integers) followed by the frequency of the term in each of these documents (unsigned 16
+  bits integers). Terms found in many documents are followed by their champion list: the IDs
+  of the :any:`CHAMPION_LIST_SIZE` documents in which the term has the highest scores (sorted,
+  unsigned 32 bits integers).
+- Lexicon. For each term (sorted), the term length (unsigned 16 bits integer), the UTF-8
+  encoded term, its documents frequency (unsigned 32 bits integer), the offset of its
+  postings (unsigned 64 bits integer) and the highest score of the term in a document that
+  isn't in its champion list (double, 0 if the term has no champion list).
+- Lexicon offsets. One unsigned 64 bits integer per term pointing to its lexicon entry.
+  Used to binary search the lexicon.
+
+Note
+----
+This module is imported by the web application, which isn't executed as part of the
+``KnowledgeBaseApp`` package. It should only import modules from the standard library
+(and from ``python_utils``, which is importable from both places).
+
+Attributes
+----------
+CHAMPION_LIST_SIZE : int
+    Size of the champion lists. A champion list holds the documents in which a term has the
+    highest scores (see :any:`SearchIndex.search`).
+EXCERPT_SIZE : int
+    Maximum amount of characters of the excerpt of a document stored in the index.
+HEADER : struct.Struct
+    The index header. Magic bytes, format version, amount of documents, amount of terms,
+    average document length and the offsets of each section.
+INDEXABLE_EXTENSIONS : tuple
+    Extensions of the files that are indexed.
+INDEX_VERSION : int
+    Index format version.
+TITLE_WEIGHT : int
+    How many times the terms found in a document title are counted.
+"""
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+from array import array
+from bisect import bisect_left
+from html import escape as html_escape
+from html.parser import HTMLParser
+from threading import Lock
+
+try:
+    from .python_utils import file_utils
+except (ImportError, SystemError):
+    from python_utils import file_utils
+
+CHAMPION_LIST_SIZE = 256
+EXCERPT_SIZE = 400
+HEADER = struct.Struct("<4sIIIdQQQQQQQ")
+INDEX_VERSION = 3
+INDEXABLE_EXTENSIONS = (".md", ".markdown", ".rst", ".txt", ".html", ".htm")
+TITLE_WEIGHT = 3
+
+_magic = b"KBSI"
+_lexicon_entry_head = struct.Struct("<H")
+_lexicon_entry_tail = struct.Struct("<IQd")
+_token_re = re.compile(r"\w{2,40}")
+_max_tf = 65535
+_bm25_k1 = 1.2
+_bm25_b = 0.75
+_little_endian = sys.byteorder == "little"
+# NOTE: The postings of terms found in less documents than this are cheap to score entirely,
+# so they don't get a champion list. Scoring them entirely also makes it more likely that the
+# champion lists of the other query terms are enough.
+_champion_list_min_df = CHAMPION_LIST_SIZE * 16
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Extract the text of an HTML document ignoring scripts and styles.
+    """
+
+    def __init__(self):
+        """Initialize.
+        """
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._ignore_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._ignore_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._ignore_depth:
+            self._ignore_depth -= 1
+
+    def handle_data(self, data):
+        if not self._ignore_depth:
+            self.parts.append(data)
+
+
+def _to_le_bytes(values):
+    """Get the bytes of an array in little endian byte order.
+
+    Parameters
+    ----------
+    values : array.array
+        An array of integers.
+
+    Returns
+    -------
+    bytes
+        The array items in little endian byte order.
+    """
+    if not _little_endian:
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def _cast_le(view, typecode):
+    """Get the integers stored in little endian byte order in a memory view.
+
+    Parameters
+    ----------
+    view : memoryview
+        A view of the bytes of the integers.
+    typecode : str
+        The type code of the integers (see :any:`array.array`).
+
+    Returns
+    -------
+    memoryview|array.array
+        The integers. A view of the same memory in little endian systems and a byte swapped
+        copy in big endian systems.
+    """
+    if _little_endian:
+        return view.cast(typecode)
+
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+
+    return values
+
+
+def _get_bm25_params(n_docs, df, avgdl):
+    """Get the parameters used to score the documents containing a term.
+
+    The score of a document is ``idf * tf * (k1 + 1) / (tf + norm + length_norm * doclen)``.
+    The same parameters (and the same operations) are used when building the champion lists
+    and when searching, so both get exactly the same scores.
+
+    Parameters
+    ----------
+    n_docs : int
+        Amount of documents in the index.
+    df : int
+        Amount of documents containing the term.
+    avgdl : float
+        Average document length.
+
+    Returns
+    -------
+    tuple
+        The inverse document frequency, the length independent part of the normalization and
+        the length normalization factor.
+    """
+    return (math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)),
+            _bm25_k1 * (1.0 - _bm25_b),
+            _bm25_k1 * _bm25_b / avgdl)
+
+
+def _get_champions(doc_ids, tfs, doclens, idf, norm, length_norm):
+    """Get the champion list of a term.
+
+    Parameters
+    ----------
+    doc_ids : array.array
+        The IDs of the documents containing the term.
+    tfs : array.array
+        The frequency of the term in each document.
+    doclens : array.array
+        Documents length.
+    idf : float
+        See :any:`_get_bm25_params`.
+    norm : float
+        See :any:`_get_bm25_params`.
+    length_norm : float
+        See :any:`_get_bm25_params`.
+
+    Returns
+    -------
+    tuple
+        The sorted IDs of the :any:`CHAMPION_LIST_SIZE` documents with the highest scores and
+        the highest score of the remaining documents.
+    """
+    scores = [idf * tf * (_bm25_k1 + 1.0) / (tf + norm + length_norm * doclens[doc_id])
+              for doc_id, tf in zip(doc_ids, tfs)]
+    # NOTE: heapq.nlargest keeps the first of equal items, so documents with the same score
+    # are ranked by ID, like the search results (see _get_top).
+    top = heapq.nlargest(CHAMPION_LIST_SIZE + 1, range(len(scores)), key=scores.__getitem__)
+
+    return array("I", sorted(doc_ids[i] for i in top[:-1])), scores[top[-1]]
+
+
+def _get_top(scores, matches, n_terms, k):
+    """Get the best search results.
+
+    Results are ranked by score, then by document ID.
+
+    Parameters
+    ----------
+    scores : dict
+        BM25 score of each document.
+    matches : dict
+        Amount of query terms found in each document.
+    n_terms : int
+        Amount of query terms.
+    k : int
+        Amount of results to get.
+
+    Returns
+    -------
+    list
+        The ``k`` best documents as (document ID, score) tuples. The score of a document is
+        its BM25 score weighted by the fraction of the query terms that it contains.
+    """
+    return [(-neg_doc_id, score) for score, neg_doc_id in heapq.nlargest(
+        k, [(score * matches[doc_id] / n_terms, -doc_id) for doc_id, score in scores.items()])]
+
+
+def is_indexable(rel_path):
+    """Check if a file should be indexed.
+
+    Parameters
+    ----------
+    rel_path : str
+        Path to a file.
+
+    Returns
+    -------
+    bool
+        If the file should be indexed.
+    """
+    return rel_path.lower().endswith(INDEXABLE_EXTENSIONS)
+
+
+def get_document_text(file_path, max_size=None):
+    """Get the text of a document.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a file.
+    max_size : int, optional
+        Maximum amount of characters to read.
+
+    Returns
+    -------
+    str
+        The text of the document. HTML documents are stripped of their tags. Other documents
+        are returned as is.
+    """
+    with open(file_path, "r", encoding="UTF-8", errors="replace") as doc_file:
+        text = doc_file.read() if max_size is None else doc_file.read(max_size)
+
+    if file_path.lower().endswith((".html", ".htm")):
+        extractor = _HTMLTextExtractor()
+        extractor.feed(text)
+        extractor.close()
+        text = " ".join(extractor.parts)
+
+    return text
+
+
+def tokenize(text):
+    """Split a text into lower cased terms.
+
+    Parameters
+    ----------
+    text : str
+        The text to tokenize.
+
+    Returns
+    -------
+    list
+        The terms.
+    """
+    return _token_re.findall(text.lower())
+
+
+def get_term_frequencies(file_path, title):
+    """Get the frequency of each term in a document.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a file.
+    title : str
+        The document title. Its terms are counted :any:`TITLE_WEIGHT` times.
+
+    Returns
+    -------
+    tuple
+        A dictionary mapping terms to their frequencies (capped to fit in 16 bits), the
+        document length and the document excerpt (see :any:`EXCERPT_SIZE`). None if the file
+        couldn't be read.
+    """
+    try:
+        text = get_document_text(file_path)
+    except Exception:
+        return None
+
+    tokens = tokenize(text)
+    # NOTE: Only the beginning of the text is needed. Each whitespace run is at least one
+    # character long, so the excerpt can't be longer than the normalized part of the text.
+    excerpt = " ".join(text[:EXCERPT_SIZE * 8].split())[:EXCERPT_SIZE]
+
+    frequencies = {}
+
+    for token in tokens:
+        frequencies[token] = frequencies.get(token, 0) + 1
+
+    for token in tokenize(title):
+        frequencies[token] = frequencies.get(token, 0) + TITLE_WEIGHT
+
+    for token, tf in frequencies.items():
+        if tf > _max_tf:
+            frequencies[token] = _max_tf
+
+    return frequencies, len(tokens), excerpt
+
+
+def _get_term_frequencies_job(job):
+    """See :any:`get_term_frequencies`. Used by process pools.
+
+    Parameters
+    ----------
+    job : tuple
+        The arguments for :any:`get_term_frequencies`.
+
+    Returns
+    -------
+    tuple
+        See :any:`get_term_frequencies`.
+    """
+    return get_term_frequencies(*job)
+
+
+class SearchIndex():
+    """Memory mapped full-text search index.
+
+    The index file is opened on first use and opened again every time it changes on disk.
+
+    Attributes
+    ----------
+    index_path : str
+        Path to the index file.
+    """
+
+    def __init__(self, index_path):
+        """Initialize.
+
+        Parameters
+        ----------
+        index_path : str
+            Path to the index file.
+        """
+        self.index_path = index_path
+        self._lock = Lock()
+        self._signature = None
+        self._data = None
+
+    def ensure_loaded(self):
+        """Open the index file if it wasn't opened yet or if it changed since it was opened.
+        """
+        self._get_data()
+
+    def _get_data(self):
+        """Get the index data, opening the index file again if it changed.
+
+        Returns
+        -------
+        dict|None
+            The index data. None if there is no index file.
+        """
+        try:
+            stat = os.stat(self.index_path)
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            signature = None
+
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._data = self._open() if signature is not None else None
+                    self._signature = signature
+
+        return self._data
+
+    def _open(self):
+        """Open and memory map the index file.
+
+        Returns
+        -------
+        dict|None
+            The index data. None if the index file is invalid.
+
+        Note
+        ----
+        Memory maps of replaced index files are not closed explicitly. Requests being served
+        might still be using them; they are closed when they are garbage collected.
+        """
+        with open(self.index_path, "rb") as index_file:
+            try:
+                mm = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file.
+                return None
+
+        if len(mm) < HEADER.size:
+            return None
+
+        (magic, version, n_docs, n_terms, avgdl, off_docs, len_docs, off_doclens,
+         off_excerpts, off_postings, off_lexicon,
+         off_lexicon_offsets) = HEADER.unpack_from(mm, 0)
+
+        if magic != _magic or version != INDEX_VERSION:
+            return None
+
+        view = memoryview(mm)
+
+        return {
+            "mm": mm,
+            "n_docs": n_docs,
+            "n_terms": n_terms,
+            "avgdl": avgdl or 1.0,
+            "docs": json.loads(mm[off_docs:off_docs + len_docs].decode("UTF-8")),
+            "doclens": _cast_le(view[off_doclens:off_doclens + n_docs * 4], "I"),
+            "excerpt_offsets": _cast_le(view[off_excerpts:off_excerpts + (n_docs + 1) * 8], "Q"),
+            "excerpts_start": off_excerpts + (n_docs + 1) * 8,
+            "lexicon_offsets": _cast_le(view[off_lexicon_offsets:
+                                             off_lexicon_offsets + n_terms * 8], "Q")
+        }
+
+    def get_docs(self):
+        """Get the data of all indexed documents.
+
+        Returns
+        -------
+        list
+            See the documents data section of the module description.
+        """
+        data = self._get_data()
+
+        return data["docs"] if data else []
+
+    def get_excerpt(self, doc_id):
+        """Get the excerpt of a document.
+
+        Parameters
+        ----------
+        doc_id : int
+            A document ID.
+
+        Returns
+        -------
+        str
+            The beginning of the text of the document (see :any:`EXCERPT_SIZE`).
+        """
+        data = self._get_data()
+
+        if not data:
+            return ""
+
+        return self._read_excerpt(data, doc_id)
+
+    def _read_excerpt(self, data, doc_id):
+        """Read the excerpt of a document.
+
+        Parameters
+        ----------
+        data : dict
+            The index data.
+        doc_id : int
+            A document ID.
+
+        Returns
+        -------
+        str
+            The excerpt of the document.
+        """
+        excerpt_offsets = data["excerpt_offsets"]
+        start = data["excerpts_start"]
+
+        return data["mm"][start + excerpt_offsets[doc_id]:
+                          start + excerpt_offsets[doc_id + 1]].decode("UTF-8")
+
+    def _read_lexicon_entry(self, data, offset):
+        """Read a lexicon entry.
+
+        Parameters
+        ----------
+        data : dict
+            The index data.
+        offset : int
+            The offset of the entry in the index file.
+
+        Returns
+        -------
+        tuple
+            The term, its documents frequency, the offset of its postings and the highest score
+            outside its champion list.
+        """
+        mm = data["mm"]
+        term_length = _lexicon_entry_head.unpack_from(mm, offset)[0]
+        term_start = offset + _lexicon_entry_head.size
+        term = mm[term_start:term_start + term_length].decode("UTF-8")
+        df, postings_offset, bound = _lexicon_entry_tail.unpack_from(mm, term_start + term_length)
+
+        return term, df, postings_offset, bound
+
+    def _read_postings(self, data, df, postings_offset):
+        """Read the postings of a term.
+
+        Parameters
+        ----------
+        data : dict
+            The index data.
+        df : int
+            Amount of documents containing the term.
+        postings_offset : int
+            The offset of the postings in the index file.
+
+        Returns
+        -------
+        tuple
+            The IDs of the documents containing the term and the frequency of the term in
+            each document.
+        """
+        view = memoryview(data["mm"])
+        tfs_offset = postings_offset + df * 4
+
+        return (_cast_le(view[postings_offset:tfs_offset], "I"),
+                _cast_le(view[tfs_offset:tfs_offset + df * 2], "H"))
+
+    def _read_champions(self, data, df, postings_offset):
+        """Read the champion list of a term.
+
+        Parameters
+        ----------
+        data : dict
+            The index data.
+        df : int
+            Amount of documents containing the term. The term must have a champion list.
+        postings_offset : int
+            The offset of the postings in the index file.
+
+        Returns
+        -------
+        memoryview|array.array
+            The sorted IDs of the documents in which the term has the highest scores.
+        """
+        champions_offset = postings_offset + df * 6
+
+        return _cast_le(memoryview(data["mm"])[champions_offset:
+                                               champions_offset + CHAMPION_LIST_SIZE * 4], "I")
+
+    def _lookup(self, data, term):
+        """Binary search a term in the lexicon.
+
+        Parameters
+        ----------
+        data : dict
+            The index data.
+        term : str
+            The term to search.
+
+        Returns
+        -------
+        tuple|None
+            The documents frequency, the postings offset and the highest score outside the
+            champion list of the term. None if the term isn't in the index.
+        """
+        lexicon_offsets = data["lexicon_offsets"]
+        low, high = 0, data["n_terms"]
+
+        while low < high:
+            mid = (low + high) // 2
+            mid_term, df, postings_offset, bound = self._read_lexicon_entry(
+                data, lexicon_offsets[mid])
+
+            if mid_term < term:
+                low = mid + 1
+            elif mid_term > term:
+                high = mid
+            else:
+                return df, postings_offset, bound
+
+        return None
+
+    def iter_terms(self):
+        """Iterate over all terms in lexicographical order.
+
+        Yields
+        ------
+        tuple
+            A term, the IDs of the documents containing the term and the frequency of the term
+            in each document.
+        """
+        data = self._get_data()
+
+        if not data:
+            return
+
+        for offset in data["lexicon_offsets"]:
+            term, df, postings_offset, bound = self._read_lexicon_entry(data, offset)
+
+            yield (term,) + self._read_postings(data, df, postings_offset)
+
+    def get_doc_lengths(self):
+        """Get the amount of tokens of all indexed documents.
+
+        Returns
+        -------
+        memoryview|list
+            The length of each document indexed by document ID.
+        """
+        data = self._get_data()
+
+        return data["doclens"] if data else []
+
+    def search(self, query, limit=20, offset=0, snippets=True):
+        """Search the index.
+
+        Documents are ranked with BM25. Documents matching more of the query terms are ranked
+        higher. When the champion lists of the query terms are enough to know the best results,
+        the other documents containing these terms aren't scored (see
+        :any:`SearchIndex._score_champions`).
+
+        Parameters
+        ----------
+        query : str
+            The search query.
+        limit : int, optional
+            Maximum amount of results to return.
+        offset : int, optional
+            Amount of results to skip.
+        snippets : bool, optional
+            Add a snippet of the document text to each result (see :any:`make_snippet`). The
+            snippets are built from the excerpts stored in the index, documents aren't read.
+
+        Returns
+        -------
+        dict
+            The search results.
+        """
+        start_time = time.perf_counter()
+        data = self._get_data()
+        terms = list(dict.fromkeys(tokenize(query)))
+        results = []
+        total = 0
+
+        if data and terms:
+            terms_data = []
+
+            for term in terms:
+                entry = self._lookup(data, term)
+
+                if entry is None:
+                    continue
+
+                df, postings_offset, bound = entry
+                champions = None
+
+                if bound:
+                    champions = self._read_champions(data, df, postings_offset)
+
+                terms_data.append(self._read_postings(data, df, postings_offset) +
+                                  _get_bm25_params(data["n_docs"], df, data["avgdl"]) +
+                                  (bound, champions))
+
+            scored = None
+
+            # NOTE: Scoring every posting of common terms is what makes searches slow, so the
+            # champion lists are tried first and the full scan is only a fallback.
+            if offset + limit <= CHAMPION_LIST_SIZE:
+                scored = self._score_champions(data, terms_data, len(terms), offset + limit)
+
+            if scored is None:
+                scored = self._score_all(data, terms_data, len(terms), offset + limit)
+
+            top, total = scored
+
+            for doc_id, score in top[offset:]:
+                path, title, category, handler, source = data["docs"][doc_id][:5]
+                result = {
+                    "t": title,
+                    "c": category,
+                    "p": path,
+                    "h": handler,
+                    "score": round(score, 4)
+                }
+
+                if source:
+                    result["s"] = source
+
+                if snippets:
+                    result["snippet"] = make_snippet(self._read_excerpt(data, doc_id), terms)
+
+                results.append(result)
+
+        return {
+            "query": query,
+            "total": total,
+            "results": results,
+            "took_ms": round((time.perf_counter() - start_time) * 1000, 3)
+        }
+
+    def _score_all(self, data, terms_data, n_terms, k):
+        """Score every document containing any of the query terms.
+
+        Parameters
+        ----------
+        data : dict
+            The index data.
+        terms_data : list
+            For each query term found in the index, its postings, its scoring parameters
+            (see :any:`_get_bm25_params`), the highest score outside its champion list and its
+            champion list.
+        n_terms : int
+            Amount of query terms.
+        k : int
+            Amount of results to get.
+
+        Returns
+        -------
+        tuple
+            The ``k`` best documents as (document ID, score) tuples and the amount of matching
+            documents.
+        """
+        doclens = data["doclens"]
+        scores = {}
+        matches = {}
+
+        for doc_ids, tfs, idf, norm, length_norm, bound, champions in terms_data:
+            for doc_id, tf in zip(doc_ids, tfs):
+                score = idf * tf * (_bm25_k1 + 1.0) / \
+                    (tf + norm + length_norm * doclens[doc_id])
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+                matches[doc_id] = matches.get(doc_id, 0) + 1
+
+        top = _get_top(scores, matches, n_terms, k)
+
+        return top, len(scores)
+
+    def _score_champions(self, data, terms_data, n_terms, k):
+        """Score only the documents in the champion lists of the query terms.
+
+        Terms without champion list contribute all their documents. The best results are
+        exact if the ``k``-th best score is greater than the sum of the highest scores of the
+        terms outside their champion lists, weighted by the fraction of the query terms that
+        have a champion list, since no other document can score that much. They are always
+        exact for single term queries, since the champion list of a term holds its best
+        documents, ranked as the results are.
+
+        Parameters
+        ----------
+        data : dict
+            The index data.
+        terms_data : list
+            See :any:`_score_all`.
+        n_terms : int
+            Amount of query terms.
+        k : int
+            Amount of results to get.
+
+        Returns
+        -------
+        tuple|None
+            See :any:`_score_all`. None if the best results can't be known from the champion
+            lists.
+        """
+        doclens = data["doclens"]
+        candidates = set()
+        max_other_score = 0.0
+        n_champion_lists = 0
+
+        for doc_ids, tfs, idf, norm, length_norm, bound, champions in terms_data:
+            if champions is None:
+                candidates.update(doc_ids)
+            else:
+                candidates.update(champions)
+                max_other_score += bound
+                n_champion_lists += 1
+
+        if not n_champion_lists:
+            return None
+
+        max_other_score = max_other_score * n_champion_lists / n_terms
+
+        scores = {}
+        matches = {}
+
+        for doc_ids, tfs, idf, norm, length_norm, bound, champions in terms_data:
+            if champions is None:
+                found = zip(doc_ids, tfs)
+            else:
+                df = len(doc_ids)
+                found = []
+
+                for doc_id in candidates:
+                    i = bisect_left(doc_ids, doc_id)
+
+                    if i < df and doc_ids[i] == doc_id:
+                        found.append((doc_id, tfs[i]))
+
+            for doc_id, tf in found:
+                score = idf * tf * (_bm25_k1 + 1.0) / \
+                    (tf + norm + length_norm * doclens[doc_id])
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+                matches[doc_id] = matches.get(doc_id, 0) + 1
+
+        top = _get_top(scores, matches, n_terms, k)
+
+        if n_terms > 1 and (len(top) < k or top[-1][1] <= max_other_score):
+            return None
+
+        if len(terms_data) == 1:
+            total = len(terms_data[0][0])
+        else:
+            total = len(set(terms_data[0][0]).union(*(term_data[0]
+                                                      for term_data in terms_data[1:])))
+
+        return top, total
+
+
+def make_snippet(text, terms, context=80):
+    """Get a snippet of a text around the first occurrence of any of the given terms.
+
+    Parameters
+    ----------
+    text : str
+        A text with its whitespace normalized (a document excerpt).
+    terms : list
+        Lower cased terms.
+    context : int, optional
+        Amount of characters displayed before and after the first match. If no term is found,
+        the snippet is the beginning of the text.
+
+    Returns
+    -------
+    str
+        An HTML escaped snippet with the matched terms wrapped in ``<mark>`` tags.
+    """
+    terms_re = re.compile(r"\b(%s)\b" % "|".join(re.escape(term) for term in terms),
+                          re.IGNORECASE)
+    match = terms_re.search(text)
+    start = max(match.start() - context, 0) if match else 0
+    end = (match.end() + context) if match else context * 2
+    snippet = text[start:end]
+    parts = []
+    last_end = 0
+
+    for term_match in terms_re.finditer(snippet):
+        parts.append(html_escape(snippet[last_end:term_match.start()]))
+        parts.append("<mark>%s</mark>" % html_escape(term_match.group(0)))
+        last_end = term_match.end()
+
+    parts.append(html_escape(snippet[last_end:]))
+
+    return "%s%s%s" % ("… " if start > 0 else "", "".join(parts),
+                       " …" if end < len(text) else "")
+
+
+class SearchIndexBuilder():
+    """Search index builder.
+
+    Documents whose modification time and size didn't change since the previous index was
+    built are not read again. Their postings are copied from the previous index.
+
+    Attributes
+    ----------
+    logger : LogSystem
+        The logger.
+    stats : dict
+        Amount of documents reused from the previous index, indexed and removed.
+    """
+
+    def __init__(self, index_path, www_root, logger, full=False, workers=None):
+        """Initialize.
+
+        Parameters
+        ----------
+        index_path : str
+            Path to the index file.
+        www_root : str
+            Path to the folder containing the documents to index.
+        logger : LogSystem
+            The logger.
+        full : bool, optional
+            Ignore the previous index and index all documents.
+        workers : int, optional
+            Maximum amount of processes used to read documents. If not specified,
+            :any:`concurrent.futures.ProcessPoolExecutor` decides.
+        """
+        self.logger = logger
+        self.stats = {
+            "reused": 0,
+            "indexed": 0,
+            "removed": 0
+        }
+        self._index_path = index_path
+        self._www_root = www_root
+        self._workers = workers
+        self._old_index = None if full else SearchIndex(index_path)
+
+    def build(self, entries, dry_run=False):
+        """Build the index.
+
+        Parameters
+        ----------
+        entries : list
+            "JSON data objects" from the data_tables.json file.
+        dry_run : bool, optional
+            Do not write the index file.
+        """
+        old_docs = self._old_index.get_docs() if self._old_index is not None else []
+        old_doclens = self._old_index.get_doc_lengths() if old_docs else []
+        old_doc_ids = {doc[0]: doc_id for doc_id, doc in enumerate(old_docs)}
+        # Map the IDs of the documents in the previous index to their IDs in the new index.
+        old_to_new = array("l", [-1]) * len(old_docs)
+        docs = []
+        doclens = array("I")
+        excerpts = []
+        reused = []
+        to_index = []
+        seen = set()
+
+        for entry in entries:
+            rel_path = entry.get("p", "")
+
+            if rel_path in seen or not is_indexable(rel_path):
+                continue
+
+            seen.add(rel_path)
+
+            try:
+                stat = os.stat(os.path.join(self._www_root, rel_path))
+            except OSError:
+                continue
+
+            doc = [rel_path, entry.get("t", ""), entry.get("c", ""), entry.get("h", ""),
+                   entry.get("s", ""), stat.st_mtime_ns, stat.st_size]
+            old_doc_id = old_doc_ids.get(rel_path)
+
+            if old_doc_id is not None and old_docs[old_doc_id][1:] == doc[1:]:
+                reused.append((old_doc_id, doc))
+            else:
+                to_index.append(doc)
+
+        # NOTE: Reused documents get their new IDs in the order of their IDs in the previous
+        # index, so their postings copied from the previous index remain sorted.
+        reused.sort(key=lambda item: item[0])
+
+        for old_doc_id, doc in reused:
+            old_to_new[old_doc_id] = len(docs)
+            docs.append(doc)
+            doclens.append(old_doclens[old_doc_id])
+            excerpts.append(self._old_index.get_excerpt(old_doc_id))
+
+        self.stats["reused"] = len(docs)
+        indexed_paths = set(doc[0] for doc in docs + to_index)
+        self.stats["removed"] = sum(1 for doc in old_docs if doc[0] not in indexed_paths)
+
+        # Read the new and modified documents.
+        new_postings = {}
+
+        for doc, result in zip(to_index, self._map_term_frequencies(to_index)):
+            if result is None:
+                self.logger.warning("Document couldn't be indexed: %s" % doc[0], date=False)
+                continue
+
+            frequencies, doc_length, excerpt = result
+            doc_id = len(docs)
+            docs.append(doc)
+            doclens.append(doc_length)
+            excerpts.append(excerpt)
+
+            for term, tf in frequencies.items():
+                postings = new_postings.get(term)
+
+                if postings is None:
+                    postings = new_postings[term] = (array("I"), array("H"))
+
+                postings[0].append(doc_id)
+                postings[1].append(tf)
+
+        self.stats["indexed"] = len(docs) - self.stats["reused"]
+
+        if dry_run:
+            self.logger.log_dry_run("Search index will be created at:\n%s" % self._index_path)
+        else:
+            self._write(docs, doclens, excerpts,
+                        self._merge_postings(old_to_new, new_postings))
+
+        return self.stats
+
+    def _map_term_frequencies(self, docs):
+        """Get the term frequencies of documents using a process pool.
+
+        Parameters
+        ----------
+        docs : list
+            Documents data.
+
+        Returns
+        -------
+        iterator
+            The results of :any:`get_term_frequencies` for each document (in order).
+        """
+        jobs = [(os.path.join(self._www_root, doc[0]), doc[1]) for doc in docs]
+
+        if len(jobs) < 2 or self._workers == 1:
+            return map(_get_term_frequencies_job, jobs)
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        def map_jobs():
+            with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                yield from executor.map(_get_term_frequencies_job, jobs, chunksize=32)
+
+        return map_jobs()
+
+    def _merge_postings(self, old_to_new, new_postings):
+        """Merge the postings of the previous index with the postings of the new documents.
+
+        Parameters
+        ----------
+        old_to_new : array.array
+            Map of document IDs in the previous index to document IDs in the new index (-1 if
+            a document was removed).
+        new_postings : dict
+            The postings of the new documents.
+
+        Yields
+        ------
+        tuple
+            A term (in lexicographical order), the IDs of the documents containing the term and
+            the frequency of the term in each document.
+        """
+        new_terms = sorted(new_postings)
+        new_index = 0
+        old_terms = self._old_index.iter_terms() if self._old_index is not None else iter(())
+
+        for old_term, old_doc_ids, old_tfs in old_terms:
+            while new_index < len(new_terms) and new_terms[new_index] < old_term:
+                term = new_terms[new_index]
+                yield (term,) + new_postings.pop(term)
+                new_index += 1
+
+            doc_ids = array("I")
+            tfs = array("H")
+
+            # NOTE: Reused documents keep the order of their previous IDs and are always stored
+            # before new documents, so document IDs remain sorted.
+            for old_doc_id, tf in zip(old_doc_ids, old_tfs):
+                doc_id = old_to_new[old_doc_id]
+
+                if doc_id != -1:
+                    doc_ids.append(doc_id)
+                    tfs.append(tf)
+
+            if new_index < len(new_terms) and new_terms[new_index] == old_term:
+                new_doc_ids, new_tfs = new_postings.pop(old_term)
+                doc_ids.extend(new_doc_ids)
+                tfs.extend(new_tfs)
+                new_index += 1
+
+            if doc_ids:
+                yield old_term, doc_ids, tfs
+
+        for term in new_terms[new_index:]:
+            yield (term,) + new_postings.pop(term)
+
+    def _write(self, docs, doclens, excerpts, postings):
+        """Write the index file.
+
+        Parameters
+        ----------
+        docs : list
+            Documents data.
+        doclens : array.array
+            Documents length.
+        excerpts : list
+            Documents excerpt.
+        postings : iterator
+            See :any:`SearchIndexBuilder._merge_postings`.
+        """
+        index_parent = os.path.dirname(self._index_path)
+
+        if not os.path.exists(index_parent):
+            os.makedirs(index_parent)
+
+        with file_utils.atomic_write(self._index_path, mode="wb") as index_file:
+            index_file.write(b"\0" * HEADER.size)
+
+            off_docs = index_file.tell()
+            docs_blob = json.dumps(docs).encode("UTF-8")
+            index_file.write(docs_blob)
+            self._pad(index_file)
+
+            off_doclens = index_file.tell()
+            index_file.write(_to_le_bytes(doclens))
+            self._pad(index_file)
+
+            off_excerpts = index_file.tell()
+            excerpts_blobs = [excerpt.encode("UTF-8") for excerpt in excerpts]
+            excerpt_offsets = array("Q", [0])
+
+            for excerpt_blob in excerpts_blobs:
+                excerpt_offsets.append(excerpt_offsets[-1] + len(excerpt_blob))
+
+            index_file.write(_to_le_bytes(excerpt_offsets))
+            index_file.write(b"".join(excerpts_blobs))
+            self._pad(index_file)
+
+            off_postings = index_file.tell()
+            lexicon = bytearray()
+            lexicon_offsets = array("Q")
+            avgdl = sum(doclens) / len(doclens) if doclens else 0.0
+
+            for term, doc_ids, tfs in postings:
+                postings_offset = index_file.tell()
+                index_file.write(_to_le_bytes(doc_ids))
+                index_file.write(_to_le_bytes(tfs))
+                bound = 0.0
+
+                if len(doc_ids) > _champion_list_min_df:
+                    champions, bound = _get_champions(
+                        doc_ids, tfs, doclens,
+                        *_get_bm25_params(len(docs), len(doc_ids), avgdl or 1.0))
+                    index_file.write(_to_le_bytes(champions))
+
+                term_bytes = term.encode("UTF-8")
+                lexicon_offsets.append(len(lexicon))
+                lexicon += _lexicon_entry_head.pack(len(term_bytes))
+                lexicon += term_bytes
+                lexicon += _lexicon_entry_tail.pack(len(doc_ids), postings_offset, bound)
+
+            self._pad(index_file)
+
+            off_lexicon = index_file.tell()
+            index_file.write(lexicon)
+            self._pad(index_file)
+
+            off_lexicon_offsets = index_file.tell()
+            index_file.write(_to_le_bytes(array("Q", (off_lexicon + offset
+                                                      for offset in lexicon_offsets))))
+
+            index_file.seek(0)
+            index_file.write(HEADER.pack(_magic, INDEX_VERSION, len(docs), len(lexicon_offsets),
+                                         avgdl,
+                                         off_docs, len(docs_blob), off_doclens, off_excerpts,
+                                         off_postings, off_lexicon, off_lexicon_offsets))
+
+    def _pad(self, file_obj, alignment=8):
+        """Pad a file with zeros so the next section is aligned.
+
+        Parameters
+        ----------
+        file_obj : file object
+            The file to pad.
+        alignment : int, optional
+            The alignment in bytes.
+        """
+        remainder = file_obj.tell() % alignment
+
+        if remainder:
+            file_obj.write(b"\0" * (alignment - remainder))
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Tests for :any:`archive_utils.extract_archive`.
+
+Run from the repository root with ``python3 -m unittest discover -s AppData/KnowledgeBaseApp/tests
+-t AppData``.
+"""
+import io
+import os
+import tarfile
+import unittest
+import zipfile
+
+from stat import S_IFLNK
+from tempfile import TemporaryDirectory
+
+from ..python_utils import archive_utils
+
+
+def _make_tar(path, members):
+    """Create a tar archive.
+
+    Parameters
+    ----------
+    path : str
+        Path to the archive.
+    members : list
+        Tuples with the name of each member and its content (bytes) or, for symbolic links,
+        a string with the link target.
+    """
+    with tarfile.open(path, "w:gz") as archive:
+        for name, content in members:
+            info = tarfile.TarInfo(name)
+
+            if isinstance(content, str):
+                info.type = tarfile.SYMTYPE
+                info.linkname = content
+                archive.addfile(info)
+            else:
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+
+
+def _make_zip(path, members):
+    """Create a zip archive.
+
+    Parameters
+    ----------
+    path : str
+        Path to the archive.
+    members : list
+        See :any:`_make_tar`.
+    """
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in members:
+            if isinstance(content, str):
+                info = zipfile.ZipInfo(name)
+                info.external_attr = (S_IFLNK | 0o777) << 16
+                archive.writestr(info, content)
+            else:
+                archive.writestr(name, content)
+
+
+class TestExtractArchiveLinks(unittest.TestCase):
+    """Symbolic links in archives must never cause files to be written outside the destination.
+    """
+
+    def setUp(self):
+        self._tmp = TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.outside = os.path.join(self.tmp, "outside")
+        self.destination = None
+        os.makedirs(self.outside)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def extract(self, members, archive_format):
+        archive_path = os.path.join(self.tmp, "archive." + archive_format)
+        self.destination = os.path.join(self.tmp, "destination-" + archive_format)
+        {"tar": _make_tar, "zip": _make_zip}[archive_format](archive_path, members)
+
+        return archive_utils.extract_archive(archive_path, self.destination, archive_format)
+
+    def assert_nothing_outside(self):
+        self.assertEqual(os.listdir(self.outside), [])
+
+    def test_absolute_link_followed_by_member(self):
+        for archive_format in archive_utils.ARCHIVE_FORMATS:
+            with self.subTest(archive_format=archive_format):
+                self.extract([
+                    ("pkg/link", self.outside),
+                    ("pkg/link/evil.txt", b"evil"),
+                ], archive_format)
+
+                self.assert_nothing_outside()
+                self.assertFalse(os.path.islink(os.path.join(self.destination, "pkg", "link")))
+
+    def test_relative_link_outside_destination(self):
+        for archive_format in archive_utils.ARCHIVE_FORMATS:
+            with self.subTest(archive_format=archive_format):
+                self.extract([
+                    ("pkg/link", "../../outside"),
+                    ("pkg/link/evil.txt", b"evil"),
+                ], archive_format)
+
+                self.assert_nothing_outside()
+                self.assertFalse(os.path.islink(os.path.join(self.destination, "pkg", "link")))
+
+    def test_link_changed_by_a_later_link(self):
+        for archive_format in archive_utils.ARCHIVE_FORMATS:
+            with self.subTest(archive_format=archive_format):
+                self.extract([
+                    ("pkg/sub/link", "dot/../../../outside"),
+                    ("pkg/sub/dot", "."),
+                ], archive_format)
+
+                self.assertFalse(os.path.lexists(
+                    os.path.join(self.destination, "pkg", "sub", "link")))
+
+    def test_link_inside_destination(self):
+        for archive_format in archive_utils.ARCHIVE_FORMATS:
+            with self.subTest(archive_format=archive_format):
+                self.extract([
+                    ("pkg/docs/index.html", b"index"),
+                    ("pkg/link", "docs/index.html"),
+                ], archive_format)
+
+                with open(os.path.join(self.destination, "pkg", "link"), "rb") as f:
+                    self.assertEqual(f.read(), b"index")
+
+
+if __name__ == "__main__":
+    unittest.main()
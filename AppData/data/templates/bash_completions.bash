@@ -32,17 +32,20 @@ update_all_repositories \
 handle_all_repositories \
 download_all_archives \
 create_main_json_file \
+build_search_index \
+prerender_inline_content \
 html_to_markdown_files \
 html_to_markdown_clip \
 epub_to_html \
 build_sphinx_docs \
 generate_categories_html \
 generate_index_html \
+compress_static_files \
 open_main_webpage \
---force-download --dry-run --do-not-pull --input-path-storage=" -- "${cur}") )
+--force-download --dry-run --do-not-pull --skip-unchanged --full --check-incremental --workers= --max-per-host= --input-path-storage=" -- "${cur}") )
         ;;
     "server")
-        COMPREPLY=( $(compgen -W "start stop restart --host= --port=" -- "${cur}") )
+        COMPREPLY=( $(compgen -W "start stop restart --host= --port= --server= --workers=" -- "${cur}") )
         _decide_nospace_{current_date} ${COMPREPLY[0]}
         ;;
     "generate")
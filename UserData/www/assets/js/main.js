@@ -201,14 +201,13 @@
             infoFiltered: "(filtered from _MAX_)",
         },
         ordering: true,
-        ajax: function(aData, aCallback) {
-            fetch("/assets/data/data_tables.json", {
-                    cache: "no-cache"
-                })
-                .then(aResponse => aResponse.json())
-                .then(aData => aCallback({
-                    data: aData
-                }));
+        // NOTE: Paging, ordering and searching (including the per column searches performed by
+        // KB_Main.doFilter and KB_Main.filterCategories) are performed by the web server.
+        // Only the rows of the page being displayed are transferred.
+        serverSide: true,
+        ajax: {
+            url: "/data_tables",
+            type: "POST"
         },
         // Sort by title.
         // 0 is the column with the action buttons.
@@ -839,10 +838,11 @@
          */
         loadPageInline() {
             let self = this;
-            fetch("/handle_inline_content", {
-                    method: "POST",
-                    cache: "no-cache",
-                    body: this._URLParams.toString()
+            // NOTE: Use GET requests so the browser caches the rendered pages. With the "no-cache"
+            // mode, cached pages are revalidated with the server (using their ETag) every time.
+            fetch("/handle_inline_content?" + this._URLParams.toString(), {
+                    method: "GET",
+                    cache: "no-cache"
                 })
                 .then((aResponse) => {
                     return aResponse.text();